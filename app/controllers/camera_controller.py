@@ -1,11 +1,45 @@
 # app/controllers/camera_controller.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from datetime import datetime, timezone
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import Response, StreamingResponse
 
 from app.services.camera_service import (
     enqueue_frame,
-    latest_frame,
     register_viewer,
     unregister_viewer,
+    change_viewer_tier,
+    get_viewer_stats,
+    get_demand_stats,
+    latest_detections,
+    latest_frame,
+    SourceType,
+)
+from app.services.camera_recorder import RECORD_BOUNDARY, camera_recorder
+from app.services.frame_buffer import frame_buffer
+from app.services.yolo_scheduler import yolo_scheduler
+from app.services.yolo_service import yolo_client
+from app.services.yolo_worker import yolo_batch_config
+from app.services.yolo_preprocess import get_preprocess_stats
+from app.services.frame_gate import frame_gate_thresholds, get_frame_gate_stats
+from app.services.frame_tiers import TIER_FULL, TIER_NAMES
+from app.services.thumbnail_service import (
+    FLEET_INTERVAL,
+    fleet_thumbnails,
+    get_thumbnail,
+    get_thumbnail_stats,
+)
+from app.services.mjpeg_service import (
+    MJPEG_BOUNDARY,
+    mjpeg_stream,
+    get_mjpeg_stats,
 )
 import asyncio
 import json
@@ -88,63 +122,468 @@ async def simulation_camera_ws(websocket: WebSocket, robot_name: str):
     except Exception as e:
         print(f"[SIM][CAMERA] robot {robot_name}: {e}")
 
+# ==========================================================
+# viewer 화질 단계 (full / 640 / 320)
+# ==========================================================
+def _valid_tier(tier: str) -> str:
+    return tier if tier in TIER_NAMES else TIER_FULL
+
+
+async def _handle_tier_message(
+    source: SourceType,
+    robot_name: str,
+    websocket: WebSocket,
+    tier: str,
+    text: str,
+) -> str:
+    """
+    viewer 가 보낸 텍스트 메시지 처리 → 현재 tier 반환
+    - {"type": "tier", "tier": "320"} 이면 구독 tier 변경
+    - 그 외(ping 등)는 무시
+    """
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        return tier
+
+    if not isinstance(msg, dict) or msg.get("type") != "tier":
+        return tier
+
+    new_tier = _valid_tier(str(msg.get("tier")))
+    await change_viewer_tier(source, robot_name, websocket, tier, new_tier)
+    return new_tier
+
+
 # ==========================================================
 # 서버 → 실제 로봇 대시보드 (뷰어 전용)
 # ==========================================================
 @router.websocket("/view/robot/{robot_name}")
-async def robot_viewer_ws(websocket: WebSocket, robot_name: str):
+async def robot_viewer_ws(
+    websocket: WebSocket,
+    robot_name: str,
+    tier: str = TIER_FULL,
+):
     await websocket.accept()
+    tier = _valid_tier(tier)
     # 실제 로봇 viewer 등록
-    await register_viewer("robot", robot_name, websocket)
-
-    # 이미 프레임이 있으면 바로 1장 전송
-    frame = latest_frame.get("robot", {}).get(robot_name)
-    if frame:
-        try:
-            await websocket.send_bytes(frame)
-            print(f"[ROBOT][CAMERA][VIEW] sent cached frame robot={robot_name}")
-        except Exception as e:
-            print(f"[ROBOT][CAMERA][VIEW] cache send failed: {e}")
+    # (캐시된 최신 프레임이 있으면 등록 시 첫 화면으로 전송된다)
+    await register_viewer("robot", robot_name, websocket, tier)
 
     try:
         while True:
             # viewer는 아무것도 안 보내도 되지만,
-            # 브라우저가 ping/pong 구현이 필요하면 여기서 receive_* 호출 유지
-            await websocket.receive_text()
+            # 화질 변경 요청({"type": "tier", "tier": "320"})은 여기서 처리
+            text = await websocket.receive_text()
+            tier = await _handle_tier_message("robot", robot_name, websocket, tier, text)
 
     except WebSocketDisconnect:
         print(f"[ROBOT][CAMERA][VIEW] viewer disconnected ({robot_name})")
 
     finally:
-        await unregister_viewer("robot", robot_name, websocket)
+        await unregister_viewer("robot", robot_name, websocket, tier)
 
 
 # ==========================================================
 # 서버 → 시뮬레이션 대시보드 (뷰어 전용)
 # ==========================================================
 @router.websocket("/view/sim/{robot_name}")
-async def sim_viewer_ws(websocket: WebSocket, robot_name: str):
+async def sim_viewer_ws(
+    websocket: WebSocket,
+    robot_name: str,
+    tier: str = TIER_FULL,
+):
     await websocket.accept()
+    tier = _valid_tier(tier)
     # 시뮬 viewer 등록
-    await register_viewer("sim", robot_name, websocket)
-
-    # 이미 프레임이 있으면 바로 1장 전송
-    frame = latest_frame.get("sim", {}).get(robot_name)
-    if frame:
-        try:
-            await websocket.send_bytes(frame)
-            print(f"[SIM][CAMERA][VIEW] sent cached frame robot={robot_name}")
-        except Exception as e:
-            print(f"[SIM][CAMERA][VIEW] cache send failed: {e}")
+    # (캐시된 최신 프레임이 있으면 등록 시 첫 화면으로 전송된다)
+    await register_viewer("sim", robot_name, websocket, tier)
 
     try:
         while True:
             # viewer는 아무것도 안 보내도 되지만,
-            # 브라우저가 ping/pong 구현이 필요하면 여기서 receive_* 호출 유지
-            await websocket.receive_text()
+            # 화질 변경 요청({"type": "tier", "tier": "320"})은 여기서 처리
+            text = await websocket.receive_text()
+            tier = await _handle_tier_message("sim", robot_name, websocket, tier, text)
 
     except WebSocketDisconnect:
         print(f"[SIM][CAMERA][VIEW] viewer disconnected ({robot_name})")
 
     finally:
-        await unregister_viewer("sim", robot_name, websocket)
+        await unregister_viewer("sim", robot_name, websocket, tier)
+
+
+# ==========================================================
+# 서버 → HTTP viewer : MJPEG 스트림 (벽걸이 화면 / <img> 태그용)
+# ==========================================================
+@router.get("/mjpeg/{source}/{robot_name}")
+async def mjpeg_view(
+    source: SourceType,
+    robot_name: str,
+    fps: float | None = Query(None, gt=0, le=60),
+):
+    """
+    multipart/x-mixed-replace MJPEG 스트림
+    - <img src="/camera/mjpeg/robot/tb3_1"> 로 바로 시청 가능
+    - fps : 클라이언트별 최대 프레임 속도 (느리면 중간 프레임은 건너뜀)
+    - YOLO 결과는 /camera/api/detections/{source}/{robot_name} 로 따로 조회
+    """
+    print(f"[CAMERA][MJPEG] + client {source}/{robot_name}")
+    return StreamingResponse(
+        mjpeg_stream(
+            source,
+            robot_name,
+            initial_frame=latest_frame.get(source, {}).get(robot_name),
+            max_fps=fps,
+        ),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-cache, no-store"},
+    )
+
+
+@router.get("/api/detections/{source}/{robot_name}")
+def latest_detection(source: SourceType, robot_name: str):
+    """
+    가장 최근 YOLO 결과 (MJPEG 시청 클라이언트가 주기적으로 조회)
+    - seq / lag 는 WebSocket 의 "yolo" 메시지와 동일한 의미
+    """
+    result = latest_detections.get(source, {}).get(robot_name)
+    if result is None:
+        return {"seq": None, "lag": None, "detections": [], "timestamp": None}
+    return result
+
+
+@router.get("/api/mjpeg/stats")
+def mjpeg_stats():
+    """
+    MJPEG 채널별 HTTP 클라이언트 수
+    """
+    return get_mjpeg_stats()
+
+
+# ==========================================================
+# 서버 → 대시보드 : 전체 로봇 썸네일 (fleet overview)
+# ==========================================================
+@router.websocket("/fleet")
+async def fleet_ws(
+    websocket: WebSocket,
+    source: SourceType | None = None,
+    interval: float = Query(FLEET_INTERVAL, ge=0.2, le=60),
+):
+    """
+    연결 1개로 모든 로봇의 작은 썸네일을 주기적으로 받는다.
+
+    - interval 초마다 프레임이 바뀐 로봇의 썸네일만 전송
+    - 메시지 순서: {"type": "thumb", "source", "robot", "seq"} → 바로 뒤에 JPEG binary
+    """
+    await websocket.accept()
+    print(f"[CAMERA][FLEET] + client source={source or 'all'}")
+
+    sent_seq: dict = {}
+    try:
+        while True:
+            for src, robot_name, thumb in await fleet_thumbnails(source):
+                key = (src, robot_name)
+                if sent_seq.get(key) == thumb.seq:
+                    continue
+                sent_seq[key] = thumb.seq
+
+                await websocket.send_json(
+                    {
+                        "type": "thumb",
+                        "source": src,
+                        "robot": robot_name,
+                        "seq": thumb.seq,
+                    }
+                )
+                await websocket.send_bytes(thumb.data)
+
+            # 클라이언트 메시지는 없지만, 끊김을 바로 알기 위해 receive 로 대기
+            try:
+                await asyncio.wait_for(websocket.receive_text(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    except (WebSocketDisconnect, RuntimeError):
+        print("[CAMERA][FLEET] - client disconnected")
+
+
+@router.get("/thumb/{source}/{robot_name}")
+async def robot_thumbnail(request: Request, source: SourceType, robot_name: str):
+    """
+    로봇 1대의 최신 썸네일 (ETag / If-None-Match 지원)
+    - 프레임이 바뀌지 않았으면 304 (본문 없음)
+    """
+    thumb = await get_thumbnail(source, robot_name)
+    if thumb is None:
+        raise HTTPException(status_code=404, detail="no frame")
+
+    headers = {"ETag": thumb.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == thumb.etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=thumb.data, media_type="image/jpeg", headers=headers)
+
+
+@router.get("/api/thumb/stats")
+def thumbnail_stats():
+    """
+    썸네일 캐시 상태 (인코딩 횟수 / 캐시 적중 수)
+    """
+    return get_thumbnail_stats()
+
+
+# ==========================================================
+# 서버 → viewer : 최근 N초 다시보기 (instant replay)
+# ==========================================================
+@router.websocket("/replay/{source}/{robot_name}")
+async def replay_ws(
+    websocket: WebSocket,
+    source: SourceType,
+    robot_name: str,
+    seconds_ago: float | None = Query(None, gt=0),
+    duration: float | None = Query(None, gt=0),
+    speed: float = Query(1.0, gt=0, le=16),
+):
+    """
+    링 버퍼에 남아 있는 최근 프레임을 원래 간격대로 다시 보내준다.
+
+    - seconds_ago : 몇 초 전부터 (없으면 버퍼 전체)
+    - duration    : 몇 초 동안 (없으면 현재까지)
+    - speed       : 재생 배속
+
+    메시지 순서:
+      {"type": "replay_start", ...}
+      (binary 프레임, {"type": "yolo", "seq": ...}) 반복
+      {"type": "replay_end"}
+    """
+    await websocket.accept()
+
+    # 재생 중 버퍼가 바뀌어도 영향 없도록 시작 시점의 복사본 사용
+    frames = frame_buffer.window(source, robot_name, seconds_ago, duration)
+    print(f"[CAMERA][REPLAY] {source}/{robot_name} frames={len(frames)}")
+
+    try:
+        await websocket.send_json(
+            {
+                "type": "replay_start",
+                "frames": len(frames),
+                "from": frames[0].timestamp if frames else None,
+                "to": frames[-1].timestamp if frames else None,
+            }
+        )
+
+        prev_ts = None
+        for item in frames:
+            if prev_ts is not None:
+                await asyncio.sleep(max(0.0, item.timestamp - prev_ts) / speed)
+            prev_ts = item.timestamp
+
+            await websocket.send_bytes(item.frame)
+            if item.detections is not None:
+                await websocket.send_json(
+                    {"type": "yolo", "seq": item.seq, "detections": item.detections}
+                )
+
+        await websocket.send_json({"type": "replay_end"})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        print(f"[CAMERA][REPLAY] viewer disconnected ({source}/{robot_name})")
+
+
+@router.get("/api/replay/stats")
+def replay_stats():
+    """
+    replay 링 버퍼 메모리 사용량 (로봇별 프레임 수 / 바이트 / 보관 구간)
+    """
+    return frame_buffer.stats()
+
+
+# ==========================================================
+# 디스크 녹화 조회 (CAMERA_RECORD_DIR 설정 시)
+# ==========================================================
+def _parse_record_time(value: str) -> float:
+    """
+    ISO datetime 또는 epoch 초 → epoch 초
+    - timezone 없는 ISO 값은 UTC 로 간주 (히스토리 DB 와 동일 기준)
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="시각은 ISO datetime 또는 epoch 초여야 합니다.",
+        )
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _require_recorder():
+    if not camera_recorder.enabled:
+        raise HTTPException(status_code=404, detail="camera recording is disabled")
+
+
+@router.get("/api/record/{source}/{robot_name}/frame")
+def recorded_frame(source: SourceType, robot_name: str, t: str):
+    """
+    시각 t 이전(포함) 가장 가까운 녹화 프레임 1장 (JPEG)
+    """
+    _require_recorder()
+    found = camera_recorder.get_frame_at(source, robot_name, _parse_record_time(t))
+    if found is None:
+        raise HTTPException(status_code=404, detail="no recorded frame")
+
+    ts, frame = found
+    return Response(
+        content=frame,
+        media_type="image/jpeg",
+        headers={"X-Frame-Timestamp": f"{ts:.3f}"},
+    )
+
+
+@router.get("/api/record/{source}/{robot_name}/index")
+def recorded_index(source: SourceType, robot_name: str, start: str, end: str):
+    """
+    [start, end] 구간에 녹화된 프레임 timestamp 목록
+    - 프레임 본문은 /frames 로 구간째 받거나 /frame?t=... 로 1장씩 가져온다
+    """
+    _require_recorder()
+    timestamps = camera_recorder.index_range(
+        source, robot_name, _parse_record_time(start), _parse_record_time(end)
+    )
+    return {"count": len(timestamps), "timestamps": timestamps}
+
+
+@router.get("/api/record/{source}/{robot_name}/frames")
+def recorded_frames(
+    source: SourceType,
+    robot_name: str,
+    start: str,
+    end: str,
+    limit: int | None = Query(None, ge=1),
+):
+    """
+    [start, end] 구간 녹화 프레임을 요청 1번으로 스트리밍 (multipart/mixed)
+    - part 마다 JPEG 1장 + X-Frame-Timestamp 헤더
+    - segment 는 mmap 으로 읽고, 읽는 즉시 전송 (스레드풀에서 실행)
+    """
+    _require_recorder()
+    return StreamingResponse(
+        camera_recorder.iter_range_multipart(
+            source,
+            robot_name,
+            _parse_record_time(start),
+            _parse_record_time(end),
+            limit,
+        ),
+        media_type=f"multipart/mixed; boundary={RECORD_BOUNDARY}",
+    )
+
+
+@router.get("/api/record/stats")
+def record_stats():
+    """
+    녹화 스레드 상태 (대기 / 기록 / 드롭 / retention 삭제 수)
+    """
+    return camera_recorder.stats()
+
+
+# ==========================================================
+# YOLO 스케줄링 모니터링 / 우선순위 설정
+# ==========================================================
+@router.get("/api/yolo/stats")
+def yolo_stats():
+    """
+    로봇별 YOLO 추론 속도 / staleness / 드롭 수
+    """
+    return yolo_scheduler.stats()
+
+
+@router.get("/api/viewers")
+def camera_viewer_stats():
+    """
+    카메라 viewer 별 송신 큐 상태 (드롭 수 / 지연시간)
+    """
+    return get_viewer_stats()
+
+
+@router.get("/api/demand")
+def camera_demand_stats():
+    """
+    로봇별 시청자 수 / 로봇에 보낸 카메라 모드 (live / idle)
+    """
+    return get_demand_stats()
+
+
+@router.get("/api/yolo/preprocess")
+def yolo_preprocess_stats():
+    """
+    YOLO 전처리 효과 (전송 바이트 절감량 / 추가 지연시간)
+    """
+    return get_preprocess_stats()
+
+
+@router.get("/api/yolo/backends")
+def yolo_backends():
+    """
+    YOLO 추론 backend 별 상태 (breaker / outstanding / 지연시간)
+    """
+    return yolo_client.stats()
+
+
+@router.post("/api/yolo/priority/{source}/{robot_name}")
+def set_yolo_priority(
+    source: SourceType,
+    robot_name: str,
+    priority: float = Query(1.0, gt=0),
+):
+    """
+    로봇별 YOLO 우선순위 설정 (기본 1.0, 클수록 더 자주 추론)
+    - 실제 가중치는 priority × 시청 중인 viewer 수
+    """
+    yolo_scheduler.set_priority(source, robot_name, priority)
+    return {"status": "ok", "source": source, "robot_name": robot_name, "priority": priority}
+
+
+@router.post("/api/yolo/batch")
+def set_yolo_batch(
+    size: int = Query(..., ge=1, le=32),
+    window: float = Query(0.02, ge=0.0, le=1.0),
+):
+    """
+    YOLO batch 추론 설정 변경
+    - size=1 이면 단건 추론 모드
+    - window : 첫 프레임 이후 다른 로봇 프레임을 기다리는 시간(초)
+    """
+    yolo_batch_config["size"] = size
+    yolo_batch_config["window"] = window
+    return {"status": "ok", **yolo_batch_config}
+
+
+# ==========================================================
+# 장면 변화 감지(frame gate) 모니터링 / threshold 설정
+# ==========================================================
+@router.get("/api/yolo/gate")
+def yolo_gate_stats():
+    """
+    source 별 YOLO 스킵(캐시 재사용) 비율
+    """
+    return get_frame_gate_stats()
+
+
+@router.post("/api/yolo/gate/{source}")
+def set_yolo_gate_threshold(
+    source: SourceType,
+    threshold: float = Query(..., ge=0.0, le=255.0),
+):
+    """
+    source 별 변화 감지 threshold 설정 (0~255 평균 픽셀 차이, 0 이면 비활성)
+    """
+    frame_gate_thresholds[source] = threshold
+    return {"status": "ok", "source": source, "threshold": threshold}
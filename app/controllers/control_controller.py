@@ -19,6 +19,7 @@ from app.services.control_service import (
     register_robot_control_ws,
     unregister_robot_control_ws,
 )
+from app.services.camera_service import sync_camera_mode
 
 router = APIRouter(prefix="/control", tags=["control"])
 templates = Jinja2Templates(directory="app/templates")
@@ -106,10 +107,13 @@ async def api_goto(
 async def robot_control_ws(websocket: WebSocket, robot_name: str):
     """
     실제 로봇이 접속하는 제어 WebSocket.
-    - 서버 → 로봇 : 이동 명령 전송
+    - 서버 → 로봇 : 이동 명령 / 카메라 속도 명령 전송
     """
     await websocket.accept()
     await register_robot_control_ws(robot_name, websocket)
+
+    # 아무도 보지 않는 로봇이면 카메라 속도를 낮추도록 요청
+    sync_camera_mode(robot_name)
     print(f"[ROBOT][CONTROL][WS] connected {robot_name}")
 
     try:
@@ -6,7 +6,7 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
-from app.models.robot_state_history import RobotStateHistory
+from app.services.robot_service import get_distinct_robot_names
 from app.controllers.auth_controller import get_current_user
 from app.models.user import User
 
@@ -22,13 +22,7 @@ def dashboard(request: Request,
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
-    robot_names = (
-        db.query(RobotStateHistory.robot_name)
-        .distinct()
-        .order_by(RobotStateHistory.robot_name)
-        .all()
-    )
-    robot_names = [r[0] for r in robot_names]
+    robot_names = get_distinct_robot_names(db)
 
     selected_robot = robot_names[0] if robot_names else None
 
@@ -2,13 +2,31 @@
 
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.requests import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
-from app.models.robot_state_history import RobotStateHistory
+from app.services.path_cache import (
+    PathWindow,
+    get_path_cache_stats,
+    load_window,
+    load_windows,
+    window_etag,
+)
+from app.services.path_service import (
+    PATH_BATCH_MAX_ROBOTS,
+    PATH_FORMATS,
+    PATH_MEDIA_TYPES,
+    encode_path_arrays,
+    encode_paths_arrays,
+    path_points,
+    stream_path,
+    stream_paths,
+)
+from app.services.path_simplify import simplify_indices
 
 # /path로 시작하는 URL들을 담당하는 라우터
 router = APIRouter(prefix="/path", tags=["path"])
@@ -17,6 +35,42 @@ router = APIRouter(prefix="/path", tags=["path"])
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _parse_window(start: str, end: str):
+    # 문자열 → datetime 변환 (형식이 잘못되면 400 에러 응답)
+    try:
+        return datetime.fromisoformat(start), datetime.fromisoformat(end)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="start / end는 'YYYY-MM-DDTHH:MM:SS' 형식의 ISO datetime 이어야 합니다.",
+        )
+
+
+def _check_format(format: str):
+    if format not in PATH_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format 은 {', '.join(PATH_FORMATS)} 중 하나여야 합니다.",
+        )
+
+
+def _cache_headers(windows, etag: str) -> dict:
+    closed = all(window.closed for window in windows)
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=3600" if closed else "no-cache",
+    }
+
+
+def _reduce(window: PathWindow, max_points: int | None):
+    # 이어 붙인 경로에 max_points 적용
+    t, xy = window.t, window.xy
+    if max_points is not None:
+        idx = simplify_indices(xy, max_points)
+        t, xy = t[idx], xy[idx]
+    return t, xy
+
+
 @router.get("/")
 def path_page(request: Request):
     """
@@ -29,9 +83,13 @@ def path_page(request: Request):
 
 @router.get("/api/robot/{robot_name}/path")
 def get_robot_path(
+    request: Request,
     robot_name: str,
     start: str,
     end: str,
+    max_points: int | None = Query(None, ge=2),
+    tolerance: float | None = Query(None, ge=0.0),
+    format: str = "json",
     db: Session = Depends(get_db),
 ):
     """
@@ -45,44 +103,173 @@ def get_robot_path(
         endFix   = end   + ":00"
         fetch(`/path/api/robot/${robotName}/path?start=${startFix}&end=${endFix}`)
 
-    - DB 테이블: RobotStateHistory
-      * timestamp 컬럼 기준으로 구간 필터
-      * pos_x, pos_y가 있는 것만 반환
+    - DB 테이블: OdomHistory (odom_history)
+      * primary key (robot_name, timestamp) 범위 읽기로 구간 필터
+      * timestamp, pos_x, pos_y 컬럼만 server-side cursor 로 읽는다
+        (app/services/path_service.py)
+
+    - 경로 단순화 (선택, app/services/path_simplify.py)
+      * max_points : 반환할 최대 포인트 수 (시작 / 끝 / 꺾이는 지점 우선)
+      * tolerance  : 허용 오차(m), 원래 경로에서 이 거리 이내로만 단순화
+      * 응답의 raw_count / count / reduced 로 줄어든 개수 확인
+
+    - format
+      * json   : {"points": [...], "raw_count", "count", "reduced"} (기본)
+      * ndjson : 포인트 1개 = 1줄, chunk 단위 스트리밍
+      * binary : 포인트당 16 byte (t f64 epoch 초 | x f32 | y f32), little-endian
+      * ndjson / binary 에 단순화를 같이 쓰면 X-Path-Raw-Count / X-Path-Count 헤더로 개수 전달
+
+    - 시간 bucket 캐시 (app/services/path_cache.py)
+      * 이미 닫힌 bucket 은 캐시에서, 열린 구간만 DB 에서 읽어서 이어 붙인다
+      * 응답에 ETag → If-None-Match 가 같으면 304 (본문 없음)
+      * 구간 전체가 닫혀 있으면 Cache-Control: private, max-age=3600
+      * 단순화 없는 ndjson / binary 는 캐시 없이 DB 에서 바로 스트리밍
     """
 
-    # 문자열 → datetime 변환 (형식이 잘못되면 400 에러 응답)
-    try:
-        start_dt = datetime.fromisoformat(start)
-        end_dt = datetime.fromisoformat(end)
-    except ValueError:
+    start_dt, end_dt = _parse_window(start, end)
+    _check_format(format)
+
+    simplify = max_points is not None or tolerance is not None
+
+    # 단순화 없는 스트리밍: 읽는 즉시 전송 (전체 경로를 메모리에 올리지 않음)
+    if format != "json" and not simplify:
+        return StreamingResponse(
+            stream_path(format, robot_name, start_dt, end_dt),
+            media_type=PATH_MEDIA_TYPES[format],
+        )
+
+    # 닫힌 bucket 은 캐시 + 나머지 DB 조회 (tolerance 는 bucket 별로 적용)
+    window = load_window(db, robot_name, start_dt, end_dt, tolerance)
+
+    etag = window_etag([window], robot_name, start, end, max_points, tolerance, format)
+    headers = _cache_headers([window], etag)
+
+    # 브라우저가 이미 같은 응답을 갖고 있음
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    t, xy = _reduce(window, max_points)
+    raw_count = window.raw_count
+
+    if format != "json":
+        return StreamingResponse(
+            encode_path_arrays(format, t, xy),
+            media_type=PATH_MEDIA_TYPES[format],
+            headers={
+                **headers,
+                "X-Path-Raw-Count": str(raw_count),
+                "X-Path-Count": str(len(t)),
+            },
+        )
+
+    # Chart.js의 data용 포인트 목록
+    return JSONResponse(
+        {
+            "points": path_points(t, xy),
+            "raw_count": raw_count,
+            "count": len(t),
+            "reduced": raw_count - len(t),
+        },
+        headers=headers,
+    )
+
+
+@router.get("/api/robots/path")
+def get_robots_path(
+    request: Request,
+    robots: str,
+    start: str,
+    end: str,
+    max_points: int | None = Query(None, ge=2),
+    tolerance: float | None = Query(None, ge=0.0),
+    format: str = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    여러 로봇의 이동 경로를 한 번에 반환하는 API.
+
+    - 호출 형태:
+      /path/api/robots/path?robots=tb3_1,tb3_2&start=...&end=...
+
+    - robot_name IN (...) grouped query 1번으로 모든 로봇을 읽는다
+      (닫힌 bucket 은 단일 로봇 API 와 같은 캐시 사용)
+    - max_points / tolerance 는 로봇별로 적용
+    - format
+      * json   : {"robots": {name: {"points", "raw_count", "count", "reduced"}}, "raw_count", "count"}
+      * ndjson : 포인트 1개 = 1줄, 각 줄에 "robot" 필드
+      * binary : name_len(u8) | name | count(u32) | 16 byte 레코드 × count, frame 반복
+    - ETag / 304 / Cache-Control 은 단일 로봇 API 와 동일
+    """
+    # 쉼표 구분 로봇 이름 (순서 유지, 중복 제거)
+    robot_names = list(dict.fromkeys(
+        name.strip() for name in robots.split(",") if name.strip()
+    ))
+    if not robot_names:
+        raise HTTPException(status_code=400, detail="robots 에 로봇 이름을 1개 이상 지정해야 합니다.")
+    if len(robot_names) > PATH_BATCH_MAX_ROBOTS:
         raise HTTPException(
             status_code=400,
-            detail="start / end는 'YYYY-MM-DDTHH:MM:SS' 형식의 ISO datetime 이어야 합니다.",
+            detail=f"robots 는 최대 {PATH_BATCH_MAX_ROBOTS}대까지 지정할 수 있습니다.",
         )
 
-    # DB 조회: 특정 로봇 + 시간 구간
-    rows = (
-        db.query(RobotStateHistory)
-        .filter(RobotStateHistory.robot_name == robot_name)
-        .filter(RobotStateHistory.timestamp >= start_dt)
-        .filter(RobotStateHistory.timestamp <= end_dt)
-        .order_by(RobotStateHistory.timestamp.asc())
-        .all()
+    start_dt, end_dt = _parse_window(start, end)
+    _check_format(format)
+
+    simplify = max_points is not None or tolerance is not None
+
+    # 단순화 없는 스트리밍: grouped query 결과를 읽는 즉시 전송
+    if format != "json" and not simplify:
+        return StreamingResponse(
+            stream_paths(format, robot_names, start_dt, end_dt),
+            media_type=PATH_MEDIA_TYPES[format],
+        )
+
+    windows = load_windows(db, robot_names, start_dt, end_dt, tolerance)
+
+    etag = window_etag(
+        list(windows.values()), robot_names, start, end, max_points, tolerance, format
     )
+    headers = _cache_headers(windows.values(), etag)
 
-    # Chart.js의 data용 포인트 목록 생성
-    points = []
-    for r in rows:
-        # 위치 정보 없는 레코드는 건너뜀
-        if r.pos_x is None or r.pos_y is None or r.timestamp is None:
-            continue
-
-        points.append(
-            {
-                "x": r.pos_x,
-                "y": r.pos_y,
-                "t": r.timestamp.isoformat(),
-            }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    paths = {name: _reduce(window, max_points) for name, window in windows.items()}
+    raw_count = sum(window.raw_count for window in windows.values())
+    count = sum(len(t) for t, _xy in paths.values())
+
+    if format != "json":
+        return StreamingResponse(
+            encode_paths_arrays(format, paths),
+            media_type=PATH_MEDIA_TYPES[format],
+            headers={
+                **headers,
+                "X-Path-Raw-Count": str(raw_count),
+                "X-Path-Count": str(count),
+            },
         )
 
-    return {"points": points}
+    return JSONResponse(
+        {
+            "robots": {
+                name: {
+                    "points": path_points(t, xy),
+                    "raw_count": windows[name].raw_count,
+                    "count": len(t),
+                    "reduced": windows[name].raw_count - len(t),
+                }
+                for name, (t, xy) in paths.items()
+            },
+            "raw_count": raw_count,
+            "count": count,
+        },
+        headers=headers,
+    )
+
+
+@router.get("/api/cache/stats")
+def path_cache_stats():
+    """
+    경로 bucket 캐시 상태 (entries / bytes / hits / misses / evictions)
+    """
+    return get_path_cache_stats()
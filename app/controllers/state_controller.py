@@ -3,29 +3,136 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import asyncio
 import json
-import math
-from typing import Dict, Set
+import os
+import time
 
+from app.services.broadcast_hub import encode_json, viewer_hub
+from app.services.lidar_scan import normalize_scan_payload
+from app.services.state_codec import encode_state_frame
 from app.services.state_history_service import enqueue_state_history
+from app.services.state_history_worker import get_state_history_stats
 
 router = APIRouter(prefix="/state", tags=["state"])
 
 # ==========================================================
-# Viewer 관리
-# - robot_name 별로 접속 중인 WebSocket 목록
+# Viewer 관리 (공용 레지스트리 viewer_hub)
+# - 채널 key 는 ("state", source, robot_name)
+# - 상태 메시지는 1번만 직렬화해서 모든 viewer 가 공유
+# - viewer 마다 송신 task 가 있어서 로봇 수신 루프가 viewer 전송을 기다리지 않음
+# - 다중 채널 소켓(/viewer/ws)도 같은 채널을 구독한다
+# - conflation: viewer 별로 메시지 type 마다 최신 값 1개만 유지하고
+#   type 별 최대 속도로만 전송 (브라우저가 그리지도 못하는 30Hz scan 방지)
 # ==========================================================
-robot_viewers: Dict[str, Set[WebSocket]] = {}
+# type 별 최대 전송 속도(Hz), 예) "scan=10,battery=2"
+# - 목록에 없는 type 은 속도 제한 없이 최신 값만 전송
+STATE_VIEWER_RATES = os.getenv(
+    "STATE_VIEWER_RATES", "scan=10,odom=10,cmd_vel=5,battery=2"
+)
 
-# viewer 목록 동시 접근 보호
-viewer_lock = asyncio.Lock()
 
-# 라이다 최대 거리 (서버 기준 clamp 값)
-LIDAR_MAX_RANGE = 3.5
+def parse_state_rates(text: str | None) -> dict:
+    """
+    "scan=10,battery=2" → {"scan": 10.0, "battery": 2.0} (잘못된 항목은 무시)
+    """
+    rates = {}
+    for item in (text or "").split(","):
+        name, _, value = item.partition("=")
+        try:
+            hz = float(value)
+        except ValueError:
+            continue
+        if name.strip() and hz > 0:
+            rates[name.strip()] = hz
+    return rates
+
 
+state_rate_limits = parse_state_rates(STATE_VIEWER_RATES)
 
+
+def viewer_state_rates(requested: dict | None = None) -> dict:
+    """
+    viewer 가 요청한 속도와 서버 최대 속도 중 작은 값
+    - viewer 는 더 낮은 속도만 요청할 수 있다
+    """
+    rates = dict(state_rate_limits)
+    for name, hz in (requested or {}).items():
+        try:
+            hz = float(hz)
+        except (TypeError, ValueError):
+            continue
+        if hz <= 0:
+            continue
+        rates[name] = min(hz, rates[name]) if name in rates else hz
+    return rates
+
+
+def state_channel(source: str, robot_name: str) -> tuple:
+    return ("state", source, robot_name)
+
+
+# ==========================================================
+# binary 상태 포맷 (opt-in, app/services/state_codec.py)
+# - ?format=binary 로 구독한 viewer 는 JSON 대신 binary frame 을 받는다
+# - scan ranges 인코딩: "f32" (float32, m) / "u16" (uint16, mm 양자화)
+# - 채널 key 는 ("state_bin", source, robot_name, scan 인코딩)
+# - binary 구독자가 있을 때만 인코딩 (발행 1건당 인코딩별 1번)
 # ==========================================================
-# 라이다 데이터 정규화
+STATE_FORMATS = ("json", "binary")
+STATE_SCAN_ENCODINGS = ("f32", "u16")
+
+# 로봇별 상태 메시지 순번 (binary header 의 seq)
+_state_seq: dict = {}
+
+
+def state_binary_channel(source: str, robot_name: str, scan: str = "f32") -> tuple:
+    return ("state_bin", source, robot_name, scan)
+
+
+def state_view_channel(
+    source: str,
+    robot_name: str,
+    fmt: str = "json",
+    scan: str = "f32",
+) -> tuple:
+    """
+    viewer 가 요청한 포맷에 맞는 채널 key
+    """
+    if fmt == "binary":
+        return state_binary_channel(
+            source, robot_name, scan if scan in STATE_SCAN_ENCODINGS else "f32"
+        )
+    return state_channel(source, robot_name)
+
+
+def publish_state(source: str, robot_name: str, data: dict) -> None:
+    """
+    상태 메시지 발행 (JSON 채널 + binary 채널)
+    - binary 로 표현할 수 없는 type 은 binary 구독자에게도 JSON 으로 전송
+    """
+    key = (source, robot_name)
+    seq = _state_seq.get(key, 0) + 1
+    _state_seq[key] = seq
+
+    slot = data.get("type")
+    viewer_hub.publish_json(state_channel(source, robot_name), data, slot=slot)
+
+    now = time.time()
+    for scan in STATE_SCAN_ENCODINGS:
+        channel = state_binary_channel(source, robot_name, scan)
+        if not viewer_hub.has_subscribers(channel):
+            continue
+
+        frame = encode_state_frame(
+            robot_name, data, seq, now, quantize=(scan == "u16")
+        )
+        viewer_hub.publish(
+            channel, frame if frame is not None else encode_json(data), slot=slot
+        )
+
+# ==========================================================
+# 라이다 데이터 정규화 (app/services/lidar_scan.py, NumPy 벡터 연산)
 # - NaN / inf / 0 이하 / 최대 범위 초과 값 보정
+# - ranges 는 np.ndarray 로 교체 → 브로드캐스트 / DB 저장에서 그대로 재사용
 # ==========================================================
 def normalize_scan_data(data: dict) -> dict:
     """
@@ -35,22 +142,9 @@ def normalize_scan_data(data: dict) -> dict:
     if data.get("type") != "scan":
         return data
 
-    ranges = data.get("data", {}).get("ranges")
-    if not isinstance(ranges, list):
-        return data
-
-    normalized = []
-    for r in ranges:
-        if not isinstance(r, (int, float)):
-            normalized.append(LIDAR_MAX_RANGE)
-        elif not math.isfinite(r):
-            normalized.append(LIDAR_MAX_RANGE)
-        elif r <= 0.0:
-            normalized.append(LIDAR_MAX_RANGE)
-        else:
-            normalized.append(min(r, LIDAR_MAX_RANGE))
-
-    data["data"]["ranges"] = normalized
+    payload = data.get("data")
+    if isinstance(payload, dict):
+        normalize_scan_payload(payload)
     return data
 
 
@@ -93,27 +187,9 @@ async def robot_state_ws(websocket: WebSocket, robot_name: str):
                         }
                     }
             # ------------------------------
-            # viewer 브로드캐스트
+            # viewer 브로드캐스트 (포맷별 인코딩 1번, type 별 최신 값으로 덮어쓰기만 함)
             # ------------------------------
-            async with viewer_lock:
-                viewers = list(robot_viewers.get(robot_name, set()))
-
-            if viewers:
-                results = await asyncio.gather(
-                    *[ws.send_json(data) for ws in viewers],
-                    return_exceptions=True,
-                )
-
-                # 전송 실패한 WebSocket 정리
-                dead = [
-                    ws for ws, r in zip(viewers, results)
-                    if isinstance(r, Exception)
-                ]
-
-                if dead:
-                    async with viewer_lock:
-                        for ws in dead:
-                            robot_viewers.get(robot_name, set()).discard(ws)
+            publish_state("robot", robot_name, data)
 
             # ------------------------------
             # DB 저장 큐잉 (비동기)
@@ -132,19 +208,36 @@ async def robot_state_ws(websocket: WebSocket, robot_name: str):
 # 2) 서버 → 대시보드 viewer
 # ==========================================================
 @router.websocket("/view/robot/{robot_name}")
-async def robot_view_ws(websocket: WebSocket, robot_name: str):
+async def robot_view_ws(
+    websocket: WebSocket,
+    robot_name: str,
+    rates: str | None = None,
+    format: str = "json",
+    scan: str = "f32",
+):
     """
     대시보드에서 접속하는 viewer WebSocket
 
     - 서버는 이 소켓으로 상태를 push만 한다
     - viewer가 보내는 메시지는 무시 (keep-alive 용)
+    - rates  : type 별 최대 수신 속도 (예: ?rates=scan=5,battery=1)
+    - format : "json" (기본) / "binary" (state_codec 포맷)
+    - scan   : binary 일 때 scan ranges 인코딩 "f32" / "u16"
     """
     await websocket.accept()
 
-    async with viewer_lock:
-        robot_viewers.setdefault(robot_name, set()).add(websocket)
+    # 알 수 없는 값이면 기존 JSON 포맷
+    if format not in STATE_FORMATS:
+        format = "json"
 
-    print(f"[STATE][VIEW] viewer +1 ({robot_name})")
+    channel = state_view_channel("robot", robot_name, format, scan)
+    await viewer_hub.subscribe(
+        channel,
+        websocket,
+        rates=viewer_state_rates(parse_state_rates(rates)),
+    )
+
+    print(f"[STATE][VIEW] viewer +1 ({robot_name}, {format})")
 
     try:
         while True:
@@ -153,6 +246,27 @@ async def robot_view_ws(websocket: WebSocket, robot_name: str):
     except WebSocketDisconnect:
         pass
     finally:
-        async with viewer_lock:
-            robot_viewers.get(robot_name, set()).discard(websocket)
-        print(f"[STATE][VIEW] viewer -1 ({robot_name})")
+        await viewer_hub.unsubscribe(channel, websocket)
+        print(f"[STATE][VIEW] viewer -1 ({robot_name}, {format})")
+
+
+# ==========================================================
+# 3) 히스토리 저장 워커 모니터링
+# ==========================================================
+@router.get("/api/history/stats")
+def state_history_stats():
+    """
+    상태 히스토리 배치 저장 설정 / flush 타이밍 통계
+
+    - batch_size, flush_interval : 현재 배치 설정
+    - last_flush_ms, avg_flush_ms, max_flush_ms : flush 1회 소요 시간
+    """
+    return get_state_history_stats()
+
+
+@router.get("/api/viewers")
+def state_viewer_stats():
+    """
+    상태 viewer 별 송신 큐 상태 + 직렬화 / 전달 횟수
+    """
+    return viewer_hub.stats("state", "state_bin")
@@ -0,0 +1,167 @@
+# app/controllers/viewer_controller.py
+
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.controllers.state_controller import (
+    STATE_FORMATS,
+    STATE_SCAN_ENCODINGS,
+    state_view_channel,
+    viewer_state_rates,
+)
+from app.services.broadcast_hub import channel_label, viewer_hub
+from app.services.camera_service import register_viewer, unregister_viewer
+from app.services.frame_tiers import TIER_FULL, TIER_NAMES
+from app.services.viewer_sender import send_json_locked
+
+router = APIRouter(prefix="/viewer", tags=["viewer"])
+
+"""
+대시보드용 다중 채널(multiplexed) viewer WebSocket.
+- 소켓 1개로 여러 로봇 / 채널을 구독 · 해제 (viewer_hub 레지스트리 공용)
+
+클라이언트 → 서버
+  {"op": "subscribe",   "channel": "camera", "source": "robot", "robot": "tb3_1", "tier": "320"}
+  {"op": "unsubscribe", "channel": "state",  "source": "robot", "robot": "tb3_1"}
+  - channel : "camera" / "detections" / "state"
+  - tier    : camera / detections 전용 (생략 시 "full")
+  - rates / format("json" | "binary") / scan("f32" | "u16") : state 전용
+
+서버 → 클라이언트
+  {"type": "subscribed" | "unsubscribed", "channel": "camera:robot:tb3_1:320"}
+  {"type": "error", "detail": "..."}
+  - text  : {"channel": "state:robot:tb3_1", ...}
+  - binary: [1 byte 채널 이름 길이][채널 이름][JPEG 또는 binary 상태 frame]
+"""
+
+VIEWER_CHANNELS = ("camera", "detections", "state")
+VIEWER_SOURCES = ("robot", "sim")
+
+
+def _parse_subscription(msg: dict) -> tuple:
+    """
+    구독 메시지 → (channel, source, robot_name, tier)
+    - state 채널은 tier 자리에 포맷 ("json" / "f32" / "u16")
+    - 잘못된 값이면 ValueError
+    """
+    channel = msg.get("channel")
+    source = msg.get("source", "robot")
+    robot_name = msg.get("robot")
+
+    if channel not in VIEWER_CHANNELS:
+        raise ValueError(f"unknown channel: {channel}")
+    if source not in VIEWER_SOURCES:
+        raise ValueError(f"unknown source: {source}")
+    if not isinstance(robot_name, str) or not robot_name:
+        raise ValueError("robot is required")
+
+    if channel == "state":
+        fmt = msg.get("format") or "json"
+        scan = msg.get("scan") or "f32"
+        if fmt not in STATE_FORMATS:
+            raise ValueError(f"unknown format: {fmt}")
+        if scan not in STATE_SCAN_ENCODINGS:
+            raise ValueError(f"unknown scan encoding: {scan}")
+        tier = scan if fmt == "binary" else "json"
+    else:
+        # camera / detections 만 화질 tier 사용 (잘못된 값이면 full)
+        tier = str(msg.get("tier") or TIER_FULL)
+        if tier not in TIER_NAMES:
+            tier = TIER_FULL
+
+    return channel, source, robot_name, tier
+
+
+def _subscription_key(channel: str, source: str, robot_name: str, tier: str) -> tuple:
+    if channel == "state":
+        return _state_key(source, robot_name, tier)
+    if tier == TIER_FULL:
+        return (channel, source, robot_name)
+    return (channel, source, robot_name, tier)
+
+
+def _state_key(source: str, robot_name: str, fmt: str) -> tuple:
+    if fmt == "json":
+        return state_view_channel(source, robot_name)
+    return state_view_channel(source, robot_name, "binary", fmt)
+
+
+async def _subscribe(websocket: WebSocket, sub: tuple, rates: dict | None) -> None:
+    channel, source, robot_name, tier = sub
+    if channel == "state":
+        await viewer_hub.subscribe(
+            _state_key(source, robot_name, tier),
+            websocket,
+            tagged=True,
+            rates=viewer_state_rates(rates if isinstance(rates, dict) else None),
+        )
+    else:
+        await register_viewer(
+            source, robot_name, websocket, tier, channels=(channel,), tagged=True
+        )
+
+
+async def _unsubscribe(websocket: WebSocket, sub: tuple) -> None:
+    channel, source, robot_name, tier = sub
+    if channel == "state":
+        await viewer_hub.unsubscribe(_state_key(source, robot_name, tier), websocket)
+    else:
+        await unregister_viewer(source, robot_name, websocket, tier, channels=(channel,))
+
+
+@router.websocket("/ws")
+async def viewer_ws(websocket: WebSocket):
+    await websocket.accept()
+    print("[VIEWER][MUX] connected")
+
+    # 이 소켓의 구독 목록 (channel, source, robot_name, tier)
+    subscriptions: set = set()
+
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                msg = json.loads(text)
+                op = msg.get("op")
+                sub = _parse_subscription(msg)
+                label = channel_label(_subscription_key(*sub))
+
+                # binary 프레임 헤더에 1 byte 로 길이를 넣으므로 255 byte 제한
+                if len(label.encode("utf-8")) > 255:
+                    raise ValueError("robot name too long")
+
+            except (ValueError, AttributeError) as e:
+                await send_json_locked(
+                    websocket, {"type": "error", "detail": str(e)}
+                )
+                continue
+
+            if op == "subscribe":
+                if sub not in subscriptions:
+                    subscriptions.add(sub)
+                    await _subscribe(websocket, sub, msg.get("rates"))
+                await send_json_locked(
+                    websocket, {"type": "subscribed", "channel": label}
+                )
+
+            elif op == "unsubscribe":
+                if sub in subscriptions:
+                    subscriptions.discard(sub)
+                    await _unsubscribe(websocket, sub)
+                await send_json_locked(
+                    websocket, {"type": "unsubscribed", "channel": label}
+                )
+
+            else:
+                await send_json_locked(
+                    websocket, {"type": "error", "detail": f"unknown op: {op}"}
+                )
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        for sub in subscriptions:
+            await _unsubscribe(websocket, sub)
+        print(f"[VIEWER][MUX] disconnected (subscriptions={len(subscriptions)})")
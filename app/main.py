@@ -1,6 +1,8 @@
 # app/main.py
 import asyncio
 from fastapi import FastAPI
+from sqlalchemy import inspect, text
+from sqlalchemy.types import LargeBinary
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse
 from starlette.middleware.sessions import SessionMiddleware
@@ -12,7 +14,12 @@ from app.controllers.camera_controller import router as camera_router
 from app.controllers.dashboard_controller import router as dashboard_router
 from app.controllers.path_controller import router as path_router
 from app.controllers.state_controller import router as state_router
+from app.controllers.viewer_controller import router as viewer_router
 from app.services.yolo_worker import yolo_worker
+from app.services.yolo_service import yolo_client
+from app.services.yolo_preprocess import shutdown_preprocess
+from app.services.camera_recorder import camera_recorder
+from app.services.camera_service import replay_evict_loop
 from app.services.state_history_worker import state_history_worker
 
 from app.config.database_simulation import BaseSim, engine_sim
@@ -28,6 +35,24 @@ app = FastAPI(title="Robot Dashboard")
 Base.metadata.create_all(bind=engine)
 BaseSim.metadata.create_all(bind=engine_sim)
 
+
+def ensure_sim_scan_blob_column() -> None:
+    """
+    기존 시뮬 DB 의 robot_data 에 scan_blob 컬럼이 없으면 추가
+    (create_all 은 이미 있는 테이블을 바꾸지 않는다)
+    """
+    columns = {c["name"] for c in inspect(engine_sim).get_columns("robot_data")}
+    if "scan_blob" in columns:
+        return
+
+    blob_type = LargeBinary().compile(dialect=engine_sim.dialect)
+    with engine_sim.begin() as conn:
+        conn.execute(text(f"ALTER TABLE robot_data ADD COLUMN scan_blob {blob_type}"))
+    print("[SIM][DB] robot_data: scan_blob column added")
+
+
+ensure_sim_scan_blob_column()
+
 # 세션 미들웨어 추가
 # 실제 서비스에서는 환경변수 등으로 관리하는 것이 좋다.
 app.add_middleware(
@@ -39,6 +64,7 @@ app.add_middleware(
 app.include_router(auth_router)          # 로그인/로그아웃
 app.include_router(camera_router)
 app.include_router(state_router)
+app.include_router(viewer_router)        # 다중 채널 viewer WebSocket
 app.include_router(dashboard_router)
 app.include_router(path_router)
 app.include_router(control_router)
@@ -64,6 +90,11 @@ async def startup_event():
     # from app.services.state_history_service import enqueue_state_history
     # 백그라운드 워커 실행
     asyncio.create_task(yolo_worker())
+    asyncio.create_task(yolo_client.health_loop())
+    # replay 버퍼 idle 로봇 정리 (모든 로봇이 오프라인이어도 동작)
+    asyncio.create_task(replay_evict_loop())
+    # 카메라 녹화 스레드 (CAMERA_RECORD_DIR 설정 시에만)
+    camera_recorder.start()
     asyncio.create_task(state_history_worker())
     asyncio.create_task(simulation_history_worker())
     # await enqueue_state_history("TEST_ROBOT", {
@@ -76,3 +107,13 @@ async def startup_event():
     #         }
     #     }
     # })
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # YOLO 커넥션 풀 정리
+    await yolo_client.close()
+    # YOLO 전처리 스레드 풀 정리
+    shutdown_preprocess()
+    # 녹화 큐에 남은 프레임까지 쓰고 종료
+    await asyncio.to_thread(camera_recorder.stop)
@@ -0,0 +1,62 @@
+# app/models/robot_history.py
+from sqlalchemy import Column, DateTime, Float, LargeBinary, String
+from sqlalchemy.dialects import mysql
+
+from app.config.database import Base
+
+"""
+메시지 type 별 상태 히스토리 테이블 (odom / cmd_vel / battery / scan).
+- primary key = (robot_name, timestamp)
+- MySQL 은 DATETIME(6) (µs 정밀도)
+"""
+
+# MySQL 기본 DATETIME 은 초 단위 → 10Hz odom 이 같은 key 가 되므로 µs 정밀도 사용
+HistoryTimestamp = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+
+class OdomHistory(Base):
+    __tablename__ = "odom_history"
+
+    robot_name = Column(String(50), primary_key=True)
+    timestamp = Column(HistoryTimestamp, primary_key=True)
+
+    pos_x = Column(Float, nullable=False)
+    pos_y = Column(Float, nullable=False)
+
+
+class CmdVelHistory(Base):
+    __tablename__ = "cmd_vel_history"
+
+    robot_name = Column(String(50), primary_key=True)
+    timestamp = Column(HistoryTimestamp, primary_key=True)
+
+    linear_velocity = Column(Float)
+    angular_velocity = Column(Float)
+
+
+class BatteryHistory(Base):
+    __tablename__ = "battery_history"
+
+    robot_name = Column(String(50), primary_key=True)
+    timestamp = Column(HistoryTimestamp, primary_key=True)
+
+    percentage = Column(Float, nullable=False)
+
+
+class ScanHistory(Base):
+    __tablename__ = "scan_history"
+
+    robot_name = Column(String(50), primary_key=True)
+    timestamp = Column(HistoryTimestamp, primary_key=True)
+
+    # 라이다 압축 binary (app/services/scan_codec.py)
+    scan_blob = Column(LargeBinary, nullable=False)
+
+
+# 메시지 type → 테이블
+HISTORY_TABLES = {
+    "odom": OdomHistory,
+    "cmd_vel": CmdVelHistory,
+    "battery": BatteryHistory,
+    "scan": ScanHistory,
+}
@@ -1,5 +1,5 @@
 # app/models/robot_state_history.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, LargeBinary
 from app.config.database import Base
 from datetime import datetime
 
@@ -19,5 +19,9 @@ class RobotStateHistory(Base):
 
     battery_percentage = Column(Float)
 
-    # 라이다 전체 또는 요약본
-    scan_json = Column(JSON)
+    # 라이다 전체 또는 요약본 (기존 형식, backfill 이전 row 만 사용)
+    # - None 은 JSON 'null' 이 아니라 SQL NULL 로 저장 (IS NOT NULL 필터가 동작하도록)
+    scan_json = Column(JSON(none_as_null=True))
+
+    # 라이다 압축 binary (app/services/scan_codec.py)
+    scan_blob = Column(LargeBinary)
@@ -1,5 +1,5 @@
 # app/models/simulation_robot_data.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, LargeBinary
 from datetime import datetime
 from app.config.database_simulation import BaseSim
 
@@ -20,4 +20,8 @@ class SimulationRobotData(BaseSim):
     linear_velocity = Column(Float)
     angular_velocity = Column(Float)
 
+    # 기존 형식 (json.dumps 텍스트, backfill 이전 row 만 사용)
     scan_json = Column(Text)
+
+    # 라이다 압축 binary (app/services/scan_codec.py)
+    scan_blob = Column(LargeBinary)
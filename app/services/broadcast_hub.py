@@ -0,0 +1,270 @@
+# app/services/broadcast_hub.py
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Hashable, Iterable, Set
+
+import numpy as np
+from fastapi import WebSocket
+
+from app.services.viewer_sender import (
+    ConflatingSender,
+    EncodedFrame,
+    ViewerSender,
+    VIEWER_QUEUE_SIZE,
+)
+
+"""
+공용 브로드캐스트 계층 (카메라 / YOLO 결과 / 상태 채널 공용).
+- 채널 key 는 (종류, source, robot_name[, tier]) 튜플
+- 메시지는 발행 1건당 1번만 인코딩해서 모든 구독자 송신 큐가 공유
+- tagged=True 구독은 채널 이름이 붙은 형태로 받는다 (다중 채널 소켓)
+  * text  : {"channel": "state:robot:tb3_1", ...}
+  * binary: [1 byte 이름 길이][채널 이름][원래 bytes]
+- rates 를 주면 ConflatingSender (slot 별 최신 값 + 최대 전송 속도)
+"""
+
+
+def _json_default(value: Any) -> Any:
+    # 정규화된 scan ranges 등 NumPy 값은 직렬화 시점에만 list / float 로 변환
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(data: Any) -> str:
+    """
+    Starlette send_json 과 동일한 형식으로 JSON 직렬화 (메시지당 1번)
+    """
+    return json.dumps(
+        data, separators=(",", ":"), ensure_ascii=False, default=_json_default
+    )
+
+
+def channel_label(key: Hashable) -> str:
+    """
+    채널 key → 사람이 읽을 수 있는 이름 ("camera:robot:tb3_1")
+    """
+    return ":".join(key) if isinstance(key, tuple) else str(key)
+
+
+def _tag_frame(label: str, data: EncodedFrame) -> EncodedFrame:
+    """
+    다중 채널 소켓용으로 채널 이름을 붙인다
+    """
+    if isinstance(data, bytes):
+        name = label.encode("utf-8")
+        return bytes([len(name)]) + name + data
+
+    # JSON 객체 문자열 앞에 channel 필드를 끼워 넣는다 (재직렬화 없음)
+    if data.startswith("{"):
+        rest = data[1:]
+        sep = "" if rest.startswith("}") else ","
+        return '{"channel":' + encode_json(label) + sep + rest
+    return encode_json({"channel": label, "data": data})
+
+
+class BroadcastHub:
+    """
+    채널 key → {WebSocket: ViewerSender} 구독 레지스트리 + encode-once fan-out
+    """
+
+    def __init__(self, name: str, queue_size: int = VIEWER_QUEUE_SIZE):
+        self.name = name
+        self._queue_size = queue_size
+        self._channels: Dict[Hashable, Dict[WebSocket, ViewerSender]] = {}
+        self._lock = asyncio.Lock()
+
+        # 채널 종류(key[0]) 별 구독자 수 변경 콜백
+        self._count_listeners: Dict[str, Callable[[Hashable, int], None]] = {}
+
+        # 통계: 직렬화 횟수 vs 실제 전달 횟수
+        self.encoded = 0
+        self.deliveries = 0
+
+    def add_count_listener(
+        self,
+        kind: str,
+        listener: Callable[[Hashable, int], None],
+    ) -> None:
+        """
+        kind 채널의 구독자 수가 바뀔 때마다 listener(key, total) 호출
+        """
+        self._count_listeners[kind] = listener
+
+    def _notify_count(self, key: Hashable, total: int) -> None:
+        kind = key[0] if isinstance(key, tuple) else key
+        listener = self._count_listeners.get(kind)
+        if listener is not None:
+            listener(key, total)
+
+    # =====================================================
+    # 구독 / 해제
+    # =====================================================
+    async def subscribe(
+        self,
+        key: Hashable,
+        websocket: WebSocket,
+        initial: Iterable[EncodedFrame] = (),
+        queue_size: int | None = None,
+        tagged: bool = False,
+        rates: Dict[str, float] | None = None,
+    ) -> int:
+        """
+        채널 구독 등록 + 전용 송신 task 시작
+        - initial    : 구독 직후 먼저 보낼 프레임 (예: 캐시된 최신 영상)
+        - queue_size : 채널별 송신 큐 크기 (없으면 hub 기본값)
+        - tagged     : 다중 채널 소켓이면 True (채널 이름을 붙여서 전송)
+        - rates      : slot 별 최대 전송 속도(Hz) → 최신 값만 보내는 conflation 모드
+        - 반환값 : 해당 채널의 구독자 수
+        """
+
+        async def on_dead(_sender: ViewerSender):
+            await self.unsubscribe(key, websocket)
+
+        if rates is not None:
+            sender = ConflatingSender(websocket, rates, on_dead=on_dead)
+        else:
+            sender = ViewerSender(
+                websocket,
+                on_dead=on_dead,
+                maxsize=queue_size or self._queue_size,
+            )
+        sender.tag = channel_label(key) if tagged else None
+        for data in initial:
+            sender.push(_tag_frame(sender.tag, data) if tagged else data)
+
+        async with self._lock:
+            subscribers = self._channels.setdefault(key, {})
+            old = subscribers.pop(websocket, None)
+            subscribers[websocket] = sender
+            total = len(subscribers)
+
+        if old is not None:
+            await old.stop()
+
+        sender.start()
+        self._notify_count(key, total)
+        return total
+
+    async def unsubscribe(self, key: Hashable, websocket: WebSocket) -> int | None:
+        """
+        채널 구독 해제 + 송신 task 종료
+        - 반환값 : 남은 구독자 수 (이미 해제된 경우 None)
+        """
+        async with self._lock:
+            subscribers = self._channels.get(key)
+            if not subscribers:
+                return None
+
+            sender = subscribers.pop(websocket, None)
+            if sender is None:
+                return None
+
+            total = len(subscribers)
+
+            # 더 이상 아무도 안 보고 있으면 key 정리
+            if not total:
+                del self._channels[key]
+
+        await sender.stop()
+        self._notify_count(key, total)
+        return total
+
+    async def unsubscribe_all(self, websocket: WebSocket) -> list:
+        """
+        소켓이 구독 중인 모든 채널 해제 (다중 채널 소켓 종료 시)
+        - 반환값 : 해제된 채널 key 목록
+        """
+        keys = [key for key, subs in self._channels.items() if websocket in subs]
+        for key in keys:
+            await self.unsubscribe(key, websocket)
+        return keys
+
+    # =====================================================
+    # 발행 (await 없음)
+    # =====================================================
+    def publish(
+        self,
+        key: Hashable,
+        data: EncodedFrame,
+        slot: Hashable | None = None,
+    ) -> int:
+        """
+        인코딩된 프레임을 채널의 모든 구독자 송신 큐에 넣는다.
+        - slot : conflation 구독자용 메시지 종류 (같은 slot 은 최신 값만 유지)
+        - 반환값 : 전달한 구독자 수
+        """
+        subscribers = self._channels.get(key)
+        if not subscribers:
+            return 0
+
+        tagged = None
+        for sender in subscribers.values():
+            if sender.tag is None:
+                sender.push(data, slot)
+                continue
+
+            # 채널 이름 붙인 버전도 발행 1건당 1번만 만든다
+            if tagged is None:
+                tagged = _tag_frame(sender.tag, data)
+            sender.push(tagged, slot)
+
+        self.deliveries += len(subscribers)
+        return len(subscribers)
+
+    def publish_json(
+        self,
+        key: Hashable,
+        data: Any,
+        slot: Hashable | None = None,
+    ) -> int:
+        """
+        JSON 메시지를 1번만 직렬화해서 모든 구독자에게 공유
+        - 구독자가 없으면 직렬화도 하지 않는다
+        """
+        if not self._channels.get(key):
+            return 0
+
+        self.encoded += 1
+        return self.publish(key, encode_json(data), slot)
+
+    # =====================================================
+    # 조회 / 통계
+    # =====================================================
+    def subscriber_count(self, key: Hashable) -> int:
+        return len(self._channels.get(key, ()))
+
+    def subscribers(self, key: Hashable) -> Set[WebSocket]:
+        return set(self._channels.get(key, ()))
+
+    def has_subscribers(self, key: Hashable) -> bool:
+        return bool(self._channels.get(key))
+
+    def keys(self, *kinds: str) -> list:
+        return [
+            key
+            for key in self._channels
+            if not kinds or (isinstance(key, tuple) and key[0] in kinds)
+        ]
+
+    def stats(self, *kinds: str) -> dict:
+        """
+        채널별 구독자 송신 큐 상태 + 직렬화 / 전달 횟수
+        - kinds 를 지정하면 해당 종류 채널만 ("camera", "state" ...)
+        """
+        channels = {}
+        for key in self.keys(*kinds):
+            label = "/".join(key) if isinstance(key, tuple) else str(key)
+            channels[label] = [s.stats() for s in self._channels[key].values()]
+
+        return {
+            "name": self.name,
+            "encoded": self.encoded,
+            "deliveries": self.deliveries,
+            "channels": channels,
+        }
+
+
+# 전역 viewer 구독 레지스트리 (카메라 / YOLO 결과 / 상태 / 다중 채널 소켓 공용)
+viewer_hub = BroadcastHub("viewer")
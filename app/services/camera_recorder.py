@@ -0,0 +1,411 @@
+# app/services/camera_recorder.py
+
+import hashlib
+import mmap
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+"""
+카메라 프레임 디스크 녹화 (선택 기능).
+
+저장 구조
+  {CAMERA_RECORD_DIR}/{source}/{robot_name}/{YYYYMMDD_HH}.seg  : 프레임 바이트를 이어붙인 파일
+  {CAMERA_RECORD_DIR}/{source}/{robot_name}/{YYYYMMDD_HH}.idx  : (timestamp, offset, length) 고정 길이 레코드
+  (디렉터리 이름은 치환된 이름 + 원래 이름의 짧은 hash)
+
+- 로봇별 / UTC 1시간 단위로 segment 파일을 나눈다
+- 쓰기는 백그라운드 스레드 1개가 큐를 모아서(batch) 처리 → 이벤트 루프 블로킹 없음
+- 시간이 지났거나 CAMERA_RECORD_IDLE_CLOSE 초 동안 쓰지 않은 segment 는 닫는다
+  (오프라인 로봇의 파일 핸들이 남아서 retention 삭제가 막히지 않도록)
+- 조회는 idx 파일을 mmap + np.searchsorted 로 이진 탐색
+  → 특정 시각 / 구간을 찾을 때 segment 전체를 훑지 않는다
+- 구간 조회는 multipart/mixed 로 프레임을 이어서 스트리밍 (요청 1번)
+- 보관 기간이 지나면 segment(.seg + .idx)를 통째로 삭제
+
+CAMERA_RECORD_DIR 이 비어 있으면 녹화하지 않는다.
+"""
+
+CAMERA_RECORD_DIR = os.getenv("CAMERA_RECORD_DIR", "")
+CAMERA_RECORD_RETENTION_HOURS = float(os.getenv("CAMERA_RECORD_RETENTION_HOURS", "24"))
+CAMERA_RECORD_QUEUE_SIZE = int(os.getenv("CAMERA_RECORD_QUEUE_SIZE", "512"))
+CAMERA_RECORD_IDLE_CLOSE = float(os.getenv("CAMERA_RECORD_IDLE_CLOSE", "60"))
+
+# 구간 조회 multipart 응답 경계 문자열
+RECORD_BOUNDARY = "recframe"
+
+# idx 레코드: little-endian (float64 timestamp, uint64 offset, uint32 length)
+INDEX_DTYPE = np.dtype([("ts", "<f8"), ("offset", "<u8"), ("length", "<u4")])
+
+_SEGMENT_RE = re.compile(r"^(\d{8}_\d{2})\.seg$")
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _segment_name(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%d_%H")
+
+
+def _segment_start(name: str) -> float:
+    return datetime.strptime(name, "%Y%m%d_%H").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _safe(name: str) -> str:
+    # 로봇 이름이 경로로 쓰이므로 ../ 같은 문자는 치환
+    # 치환 후 같아지는 이름("a/b", "a_b")이 섞이지 않도록 원래 이름의 hash 를 붙인다
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{_SAFE_NAME_RE.sub('_', name)}-{digest}"
+
+
+class _OpenSegment:
+    def __init__(self, name: str, seg_path: str, idx_path: str):
+        self.name = name
+        self.seg = open(seg_path, "ab")
+        self.idx = open(idx_path, "ab")
+        self.offset = self.seg.tell()
+        self.last_write = time.time()
+
+    def close(self) -> None:
+        self.seg.close()
+        self.idx.close()
+
+
+class CameraRecorder:
+    """
+    per-robot / per-hour segment 녹화기 (쓰기 스레드 + mmap 조회)
+    """
+
+    def __init__(self, root: str, retention_hours: float, queue_size: int):
+        self.root = root
+        self.retention_seconds = retention_hours * 3600.0
+        self._queue: "queue.Queue[Tuple[str, str, float, bytes] | None]" = queue.Queue(
+            maxsize=queue_size
+        )
+        self._thread: threading.Thread | None = None
+        self._open: Dict[Tuple[str, str], _OpenSegment] = {}
+        self._last_retention = 0.0
+
+        self.written = 0
+        self.dropped = 0
+        self.deleted_segments = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def _robot_dir(self, source: str, robot_name: str) -> str:
+        return os.path.join(self.root, _safe(source), _safe(robot_name))
+
+    # =====================================================
+    # 생산자 (이벤트 루프) - 블로킹 없음
+    # =====================================================
+    def record(self, source: str, robot_name: str, frame: bytes) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait((source, robot_name, time.time(), frame))
+        except queue.Full:
+            # 디스크가 못 따라오면 프레임 드롭 (수신 경로는 절대 막지 않음)
+            self.dropped += 1
+
+    # =====================================================
+    # 쓰기 스레드
+    # =====================================================
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._run, name="camera-recorder", daemon=True
+        )
+        self._thread.start()
+        print(f"[RECORDER] started dir={self.root}")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = False
+
+            # 큐에 쌓인 것을 한 번에 모아서 쓴다
+            batch = []
+            if item:
+                batch.append(item)
+            elif item is None:
+                running = False
+            while running:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    running = False
+                    break
+                batch.append(more)
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+                self._close_idle()
+                self._enforce_retention()
+            except Exception as e:
+                print("[RECORDER][ERROR]", e)
+
+        for segment in self._open.values():
+            segment.close()
+        self._open.clear()
+        print("[RECORDER] stopped")
+
+    def _segment_for(self, source: str, robot_name: str, ts: float) -> _OpenSegment:
+        key = (source, robot_name)
+        name = _segment_name(ts)
+        segment = self._open.get(key)
+        if segment is not None and segment.name == name:
+            return segment
+
+        # 시간이 바뀌면 새 segment 로 교체
+        if segment is not None:
+            segment.close()
+
+        robot_dir = self._robot_dir(source, robot_name)
+        os.makedirs(robot_dir, exist_ok=True)
+        segment = _OpenSegment(
+            name,
+            os.path.join(robot_dir, f"{name}.seg"),
+            os.path.join(robot_dir, f"{name}.idx"),
+        )
+        self._open[key] = segment
+        return segment
+
+    def _write_batch(self, batch: List[Tuple[str, str, float, bytes]]) -> None:
+        touched = set()
+        for source, robot_name, ts, frame in batch:
+            segment = self._segment_for(source, robot_name, ts)
+            segment.seg.write(frame)
+            record = np.array([(ts, segment.offset, len(frame))], dtype=INDEX_DTYPE)
+            segment.idx.write(record.tobytes())
+            segment.offset += len(frame)
+            segment.last_write = time.time()
+            touched.add(segment)
+
+        # 데이터를 먼저 flush 하고 idx 를 flush
+        # → idx 가 아직 쓰이지 않은 데이터를 가리키는 일이 없도록
+        for segment in touched:
+            segment.seg.flush()
+        for segment in touched:
+            segment.idx.flush()
+
+        self.written += len(batch)
+
+    def _close_idle(self) -> None:
+        """
+        시간(hour)이 바뀌었거나 오래 쓰지 않은 segment 닫기
+        - 늦게 도착한 프레임이 있으면 _segment_for 가 append 모드로 다시 연다
+        """
+        now = time.time()
+        current = _segment_name(now)
+        for key, segment in list(self._open.items()):
+            if segment.name != current or now - segment.last_write > CAMERA_RECORD_IDLE_CLOSE:
+                segment.close()
+                del self._open[key]
+
+    def _enforce_retention(self) -> None:
+        now = time.time()
+        if now - self._last_retention < 60.0:
+            return
+        self._last_retention = now
+
+        cutoff = now - self.retention_seconds
+        open_names = {
+            (_safe(source), _safe(robot_name), segment.name)
+            for (source, robot_name), segment in self._open.items()
+        }
+
+        for source in os.listdir(self.root):
+            source_dir = os.path.join(self.root, source)
+            if not os.path.isdir(source_dir):
+                continue
+            for robot_name in os.listdir(source_dir):
+                robot_dir = os.path.join(source_dir, robot_name)
+                for filename in os.listdir(robot_dir):
+                    m = _SEGMENT_RE.match(filename)
+                    if not m:
+                        continue
+                    name = m.group(1)
+                    # segment 가 끝나는 시각(+1시간)이 보관 기간을 넘으면 삭제
+                    if _segment_start(name) + 3600.0 >= cutoff:
+                        continue
+                    if (source, robot_name, name) in open_names:
+                        continue
+                    for ext in (".seg", ".idx"):
+                        try:
+                            os.remove(os.path.join(robot_dir, name + ext))
+                        except FileNotFoundError:
+                            pass
+                    self.deleted_segments += 1
+                    print(f"[RECORDER] retention delete {source}/{robot_name}/{name}")
+
+    # =====================================================
+    # 조회 (mmap + 이진 탐색)
+    # =====================================================
+    def _segments(self, source: str, robot_name: str, start: float, end: float) -> List[str]:
+        robot_dir = self._robot_dir(source, robot_name)
+        if not os.path.isdir(robot_dir):
+            return []
+
+        names = []
+        for filename in os.listdir(robot_dir):
+            m = _SEGMENT_RE.match(filename)
+            if not m:
+                continue
+            seg_start = _segment_start(m.group(1))
+            if seg_start <= end and seg_start + 3600.0 >= start:
+                names.append(m.group(1))
+        return sorted(names)
+
+    @staticmethod
+    def _read_index(idx_path: str) -> np.ndarray:
+        """
+        idx 파일을 mmap 으로 읽어 구조체 배열로 반환 (복사 없음)
+        - 쓰는 중인 파일이면 완전한 레코드까지만 사용
+        - 파일이 없으면 (retention 삭제 / 쓰기 전 중단) 빈 배열
+        """
+        try:
+            with open(idx_path, "rb") as f:
+                count = os.fstat(f.fileno()).st_size // INDEX_DTYPE.itemsize
+                if count == 0:
+                    return np.empty(0, dtype=INDEX_DTYPE)
+                mm = mmap.mmap(f.fileno(), count * INDEX_DTYPE.itemsize, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        return np.frombuffer(mm, dtype=INDEX_DTYPE, count=count)
+
+    @staticmethod
+    def _read_frame(seg_path: str, offset: int, length: int) -> bytes:
+        with open(seg_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[offset:offset + length]
+
+    def get_frame_at(self, source: str, robot_name: str, ts: float) -> Tuple[float, bytes] | None:
+        """
+        시각 ts 이전(포함) 가장 가까운 프레임 1장 (없으면 None)
+        """
+        robot_dir = self._robot_dir(source, robot_name)
+        for name in reversed(self._segments(source, robot_name, ts - 3600.0, ts)):
+            index = self._read_index(os.path.join(robot_dir, f"{name}.idx"))
+            pos = int(np.searchsorted(index["ts"], ts, side="right")) - 1
+            if pos < 0:
+                continue
+            rec = index[pos]
+            try:
+                frame = self._read_frame(
+                    os.path.join(robot_dir, f"{name}.seg"), int(rec["offset"]), int(rec["length"])
+                )
+            except FileNotFoundError:
+                # 조회 도중 retention 으로 삭제된 segment
+                continue
+            return float(rec["ts"]), frame
+        return None
+
+    def iter_range(
+        self,
+        source: str,
+        robot_name: str,
+        start: float,
+        end: float,
+        limit: int | None = None,
+    ) -> Iterator[Tuple[float, bytes]]:
+        """
+        [start, end] 구간 프레임을 시간 순서대로 (timestamp, frame) 로 반환
+        """
+        robot_dir = self._robot_dir(source, robot_name)
+        count = 0
+        for name in self._segments(source, robot_name, start, end):
+            index = self._read_index(os.path.join(robot_dir, f"{name}.idx"))
+            lo = int(np.searchsorted(index["ts"], start, side="left"))
+            hi = int(np.searchsorted(index["ts"], end, side="right"))
+            if lo >= hi:
+                continue
+
+            try:
+                f = open(os.path.join(robot_dir, f"{name}.seg"), "rb")
+            except FileNotFoundError:
+                # 조회 도중 retention 으로 삭제된 segment
+                continue
+
+            with f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for rec in index[lo:hi]:
+                        offset = int(rec["offset"])
+                        yield float(rec["ts"]), mm[offset:offset + int(rec["length"])]
+                        count += 1
+                        if limit is not None and count >= limit:
+                            return
+
+    def iter_range_multipart(
+        self,
+        source: str,
+        robot_name: str,
+        start: float,
+        end: float,
+        limit: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        iter_range 결과 → multipart/mixed 본문 (StreamingResponse 용 동기 generator)
+        - part 마다 Content-Type / Content-Length / X-Frame-Timestamp 헤더
+        """
+        for ts, frame in self.iter_range(source, robot_name, start, end, limit):
+            yield (
+                f"--{RECORD_BOUNDARY}\r\n"
+                "Content-Type: image/jpeg\r\n"
+                f"Content-Length: {len(frame)}\r\n"
+                f"X-Frame-Timestamp: {ts:.3f}\r\n\r\n"
+            ).encode("ascii") + frame + b"\r\n"
+        yield f"--{RECORD_BOUNDARY}--\r\n".encode("ascii")
+
+    def index_range(self, source: str, robot_name: str, start: float, end: float) -> List[float]:
+        """
+        [start, end] 구간 프레임 timestamp 목록 (프레임 바이트는 읽지 않음)
+        """
+        robot_dir = self._robot_dir(source, robot_name)
+        result: List[float] = []
+        for name in self._segments(source, robot_name, start, end):
+            ts = self._read_index(os.path.join(robot_dir, f"{name}.idx"))["ts"]
+            lo = int(np.searchsorted(ts, start, side="left"))
+            hi = int(np.searchsorted(ts, end, side="right"))
+            result.extend(ts[lo:hi].tolist())
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled and self._thread is not None,
+            "dir": self.root,
+            "retention_hours": self.retention_seconds / 3600.0,
+            "queued": self._queue.qsize(),
+            "open_segments": len(self._open),
+            "written": self.written,
+            "dropped": self.dropped,
+            "deleted_segments": self.deleted_segments,
+        }
+
+
+# 전역 녹화기 (camera_service / main startup 공용)
+camera_recorder = CameraRecorder(
+    CAMERA_RECORD_DIR,
+    CAMERA_RECORD_RETENTION_HOURS,
+    CAMERA_RECORD_QUEUE_SIZE,
+)
@@ -1,10 +1,37 @@
 # app/services/camera_service.py
 
 import asyncio
-from typing import Dict, Set, Tuple, Literal
+import os
+import time
+from typing import Dict, Literal
 
 from fastapi import WebSocket
 
+from app.services.broadcast_hub import viewer_hub
+from app.services.camera_recorder import camera_recorder
+from app.services.control_service import send_control_command
+from app.services.frame_buffer import frame_buffer
+from app.services.frame_tiers import TIER_FULL, TIER_WIDTHS, TierEncoders
+from app.services.mjpeg_service import (
+    mjpeg_client_count,
+    publish_mjpeg_frame,
+    set_count_listener,
+)
+from app.services.yolo_scheduler import yolo_scheduler
+from app.services.yolo_service import normalize_detections
+
+# ---------------------------------------------------------
+#  시청 수요 기반 추론 / 카메라 속도 제어 설정
+#  - YOLO_WATCHED_ONLY : 1 이면 viewer 가 있는 로봇의 프레임만 YOLO 추론
+#  - CAMERA_IDLE_FPS   : 아무도 안 볼 때 로봇에 요청할 카메라 fps
+#                        (0 이면 전송 중지, 썸네일/녹화용으로 1fps 정도 권장)
+#  - CAMERA_IDLE_GRACE : 마지막 viewer 가 나간 뒤 idle 명령까지 대기 시간(초)
+#                        (새로고침 등으로 잠깐 0 이 될 때 명령이 반복되지 않도록)
+# ---------------------------------------------------------
+YOLO_WATCHED_ONLY = os.getenv("YOLO_WATCHED_ONLY", "1") == "1"
+CAMERA_IDLE_FPS = float(os.getenv("CAMERA_IDLE_FPS", "1"))
+CAMERA_IDLE_GRACE = float(os.getenv("CAMERA_IDLE_GRACE", "3"))
+
 # ---------------------------------------------------------
 #  타입 정의
 # ---------------------------------------------------------
@@ -24,81 +51,339 @@ latest_frame: Dict[SourceType, Dict[str, bytes]] = {
 }
 
 # ---------------------------------------------------------
-# 2) viewer WebSocket 목록
-#    - 마찬가지로 source / robot_name 단위로 관리
-#      viewer_clients["robot"]["tb3_1"] -> 실제 로봇 tb3_1 화면 보는 브라우저들
-#      viewer_clients["sim"]["tb3_1"]   -> 시뮬 tb3_1 화면 보는 브라우저들
+# 1-1) 프레임 시퀀스 번호
+#    - source / robot_name 별로 프레임이 들어올 때마다 1씩 증가
+#    - YOLO 결과는 영상과 별도로 비동기 전송되므로,
+#      "어느 프레임에 대한 결과인지" 를 이 번호로 표시한다.
 # ---------------------------------------------------------
-viewer_clients: Dict[SourceType, Dict[str, Set[WebSocket]]] = {
+frame_seq: Dict[SourceType, Dict[str, int]] = {
     "robot": {},
     "sim": {},
 }
 
 # ---------------------------------------------------------
-# 3) 프레임 캐시 및 viewer 목록 보호용 락
-#    - asyncio.Lock 사용 (비동기 환경에서 안전)
+# 1-2) 최신 YOLO 결과 캐시
+#    - MJPEG 시청 클라이언트용 가벼운 detections 조회 API 에서 사용
+#      latest_detections["robot"]["tb3_1"] -> {"seq", "lag", "detections", "timestamp"}
 # ---------------------------------------------------------
-frame_lock = asyncio.Lock()
-viewer_lock = asyncio.Lock()
+latest_detections: Dict[SourceType, Dict[str, dict]] = {
+    "robot": {},
+    "sim": {},
+}
 
 # ---------------------------------------------------------
-# 4) YOLO 워커용 큐
-#    - (source, robot_name, frame bytes) 형태로 넣어준다.
-#    - YOLO 워커는 이 정보를 이용해서
-#      "어느 종류(source)의 어느 로봇(robot_name) 프레임인지"
-#      를 구분해 줄 수 있다.
-#    - maxsize=1 : 항상 "가장 최신" 프레임만 처리하도록 하는 정책
+# 2) viewer 구독 (공용 레지스트리 viewer_hub)
+#    - 영상 채널     : ("camera", source, robot_name[, tier])
+#    - YOLO 결과 채널 : ("detections", source, robot_name[, tier])
+#      ("camera", "robot", "tb3_1")        -> 실제 로봇 tb3_1 원본 화면
+#      ("camera", "sim", "tb3_1")          -> 시뮬 tb3_1 원본 화면
+#      ("camera", "robot", "tb3_1", "320") -> 실제 로봇 tb3_1 320px 화면
+#    - /camera/view/... 소켓은 두 채널을 함께 구독,
+#      다중 채널 소켓(/viewer/ws)은 필요한 채널만 골라서 구독
+#    - 구독자 수가 바뀌면 YOLO 스케줄링 가중치에 반영
 # ---------------------------------------------------------
-yolo_queue: asyncio.Queue[Tuple[SourceType, str, bytes]] = asyncio.Queue(
-    maxsize=1
-)
+CAMERA_CHANNELS = ("camera", "detections")
+
+
+def _channel_key(
+    kind: str,
+    source: SourceType,
+    robot_name: str,
+    tier: str = TIER_FULL,
+) -> tuple:
+    if tier == TIER_FULL:
+        return (kind, source, robot_name)
+    return (kind, source, robot_name, tier)
+
+
+async def _publish_tier_frame(key: tuple, seq: int, data: bytes, scale: float):
+    # tier 인코더가 만든 축소 프레임을 해당 tier viewer 들에게 공유
+    source, robot_name, tier = key
+    viewer_hub.publish(_channel_key("camera", source, robot_name, tier), data)
+
+
+# 화질 단계(tier)별 축소 프레임 인코더 (구독자가 있는 tier 만)
+# - 인코더 key 는 (source, robot_name, tier)
+tier_encoders = TierEncoders(_publish_tier_frame)
+
+# ---------------------------------------------------------
+# 3) 프레임 캐시 보호용 락
+#    - asyncio.Lock 사용 (비동기 환경에서 안전)
+# ---------------------------------------------------------
+frame_lock = asyncio.Lock()
+
+
+# replay 버퍼 idle 로봇 확인 주기(초)
+REPLAY_EVICT_INTERVAL = float(os.getenv("REPLAY_EVICT_INTERVAL", "30"))
+
+
+def _on_buffer_evict(source: str, robot_name: str) -> None:
+    """
+    replay 버퍼에서 idle 로봇이 제거되면 최신 프레임 캐시도 함께 정리
+    - 오프라인 로봇 프레임이 메모리에 계속 남지 않도록
+    - frame_seq 는 유지 (로봇이 돌아와도 seq 가 1부터 다시 시작하지 않도록,
+      viewer 는 seq 가 줄어든 YOLO 결과를 버린다)
+    """
+    latest_frame.get(source, {}).pop(robot_name, None)
+    latest_detections.get(source, {}).pop(robot_name, None)
+
+
+frame_buffer.on_evict = _on_buffer_evict
+
+
+async def replay_evict_loop():
+    """
+    replay 버퍼 idle 로봇 주기 정리 (startup 에서 create_task 로 실행)
+    - 모든 로봇이 오프라인이면 enqueue_frame 이 불리지 않아서
+      append 안의 idle 확인만으로는 메모리가 해제되지 않는다
+    - frame_lock 안에서 실행 → 프레임을 보내는 중인 로봇과 겹치지 않음
+    """
+    while True:
+        await asyncio.sleep(REPLAY_EVICT_INTERVAL)
+        try:
+            async with frame_lock:
+                frame_buffer.evict_idle()
+        except Exception as e:
+            print("[REPLAY][ERROR]", e)
+
+
+# =========================================================
+# 시청 수요 (WebSocket viewer + MJPEG 클라이언트)
+# =========================================================
+# (source, robot_name) -> 직전 시청자 수
+_demand: Dict[tuple, int] = {}
+
+# robot_name -> 로봇에 마지막으로 보낸 카메라 모드 ("live" / "idle")
+_camera_mode: Dict[str, str] = {}
+
+# robot_name -> grace 후 idle 명령을 보낼 대기 task
+_idle_tasks: Dict[str, asyncio.Task] = {}
+
+
+def viewer_demand(source: SourceType, robot_name: str) -> int:
+    """
+    해당 로봇 영상 / YOLO 결과를 받고 있는 클라이언트 수 (WebSocket + MJPEG)
+    - 영상과 결과를 함께 구독한 소켓은 1명으로 센다
+    """
+    sockets = set()
+    for kind in CAMERA_CHANNELS:
+        for tier in (TIER_FULL, *TIER_WIDTHS):
+            sockets |= viewer_hub.subscribers(
+                _channel_key(kind, source, robot_name, tier)
+            )
+    return len(sockets) + mjpeg_client_count(source, robot_name)
+
+
+def _on_demand_change(source: SourceType, robot_name: str) -> None:
+    """
+    viewer 등록/해제 시 호출 (BroadcastHub / MJPEG 채널 공용)
+
+    1) YOLO 스케줄링 가중치 갱신
+    2) 0명이 되면 대기 중인 YOLO 프레임을 버림
+    3) 실제 로봇이면 카메라 속도 명령 (0명 → idle, 0 → 1명 이상 → live)
+    """
+    total = viewer_demand(source, robot_name)
+    prev = _demand.get((source, robot_name), 0)
+    if total:
+        _demand[(source, robot_name)] = total
+    else:
+        _demand.pop((source, robot_name), None)
+
+    yolo_scheduler.set_viewer_count(source, robot_name, total)
+    if not total:
+        yolo_scheduler.discard(source, robot_name)
+
+    # 제어 WebSocket 은 실제 로봇에만 있다
+    if source != "robot":
+        return
+
+    if total and not prev:
+        _cancel_idle(robot_name)
+        if _camera_mode.get(robot_name) == "idle":
+            asyncio.create_task(_send_camera_mode(robot_name, "live"))
+    elif not total and prev:
+        _schedule_idle(robot_name)
+
+
+def _cancel_idle(robot_name: str) -> None:
+    task = _idle_tasks.pop(robot_name, None)
+    if task is not None:
+        task.cancel()
+
+
+def _schedule_idle(robot_name: str) -> None:
+    _cancel_idle(robot_name)
+    _idle_tasks[robot_name] = asyncio.create_task(_idle_after_grace(robot_name))
+
+
+async def _idle_after_grace(robot_name: str) -> None:
+    await asyncio.sleep(CAMERA_IDLE_GRACE)
+    if _idle_tasks.get(robot_name) is asyncio.current_task():
+        del _idle_tasks[robot_name]
+
+    if viewer_demand("robot", robot_name) == 0:
+        await _send_camera_mode(robot_name, "idle")
+
+
+async def _send_camera_mode(robot_name: str, mode: str) -> None:
+    """
+    제어 WebSocket 으로 카메라 속도 명령 전송
+      {"type": "camera_rate", "mode": "idle", "fps": 1.0}  -> 속도 낮춤 (0 이면 중지)
+      {"type": "camera_rate", "mode": "live", "fps": null} -> 원래 속도로 복귀
+    """
+    command = {
+        "type": "camera_rate",
+        "mode": mode,
+        "fps": CAMERA_IDLE_FPS if mode == "idle" else None,
+    }
+    if await send_control_command(robot_name, command):
+        _camera_mode[robot_name] = mode
+        print(f"[CAMERA][DEMAND] robot={robot_name} camera -> {mode}")
+
+
+def sync_camera_mode(robot_name: str) -> None:
+    """
+    로봇 제어 WebSocket 이 (재)연결되면 호출.
+    - 재시작한 로봇은 원래 속도로 보내므로 이전 모드는 잊는다
+    - 보고 있는 viewer 가 없으면 grace 후 다시 idle 명령
+    """
+    _camera_mode.pop(robot_name, None)
+    if viewer_demand("robot", robot_name) == 0:
+        _schedule_idle(robot_name)
+
+
+def get_demand_stats() -> dict:
+    return {
+        "watched_only": YOLO_WATCHED_ONLY,
+        "idle_fps": CAMERA_IDLE_FPS,
+        "viewers": {f"{s}/{r}": n for (s, r), n in _demand.items()},
+        "camera_mode": dict(_camera_mode),
+        "idle_pending": sorted(_idle_tasks),
+    }
+
+
+set_count_listener(_on_demand_change)
+for _kind in CAMERA_CHANNELS:
+    viewer_hub.add_count_listener(
+        _kind, lambda key, total: _on_demand_change(key[1], key[2])
+    )
 
 
 # =========================================================
 # viewer 등록 / 해제
 # =========================================================
-async def register_viewer(source: SourceType, robot_name: str, ws: WebSocket):
+async def register_viewer(
+    source: SourceType,
+    robot_name: str,
+    ws: WebSocket,
+    tier: str = TIER_FULL,
+    channels: tuple = CAMERA_CHANNELS,
+    tagged: bool = False,
+):
     """
     특정 source("robot"/"sim") 의 특정 로봇 화면을 보고 싶어 하는
     WebSocket 클라이언트를 등록한다.
 
     예)
-      /camera/view/robot/tb3_1  -> source="robot", robot_name="tb3_1"
-      /camera/view/sim/tb3_1    -> source="sim",   robot_name="tb3_1"
+      /camera/view/robot/tb3_1           -> source="robot", robot_name="tb3_1"
+      /camera/view/sim/tb3_1             -> source="sim",   robot_name="tb3_1"
+      /camera/view/robot/tb3_1?tier=320  -> 320px 축소 화면
+
+    - channels : 구독할 채널 ("camera" 영상 / "detections" YOLO 결과)
+    - tagged   : 다중 채널 소켓이면 True (메시지에 채널 이름이 붙는다)
+    - 이미 프레임이 있으면 첫 화면으로 1장 넣어준다.
+      (축소 tier 는 같은 프레임의 인코딩 결과가 있으면 그것을, 없으면 새로 인코딩)
     """
-    # viewer_clients 공유 자원 보호를 위해 viewer_lock 사용
-    async with viewer_lock:
-        if source not in viewer_clients:
-            # 혹시라도 잘못된 source 가 들어오면 방어 코드
-            viewer_clients[source] = {}
-
-        if robot_name not in viewer_clients[source]:
-            viewer_clients[source][robot_name] = set()
-
-        viewer_clients[source][robot_name].add(ws)
-
-        total = len(viewer_clients[source][robot_name])
+    frame = latest_frame.get(source, {}).get(robot_name)
+    seq = frame_seq.get(source, {}).get(robot_name, 0)
+    initial = [frame] if frame else []
+
+    # 축소 tier 는 bbox 배율도 인코더가 알고 있으므로 결과만 구독해도 활성화
+    encoder = None
+    if tier != TIER_FULL:
+        encoder = tier_encoders.activate((source, robot_name, tier))
+        initial = []
+        if encoder.last_frame is not None and encoder.last_seq == seq:
+            initial = [encoder.last_frame]
+
+    if "detections" in channels:
+        await viewer_hub.subscribe(
+            _channel_key("detections", source, robot_name, tier),
+            ws,
+            tagged=tagged,
+        )
+
+    if "camera" in channels:
+        await viewer_hub.subscribe(
+            _channel_key("camera", source, robot_name, tier),
+            ws,
+            initial=initial,
+            tagged=tagged,
+        )
+        if encoder is not None and frame and not initial:
+            encoder.submit(seq, frame)
 
     print(
         f"[CAMERA][VIEW] + viewer source={source} robot={robot_name} "
-        f"(total={total})"
+        f"tier={tier} channels={','.join(channels)} "
+        f"(total={viewer_demand(source, robot_name)})"
     )
 
 
-async def unregister_viewer(source: SourceType, robot_name: str, ws: WebSocket):
+async def unregister_viewer(
+    source: SourceType,
+    robot_name: str,
+    ws: WebSocket,
+    tier: str = TIER_FULL,
+    channels: tuple = CAMERA_CHANNELS,
+):
     """
     WebSocket 클라이언트를 viewer 목록에서 제거한다.
     - 연결이 끊겼을 때, 에러가 났을 때 호출.
+    - 전용 송신 task 도 함께 종료.
+    - 해당 tier 를 보는 viewer 가 더 없으면 tier 인코딩도 멈춘다.
     """
-    async with viewer_lock:
-        if source in viewer_clients and robot_name in viewer_clients[source]:
-            viewer_clients[source][robot_name].discard(ws)
+    removed = False
+    for kind in channels:
+        key = _channel_key(kind, source, robot_name, tier)
+        if await viewer_hub.unsubscribe(key, ws) is not None:
+            removed = True
+
+    # 송신 실패로 이미 해제된 경우에도 인코더는 정리
+    if tier != TIER_FULL and not any(
+        viewer_hub.has_subscribers(_channel_key(kind, source, robot_name, tier))
+        for kind in CAMERA_CHANNELS
+    ):
+        tier_encoders.deactivate((source, robot_name, tier))
+
+    if not removed:
+        return
+
+    print(f"[CAMERA][VIEW] - viewer source={source} robot={robot_name} tier={tier}")
+
+
+async def change_viewer_tier(
+    source: SourceType,
+    robot_name: str,
+    ws: WebSocket,
+    old_tier: str,
+    new_tier: str,
+):
+    """
+    시청 중에 화질 단계 변경 (viewer 가 {"type": "tier", "tier": "320"} 전송)
+    """
+    if old_tier == new_tier:
+        return
+    await unregister_viewer(source, robot_name, ws, old_tier)
+    await register_viewer(source, robot_name, ws, new_tier)
 
-            # 더 이상 아무도 안 보고 있으면 key 정리
-            if not viewer_clients[source][robot_name]:
-                del viewer_clients[source][robot_name]
 
-    print(f"[CAMERA][VIEW] - viewer source={source} robot={robot_name}")
+def get_viewer_stats() -> dict:
+    """
+    viewer 별 송신 큐 상태 (대기 중 / 전송 / 드롭 수 / 지연시간)
+    + tier 별 인코딩 / 건너뛴 프레임 수
+    """
+    return {**viewer_hub.stats(*CAMERA_CHANNELS), "tiers": tier_encoders.stats()}
 
 
 # =========================================================
@@ -108,102 +393,121 @@ async def enqueue_frame(source: SourceType, robot_name: str, frame: bytes):
     """
     로봇(실제 또는 시뮬레이션)에서 받은 프레임을 처리한다.
 
-    1) latest_frame[source][robot_name] 에 저장
+    1) latest_frame[source][robot_name] 에 저장하고 seq 번호 부여
        - 새로 화면을 여는 viewer에게 첫 프레임으로 보내기 위함
-    2) YOLO 워커 큐에 (source, robot_name, frame) 를 넣어준다.
-       - YOLO 결과를 계산해서 시청중인 viewer들에게 브로드캐스트할 수 있도록.
+       - replay 링 버퍼에도 추가 (최근 N초 다시보기)
+    2) viewer 들에게 프레임을 "즉시" 중계 (fast path)
+       - YOLO 추론 속도/타임아웃과 무관하게 카메라 속도로 영상 전달
+    3) YOLO 스케줄러의 로봇별 슬롯에 (source, robot_name, seq, frame) 를 넣어준다.
+       - 결과는 나중에 seq 가 붙은 별도 메시지로 전송된다.
+       - YOLO_WATCHED_ONLY 이면 보고 있는 viewer 가 있을 때만 넣는다.
     """
 
-    # 1) 최신 프레임 캐시 갱신
+    # 1) 최신 프레임 캐시 + seq 갱신
     async with frame_lock:
         # source 가 없으면 방어적으로 초기화
         if source not in latest_frame:
             latest_frame[source] = {}
+            frame_seq[source] = {}
         latest_frame[source][robot_name] = frame
 
-    # 2) YOLO 큐에 넣기 (큐가 꽉 차 있으면 이전 것을 버리고 최신 것만 유지)
-    if yolo_queue.full():
-        try:
-            # 오래된 작업 하나 버리기
-            _ = yolo_queue.get_nowait()
-            yolo_queue.task_done()
-        except asyncio.QueueEmpty:
-            # 동시에 비워진 경우 등, 그냥 무시
-            pass
+        seq = frame_seq[source].get(robot_name, 0) + 1
+        frame_seq[source][robot_name] = seq
+
+        frame_buffer.append(source, robot_name, seq, frame)
 
-    await yolo_queue.put((source, robot_name, frame))
+    # 1-1) 디스크 녹화 (활성화된 경우, 백그라운드 스레드 큐에 넣기만 함)
+    camera_recorder.record(source, robot_name, frame)
+
+    # 2) 영상은 YOLO 를 기다리지 않고 바로 중계
+    await broadcast_frame(source, robot_name, frame, seq)
+
+    # 3) YOLO 슬롯에 넣기 (아직 처리 안 된 프레임이 있으면 최신 것으로 교체)
+    #    아무도 안 보는 로봇은 추론하지 않는다
+    if YOLO_WATCHED_ONLY and not viewer_demand(source, robot_name):
+        return
+    yolo_scheduler.submit(source, robot_name, seq, frame)
 
 
 # =========================================================
-# YOLO 워커 → viewer 브로드캐스트
+# 서버 → viewer 브로드캐스트
 # =========================================================
-async def broadcast_to_viewers(
+async def broadcast_frame(
     source: SourceType,
     robot_name: str,
     frame: bytes,
-    detections: list | None = None,
+    seq: int = 0,
 ):
     """
-    YOLO 워커가 호출하는 브로드캐스트 함수.
-
-    동일한 source & robot_name 을 구독 중인 모든 viewer 에게
-    1) 영상 프레임
-    2) YOLO 결과(JSON, 선택적)
-    를 전송한다.
+    영상 프레임(바이너리) 중계 - enqueue_frame 이 프레임마다 호출.
 
-    성능/안정성 포인트:
-    - 느린 viewer 하나 때문에 다른 viewer 가 지연되지 않도록
-      asyncio.gather 를 사용해 병렬 전송 처리.
+    - 송신 큐에 넣기만 하므로 느린 viewer 가 있어도 기다리지 않는다.
+    - 같은 bytes 객체를 모든 viewer 가 공유한다.
+    - 축소 tier 는 구독 중인 tier 만 백그라운드에서 인코딩 후 중계된다.
+    - MJPEG(HTTP) 시청자가 있으면 공유 채널의 최신 프레임도 교체한다.
     """
+    viewer_hub.publish(_channel_key("camera", source, robot_name), frame)
+    for encoder in tier_encoders.active(source, robot_name):
+        encoder.submit(seq, frame)
+    publish_mjpeg_frame(source, robot_name, frame)
 
-    # viewer 목록은 락을 잡고 "복사본"만 만든다.
-    async with viewer_lock:
-        viewers_for_source = viewer_clients.get(source)
-        if not viewers_for_source:
-            return
 
-        current_viewers = viewers_for_source.get(robot_name)
-        if not current_viewers:
-            return
+def _scale_detections(detections: list, scale: float) -> list:
+    """
+    원본 좌표 bbox → 축소 tier 화면 좌표
+    - detections 는 normalize_detections 로 정규화된 리스트
+    """
+    if scale == 1.0:
+        return detections
+    return [
+        {**det, "bbox": [round(v * scale, 1) for v in det["bbox"]]}
+        if isinstance(det, dict) and det.get("bbox")
+        else det
+        for det in detections
+    ]
 
-        # 실제 전송은 락 없이 하기 위해 set 복사
-        viewers_snapshot = list(current_viewers)
 
-    if not viewers_snapshot:
-        return
+async def broadcast_detections(
+    source: SourceType,
+    robot_name: str,
+    seq: int,
+    detections: list,
+):
+    """
+    YOLO 결과(JSON) 전송 - YOLO 워커가 추론이 끝날 때마다 호출.
 
-    # 각각의 viewer 에 대한 전송 task 생성
-    tasks = []
-    for ws in viewers_snapshot:
-        async def send_to_one(client_ws: WebSocket, f: bytes, det: list | None):
-            try:
-                # 1) 영상 프레임 전송
-                await client_ws.send_bytes(f)
-
-                # 2) YOLO 결과 전송 (있으면)
-                if det is not None:
-                    await client_ws.send_json(
-                        {
-                            "type": "yolo",
-                            "detections": det,
-                        }
-                    )
-            except Exception as e:
-                # 예외는 상위에서 처리할 수 있도록 다시 raise
-                raise e
-
-        tasks.append(send_to_one(ws, frame, detections))
-
-    # 병렬 전송 + 예외 수집
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # 전송 실패한 소켓들 정리
-    dead_clients: list[WebSocket] = []
-    for ws, result in zip(viewers_snapshot, results):
-        if isinstance(result, Exception):
-            print(f"[CAMERA][ERROR] viewer send failed: {result}")
-            dead_clients.append(ws)
-
-    # 죽은 소켓은 viewer 목록에서 제거
-    for ws in dead_clients:
-        await unregister_viewer(source, robot_name, ws)
+    - seq     : 결과가 속한 프레임 번호
+    - lag     : 결과 전송 시점에 그 프레임보다 몇 장 더 지나갔는지
+                (오버레이가 영상보다 얼마나 늦는지 viewer 가 판단 가능)
+    """
+    # 원본 / 축소 tier 모두 같은 리스트 형태로 ({"detections": [...]} 도 허용)
+    normalized = normalize_detections(detections)
+    if normalized is None:
+        print(f"[YOLO][WARN] {source}/{robot_name} seq={seq} invalid detections")
+        return
+    detections = normalized
+
+    # replay 버퍼의 해당 프레임에도 결과를 붙여둔다
+    frame_buffer.attach_detections(source, robot_name, seq, detections)
+
+    latest_seq = frame_seq.get(source, {}).get(robot_name, seq)
+    message = {
+        "type": "yolo",
+        "seq": seq,
+        "lag": latest_seq - seq,
+        "detections": detections,
+    }
+    latest_detections.setdefault(source, {})[robot_name] = {
+        **message,
+        "timestamp": time.time(),
+    }
+
+    # 직렬화는 1번만, 모든 viewer 가 같은 텍스트 프레임을 공유
+    viewer_hub.publish_json(_channel_key("detections", source, robot_name), message)
+
+    # 축소 tier viewer 에게는 화면 크기에 맞춘 bbox 로 (tier 당 1번 직렬화)
+    for encoder in tier_encoders.active(source, robot_name):
+        viewer_hub.publish_json(
+            _channel_key("detections", *encoder.key),
+            {**message, "detections": _scale_detections(detections, encoder.scale)},
+        )
@@ -0,0 +1,212 @@
+# app/services/frame_buffer.py
+
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List, Tuple
+
+"""
+로봇별 최근 N초 프레임 링 버퍼 (instant replay 용).
+
+- (source, robot_name) 별로 최근 REPLAY_SECONDS 초 동안의
+  (수신 시각, seq, 프레임, YOLO 결과) 를 메모리에 보관
+- 전체 버퍼 크기는 REPLAY_MAX_BYTES 이하로 유지
+  * 초과하면 로봇과 상관없이 가장 오래된 프레임부터 제거
+  * 로봇마다 최신 프레임 1장은 항상 남긴다
+- REPLAY_IDLE_TTL 초 동안 프레임이 없던 로봇은 통째로 제거
+  (append 때 + camera_service 의 주기 task 에서 확인,
+   오프라인 로봇 때문에 메모리가 계속 늘어나지 않도록)
+- 별도 녹화 인프라 없이 "방금 몇 초" 를 다시 볼 수 있게 한다
+"""
+
+REPLAY_SECONDS = float(os.getenv("REPLAY_SECONDS", "10"))
+REPLAY_MAX_BYTES = int(os.getenv("REPLAY_MAX_BYTES", str(200 * 1024 * 1024)))
+REPLAY_IDLE_TTL = float(os.getenv("REPLAY_IDLE_TTL", "300"))
+
+BufferKey = Tuple[str, str]  # (source, robot_name)
+
+
+class BufferedFrame:
+    __slots__ = ("timestamp", "seq", "frame", "detections")
+
+    def __init__(self, timestamp: float, seq: int, frame: bytes):
+        self.timestamp = timestamp
+        self.seq = seq
+        self.frame = frame
+        self.detections: list | None = None
+
+
+class _RobotRing:
+    def __init__(self):
+        self.frames: Deque[BufferedFrame] = deque()
+        self.bytes = 0
+        self.updated_at = 0.0
+
+
+class FrameRingBuffer:
+    """
+    로봇별 시간 기반 링 버퍼 + 전역 바이트 예산 + idle 로봇 LRU 제거
+    """
+
+    def __init__(
+        self,
+        seconds: float = REPLAY_SECONDS,
+        max_bytes: int = REPLAY_MAX_BYTES,
+        idle_ttl: float = REPLAY_IDLE_TTL,
+    ):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+
+        # 최근 갱신 순서 유지 (앞쪽이 가장 오래 idle)
+        self._rings: "OrderedDict[BufferKey, _RobotRing]" = OrderedDict()
+        self.total_bytes = 0
+        self.evicted_robots = 0
+        self.trimmed_frames = 0
+
+        # idle 로봇이 통째로 제거될 때 호출 (latest_frame 등 정리용)
+        self.on_evict: Callable[[str, str], None] | None = None
+
+    # =====================================================
+    # 쓰기
+    # =====================================================
+    def append(self, source: str, robot_name: str, seq: int, frame: bytes) -> None:
+        key = (source, robot_name)
+        now = time.time()
+
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = _RobotRing()
+            self._rings[key] = ring
+        else:
+            self._rings.move_to_end(key)
+
+        ring.frames.append(BufferedFrame(now, seq, frame))
+        ring.bytes += len(frame)
+        ring.updated_at = now
+        self.total_bytes += len(frame)
+
+        # 1) 시간 창을 벗어난 프레임 제거
+        self._trim_ring(ring, now - self.seconds)
+
+        # 2) 오래 idle 인 로봇 제거
+        self.evict_idle(now)
+
+        # 3) 전역 바이트 예산 초과 시 가장 오래된 프레임부터 제거
+        self._enforce_budget()
+
+    def attach_detections(
+        self,
+        source: str,
+        robot_name: str,
+        seq: int,
+        detections: list,
+    ) -> None:
+        """
+        YOLO 결과를 해당 seq 프레임에 붙인다 (최근 프레임부터 역순 탐색)
+        """
+        ring = self._rings.get((source, robot_name))
+        if ring is None:
+            return
+
+        for item in reversed(ring.frames):
+            if item.seq == seq:
+                item.detections = detections
+                return
+            if item.seq < seq:
+                return
+
+    def _trim_ring(self, ring: _RobotRing, cutoff: float) -> None:
+        while ring.frames and ring.frames[0].timestamp < cutoff:
+            old = ring.frames.popleft()
+            ring.bytes -= len(old.frame)
+            self.total_bytes -= len(old.frame)
+
+    def _drop_robot(self, key: BufferKey) -> None:
+        ring = self._rings.pop(key)
+        self.total_bytes -= ring.bytes
+        self.evicted_robots += 1
+        if self.on_evict is not None:
+            self.on_evict(*key)
+
+    def evict_idle(self, now: float | None = None) -> None:
+        """
+        REPLAY_IDLE_TTL 동안 프레임이 없던 로봇 제거
+        - 모든 로봇이 오프라인이면 append 가 불리지 않으므로 주기적으로도 호출
+        """
+        now = time.time() if now is None else now
+        while self._rings:
+            key, ring = next(iter(self._rings.items()))
+            if now - ring.updated_at <= self.idle_ttl:
+                break
+            print(f"[REPLAY] evict idle robot {key[0]}/{key[1]}")
+            self._drop_robot(key)
+
+    def _enforce_budget(self) -> None:
+        # 전체에서 가장 오래된 프레임부터 제거 (로봇마다 최신 1장은 유지)
+        # - 로봇은 제거하지 않으므로 on_evict 도 부르지 않는다
+        while self.total_bytes > self.max_bytes:
+            oldest: _RobotRing | None = None
+            for ring in self._rings.values():
+                if len(ring.frames) > 1 and (
+                    oldest is None
+                    or ring.frames[0].timestamp < oldest.frames[0].timestamp
+                ):
+                    oldest = ring
+            if oldest is None:
+                break
+
+            old = oldest.frames.popleft()
+            oldest.bytes -= len(old.frame)
+            self.total_bytes -= len(old.frame)
+            self.trimmed_frames += 1
+
+    # =====================================================
+    # 읽기
+    # =====================================================
+    def window(
+        self,
+        source: str,
+        robot_name: str,
+        seconds_ago: float | None = None,
+        duration: float | None = None,
+    ) -> List[BufferedFrame]:
+        """
+        [now - seconds_ago, now - seconds_ago + duration] 구간 프레임 목록 (복사본)
+        - seconds_ago 가 없으면 버퍼 전체
+        """
+        ring = self._rings.get((source, robot_name))
+        if ring is None:
+            return []
+
+        now = time.time()
+        start = now - seconds_ago if seconds_ago is not None else 0.0
+        end = start + duration if duration is not None else now + 1.0
+
+        return [f for f in ring.frames if start <= f.timestamp <= end]
+
+    def stats(self) -> dict:
+        robots = {}
+        for (source, robot_name), ring in self._rings.items():
+            frames = ring.frames
+            robots[f"{source}/{robot_name}"] = {
+                "frames": len(frames),
+                "bytes": ring.bytes,
+                "span_s": (
+                    round(frames[-1].timestamp - frames[0].timestamp, 2)
+                    if frames
+                    else 0.0
+                ),
+            }
+        return {
+            "seconds": self.seconds,
+            "max_bytes": self.max_bytes,
+            "total_bytes": self.total_bytes,
+            "evicted_robots": self.evicted_robots,
+            "trimmed_frames": self.trimmed_frames,
+            "robots": robots,
+        }
+
+
+# 전역 replay 버퍼 (camera_service 공용)
+frame_buffer = FrameRingBuffer()
@@ -0,0 +1,124 @@
+# app/services/frame_gate.py
+
+import io
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+"""
+YOLO 추론 전 "장면 변화 감지" 단계.
+
+- 정지한 로봇(예: wait 지점 대기)은 거의 같은 프레임을 계속 보낸다
+- 프레임을 32x32 흑백으로 줄인 signature 를 만들고,
+  마지막으로 추론한 프레임의 signature 와 평균 픽셀 차이를 비교
+- 차이가 threshold 미만이면 YOLO 를 호출하지 않고 캐시된 결과 재사용
+- 너무 오래 재사용하지 않도록 MAX_AGE 초마다 한 번은 강제로 추론
+
+signature 계산은 JPEG draft 모드(DCT 축소 디코딩)를 사용해서
+원본 해상도 전체를 디코딩하지 않는다.
+"""
+
+# signature 크기 (가로, 세로)
+_SIGNATURE_SIZE = (32, 32)
+
+# ------------------------------------------------------------
+# source 별 threshold (0~255 평균 픽셀 차이, 0 이면 gate 비활성)
+# ------------------------------------------------------------
+frame_gate_thresholds: Dict[str, float] = {
+    "robot": float(os.getenv("FRAME_GATE_THRESHOLD_ROBOT", "3.0")),
+    "sim": float(os.getenv("FRAME_GATE_THRESHOLD_SIM", "1.5")),
+}
+
+# 캐시 결과 최대 재사용 시간(초)
+FRAME_GATE_MAX_AGE = float(os.getenv("FRAME_GATE_MAX_AGE", "5.0"))
+
+# (source, robot_name) -> (signature, detections, 추론 시각)
+_last_inferred: Dict[Tuple[str, str], Tuple[np.ndarray, List, float]] = {}
+
+# source 별 통계
+frame_gate_stats: Dict[str, Dict[str, int]] = {
+    "robot": {"checked": 0, "skipped": 0},
+    "sim": {"checked": 0, "skipped": 0},
+}
+
+
+def compute_signature(frame: bytes) -> np.ndarray | None:
+    """
+    JPEG/PNG 바이트 → 32x32 흑백 float32 배열 (CPU 작업, to_thread 로 호출)
+    - 디코딩 실패 시 None (→ 항상 추론)
+    """
+    try:
+        img = Image.open(io.BytesIO(frame))
+        # JPEG 이면 1/2 ~ 1/8 축소 디코딩 (PNG 는 무시됨)
+        img.draft("L", (_SIGNATURE_SIZE[0] * 2, _SIGNATURE_SIZE[1] * 2))
+        img = img.convert("L").resize(_SIGNATURE_SIZE, Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+    except Exception as e:
+        print(f"[FRAME_GATE][WARN] signature failed: {e}")
+        return None
+
+
+def check_frame(
+    source: str,
+    robot_name: str,
+    signature: np.ndarray | None,
+) -> List | None:
+    """
+    마지막 추론 프레임과 비교해서 재사용 가능한 detections 반환
+    - 변화가 있거나 캐시가 없으면 None (→ YOLO 추론 필요)
+    """
+    stats = frame_gate_stats.setdefault(source, {"checked": 0, "skipped": 0})
+    stats["checked"] += 1
+
+    threshold = frame_gate_thresholds.get(source, 0.0)
+    if signature is None or threshold <= 0:
+        return None
+
+    cached = _last_inferred.get((source, robot_name))
+    if cached is None:
+        return None
+
+    last_signature, detections, inferred_at = cached
+    if time.monotonic() - inferred_at > FRAME_GATE_MAX_AGE:
+        return None
+
+    diff = float(np.mean(np.abs(signature - last_signature)))
+    if diff >= threshold:
+        return None
+
+    stats["skipped"] += 1
+    return detections
+
+
+def update_frame(
+    source: str,
+    robot_name: str,
+    signature: np.ndarray | None,
+    detections: List,
+) -> None:
+    """
+    YOLO 추론 후 signature / 결과 캐시 갱신
+    """
+    if signature is None:
+        _last_inferred.pop((source, robot_name), None)
+        return
+    _last_inferred[(source, robot_name)] = (signature, detections, time.monotonic())
+
+
+def get_frame_gate_stats() -> dict:
+    """
+    source 별 threshold / 검사 수 / 스킵 수 / 스킵 비율
+    """
+    result = {}
+    for source, stats in frame_gate_stats.items():
+        checked = stats["checked"]
+        result[source] = {
+            "threshold": frame_gate_thresholds.get(source, 0.0),
+            "checked": checked,
+            "skipped": stats["skipped"],
+            "skip_rate": round(stats["skipped"] / checked, 3) if checked else 0.0,
+        }
+    return {"max_age": FRAME_GATE_MAX_AGE, "sources": result}
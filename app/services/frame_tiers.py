@@ -0,0 +1,162 @@
+# app/services/frame_tiers.py
+
+import asyncio
+import io
+import os
+from typing import Awaitable, Callable, Dict, Tuple
+
+from PIL import Image
+
+"""
+viewer 별 영상 화질 단계 (quality tier).
+
+- full : 로봇이 보낸 원본 JPEG 그대로
+- 640  : 가로 640px 로 축소 후 재압축
+- 320  : 가로 320px 로 축소 후 재압축 (대시보드 작은 패널용)
+
+동작 방식
+- tier 프레임은 그 tier 를 보는 viewer 가 있을 때만 만든다 (lazy)
+- (source, robot_name, tier) 별 인코더가 프레임당 최대 1번 인코딩
+  * 인코딩은 스레드에서 실행 (이벤트 루프를 막지 않음)
+  * 인코딩 중에 새 프레임이 오면 "가장 최신 프레임 1장" 만 대기시킨다
+    (인코딩이 카메라 속도를 못 따라가면 중간 프레임은 건너뜀)
+- 결과 bytes 는 같은 tier 의 모든 viewer 가 공유 (BroadcastHub)
+"""
+
+# tier 이름 → 가로 픽셀 (full 은 원본이라 목록에 없음)
+TIER_WIDTHS: Dict[str, int] = {
+    "640": 640,
+    "320": 320,
+}
+TIER_FULL = "full"
+TIER_NAMES = (TIER_FULL, *TIER_WIDTHS)
+
+CAMERA_TIER_QUALITY = int(os.getenv("CAMERA_TIER_QUALITY", "70"))
+
+TierKey = Tuple[str, str, str]  # (source, robot_name, tier)
+
+# 인코딩 결과를 발행하는 콜백: (key, seq, bytes, scale)
+PublishFn = Callable[[TierKey, int, bytes, float], Awaitable[None]]
+
+
+def resize_frame(frame: bytes, width: int) -> Tuple[bytes, float]:
+    """
+    원본 JPEG/PNG → 가로 width px JPEG (CPU 작업, 스레드에서 호출)
+    - 반환: (JPEG bytes, 원본 대비 배율)
+    - 원본이 이미 더 작으면 원본 그대로
+    """
+    img = Image.open(io.BytesIO(frame))
+    src_w, src_h = img.size
+    if src_w <= width:
+        return frame, 1.0
+
+    scale = width / src_w
+    size = (width, max(1, round(src_h * scale)))
+
+    # JPEG 이면 목표 크기 이상으로만 축소 디코딩
+    img.draft("RGB", size)
+    img = img.convert("RGB").resize(size, Image.BILINEAR)
+
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=CAMERA_TIER_QUALITY)
+    return out.getvalue(), scale
+
+
+class _TierEncoder:
+    """
+    (source, robot_name, tier) 1개의 latest-only 인코더
+    """
+
+    def __init__(self, key: TierKey, publish: PublishFn):
+        self.key = key
+        self._publish = publish
+        self._pending: Tuple[int, bytes] | None = None
+        self._task: asyncio.Task | None = None
+        self._submitted_seq = 0
+
+        # 마지막 인코딩 결과 (새 viewer 첫 화면 / YOLO bbox 축소에 사용)
+        self.last_seq = 0
+        self.last_frame: bytes | None = None
+        self.scale = 1.0
+
+        self.encoded = 0
+        self.skipped = 0
+
+    def submit(self, seq: int, frame: bytes) -> None:
+        # 같은 프레임은 한 번만 인코딩 (여러 viewer 가 동시에 구독한 경우)
+        if seq and seq <= self._submitted_seq:
+            return
+        self._submitted_seq = seq
+
+        if self._pending is not None:
+            self.skipped += 1
+        self._pending = (seq, frame)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        width = TIER_WIDTHS[self.key[2]]
+        while self._pending is not None:
+            seq, frame = self._pending
+            self._pending = None
+            try:
+                data, scale = await asyncio.to_thread(resize_frame, frame, width)
+            except Exception as e:
+                print(f"[CAMERA][TIER][WARN] {'/'.join(self.key)} encode failed: {e}")
+                continue
+
+            self.encoded += 1
+            self.last_seq, self.last_frame, self.scale = seq, data, scale
+            await self._publish(self.key, seq, data, scale)
+
+    def cancel(self) -> None:
+        self._pending = None
+        if self._task is not None:
+            self._task.cancel()
+
+
+class TierEncoders:
+    """
+    tier 인코더 레지스트리 (구독자가 있는 tier 만 유지)
+    """
+
+    def __init__(self, publish: PublishFn):
+        self._publish = publish
+        self._encoders: Dict[TierKey, _TierEncoder] = {}
+
+    def get(self, key: TierKey) -> _TierEncoder | None:
+        return self._encoders.get(key)
+
+    def activate(self, key: TierKey) -> _TierEncoder:
+        encoder = self._encoders.get(key)
+        if encoder is None:
+            encoder = _TierEncoder(key, self._publish)
+            self._encoders[key] = encoder
+        return encoder
+
+    def deactivate(self, key: TierKey) -> None:
+        encoder = self._encoders.pop(key, None)
+        if encoder is not None:
+            encoder.cancel()
+
+    def active(self, source: str, robot_name: str):
+        """
+        해당 로봇에서 현재 구독 중인 tier 인코더 목록
+        """
+        return [
+            encoder
+            for (s, r, _tier), encoder in self._encoders.items()
+            if s == source and r == robot_name
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "/".join(key): {
+                "encoded": encoder.encoded,
+                "skipped": encoder.skipped,
+                "last_seq": encoder.last_seq,
+                "last_bytes": len(encoder.last_frame) if encoder.last_frame else 0,
+            }
+            for key, encoder in self._encoders.items()
+        }
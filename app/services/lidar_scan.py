@@ -0,0 +1,93 @@
+# app/services/lidar_scan.py
+
+import os
+from typing import Any
+
+import numpy as np
+
+"""
+LaserScan ranges 정규화 (NumPy 벡터 연산).
+- NaN / inf / 0 이하 / 최대값 초과 → LIDAR_MAX_RANGE
+- 선택적 각도 decimation (LIDAR_DECIMATION, 구간별 최소 거리)
+"""
+
+# 라이다 최대 거리 (서버 기준 clamp 값)
+LIDAR_MAX_RANGE = 3.5
+
+# scan 각도 decimation 간격 (1 이면 원본 해상도)
+LIDAR_DECIMATION = max(1, int(os.getenv("LIDAR_DECIMATION", "1")))
+
+
+def to_float_array(ranges: Any) -> np.ndarray:
+    """
+    ranges → float64 1차원 배열 (숫자가 아닌 값은 NaN)
+    """
+    if isinstance(ranges, np.ndarray) and ranges.dtype.kind in "fiu":
+        return ranges.astype(np.float64)
+
+    # 대부분의 경우: 전부 숫자 → C 레벨 변환 1번
+    try:
+        arr = np.array(ranges)
+    except (ValueError, TypeError):
+        arr = None
+    if arr is not None and arr.ndim == 1 and arr.dtype.kind in "fiub":
+        return arr.astype(np.float64)
+
+    # None / 문자열 / 중첩 리스트가 섞인 경우만 원소별 검사
+    return np.fromiter(
+        (r if isinstance(r, (int, float)) else np.nan for r in ranges),
+        dtype=np.float64,
+        count=len(ranges),
+    )
+
+
+def decimate_ranges(ranges: np.ndarray, step: int, fill: float) -> np.ndarray:
+    """
+    step 개씩 묶어서 최소값 1개만 남긴다 (마지막 구간이 모자라면 fill 로 채움)
+    """
+    if step <= 1 or ranges.size == 0:
+        return ranges
+
+    pad = (-ranges.size) % step
+    if pad:
+        ranges = np.concatenate([ranges, np.full(pad, fill)])
+    return ranges.reshape(-1, step).min(axis=1)
+
+
+def normalize_ranges(
+    ranges: Any,
+    max_range: float = LIDAR_MAX_RANGE,
+    step: int = 1,
+) -> np.ndarray:
+    """
+    ranges 정규화 (벡터 연산 1번)
+    - 숫자가 아님 / NaN / inf / 0 이하 → max_range
+    - max_range 초과 → max_range
+    - step > 1 이면 각도 decimation
+    """
+    arr = to_float_array(ranges)
+
+    # NaN 비교는 False 이므로 "0 초과가 아님" 에 NaN 도 포함
+    with np.errstate(invalid="ignore"):
+        invalid = ~(arr > 0.0) | ~np.isfinite(arr)
+    arr[invalid] = max_range
+    np.minimum(arr, max_range, out=arr)
+
+    return decimate_ranges(arr, step, max_range)
+
+
+def normalize_scan_payload(payload: dict, step: int = LIDAR_DECIMATION) -> dict:
+    """
+    scan 메시지의 data 부분 정규화 (ranges 를 np.ndarray 로 교체)
+    """
+    ranges = payload.get("ranges")
+    if not isinstance(ranges, (list, np.ndarray)):
+        return payload
+
+    payload["ranges"] = normalize_ranges(ranges, LIDAR_MAX_RANGE, step)
+
+    if step > 1 and isinstance(payload.get("angle_increment"), (int, float)):
+        payload["angle_increment"] = payload["angle_increment"] * step
+
+    return payload
+
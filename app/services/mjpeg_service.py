@@ -0,0 +1,150 @@
+# app/services/mjpeg_service.py
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, Tuple
+
+"""
+MJPEG (multipart/x-mixed-replace) HTTP 스트리밍.
+
+- 벽걸이 화면 / 가벼운 클라이언트는 WebSocket 대신 <img src="..."> 로 시청
+- (source, robot_name) 별 공유 채널 1개를 모든 HTTP 클라이언트가 같이 읽는다
+  * multipart part(헤더 + JPEG)는 프레임당 1번만 만들어서 공유
+  * 채널은 첫 클라이언트가 올 때 생성, 마지막 클라이언트가 나가면 제거
+- 클라이언트별 속도 조절(pacing)
+  * 클라이언트는 "지금 최신 프레임" 만 받는다 → 느린 클라이언트는 중간 프레임을 건너뜀
+  * fps 파라미터로 클라이언트별 최대 프레임 속도 제한 가능
+"""
+
+MJPEG_BOUNDARY = "frame"
+
+# 새 프레임이 없을 때 마지막 프레임을 다시 보내는 간격(초)
+# - 끊긴 클라이언트를 감지하고, 프록시 idle timeout 을 피하기 위함
+_KEEPALIVE_SECONDS = 5.0
+
+ChannelKey = Tuple[str, str]  # (source, robot_name)
+
+
+def _encode_part(frame: bytes) -> bytes:
+    header = (
+        f"--{MJPEG_BOUNDARY}\r\n"
+        "Content-Type: image/jpeg\r\n"
+        f"Content-Length: {len(frame)}\r\n\r\n"
+    ).encode("ascii")
+    return header + frame + b"\r\n"
+
+
+class _MjpegChannel:
+    """
+    로봇 1대의 공유 MJPEG 채널 (최신 part 1개 + 새 프레임 알림)
+    """
+
+    def __init__(self):
+        self.part: bytes | None = None
+        self.seq = 0
+        self.clients = 0
+        self._changed = asyncio.Event()
+
+    def publish(self, frame: bytes) -> None:
+        self.part = _encode_part(frame)
+        self.seq += 1
+
+        # 기다리던 모든 클라이언트를 깨우고, 다음 프레임용 Event 로 교체
+        changed = self._changed
+        self._changed = asyncio.Event()
+        changed.set()
+
+    async def wait_newer(self, seq: int, timeout: float) -> None:
+        if self.seq > seq:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+_channels: Dict[ChannelKey, _MjpegChannel] = {}
+
+# 클라이언트 수가 바뀔 때 호출 (camera_service 의 시청 수요 집계용)
+_count_listener: Callable[[str, str], None] | None = None
+
+
+def set_count_listener(listener: Callable[[str, str], None]) -> None:
+    global _count_listener
+    _count_listener = listener
+
+
+def _notify_count(key: ChannelKey) -> None:
+    if _count_listener is not None:
+        _count_listener(*key)
+
+
+def publish_mjpeg_frame(source: str, robot_name: str, frame: bytes) -> None:
+    """
+    enqueue_frame 에서 호출. MJPEG 클라이언트가 없으면 아무것도 하지 않는다.
+    """
+    channel = _channels.get((source, robot_name))
+    if channel is not None:
+        channel.publish(frame)
+
+
+def mjpeg_client_count(source: str, robot_name: str) -> int:
+    channel = _channels.get((source, robot_name))
+    return channel.clients if channel is not None else 0
+
+
+async def mjpeg_stream(
+    source: str,
+    robot_name: str,
+    initial_frame: bytes | None = None,
+    max_fps: float | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    클라이언트 1명용 multipart 스트림 generator
+    - 공유 채널의 최신 part 만 내보낸다 (쌓아두지 않음)
+    """
+    key = (source, robot_name)
+    channel = _channels.get(key)
+    if channel is None:
+        channel = _MjpegChannel()
+        _channels[key] = channel
+    channel.clients += 1
+    _notify_count(key)
+
+    if channel.part is None and initial_frame:
+        channel.publish(initial_frame)
+
+    min_interval = 1.0 / max_fps if max_fps else 0.0
+    last_seq = 0
+    last_sent_at = 0.0
+
+    try:
+        while True:
+            await channel.wait_newer(last_seq, _KEEPALIVE_SECONDS)
+
+            # 클라이언트별 최대 fps 제한 (기다리는 동안 들어온 프레임은 건너뜀)
+            if min_interval:
+                delay = min_interval - (time.monotonic() - last_sent_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            part = channel.part
+            if part is None:
+                continue
+
+            last_seq = channel.seq
+            last_sent_at = time.monotonic()
+            yield part
+
+    finally:
+        channel.clients -= 1
+        if channel.clients <= 0 and _channels.get(key) is channel:
+            del _channels[key]
+        _notify_count(key)
+
+
+def get_mjpeg_stats() -> dict:
+    return {
+        f"{source}/{robot_name}": {"clients": channel.clients, "seq": channel.seq}
+        for (source, robot_name), channel in _channels.items()
+    }
@@ -0,0 +1,282 @@
+# app/services/path_cache.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.services.path_service import load_paths_arrays
+from app.services.path_simplify import simplify_indices
+
+"""
+과거 경로 구간(time bucket) 캐시.
+- 요청 구간을 PATH_BUCKET_SECONDS 단위 bucket 으로 나눈다
+  * 통째로 포함되고 이미 닫힌 bucket → 캐시 (robot_name, bucket 시작, 해상도)
+  * 나머지(가장자리 / 열린 bucket) → DB 직접 조회
+- byte 제한 LRU (PATH_CACHE_MAX_BYTES), 조각 digest 로 ETag 생성
+"""
+
+PATH_BUCKET_SECONDS = int(os.getenv("PATH_BUCKET_SECONDS", "3600"))
+PATH_BUCKET_SETTLE_SECONDS = float(os.getenv("PATH_BUCKET_SETTLE_SECONDS", "120"))
+PATH_CACHE_MAX_BYTES = int(os.getenv("PATH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_EPOCH = datetime(1970, 1, 1)
+_BUCKET = timedelta(seconds=PATH_BUCKET_SECONDS)
+_US = timedelta(microseconds=1)
+
+
+class PathPiece:
+    """
+    경로 조각 1개 (timestamps, xy, 원본 포인트 수, 내용 digest)
+    """
+
+    __slots__ = ("t", "xy", "raw_count", "digest", "nbytes")
+
+    def __init__(self, t: np.ndarray, xy: np.ndarray, raw_count: int):
+        self.t = t
+        self.xy = xy
+        self.raw_count = raw_count
+        self.nbytes = t.nbytes + xy.nbytes
+
+        h = hashlib.blake2b(digest_size=8)
+        h.update(t.tobytes())
+        h.update(xy.tobytes())
+        h.update(raw_count.to_bytes(8, "little"))
+        self.digest = h.hexdigest()
+
+
+class PathBucketCache:
+    """
+    닫힌 bucket 경로 조각 byte 제한 LRU (스레드 안전, 경로 API 는 스레드풀에서 실행)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, PathPiece]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> PathPiece | None:
+        with self._lock:
+            piece = self._entries.get(key)
+            if piece is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return piece
+
+    def put(self, key: Hashable, piece: PathPiece) -> None:
+        # 혼자서 캐시 전체보다 큰 조각은 저장하지 않는다
+        if piece.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+
+            self._entries[key] = piece
+            self.bytes += piece.nbytes
+
+            while self.bytes > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bucket_seconds": PATH_BUCKET_SECONDS,
+                "settle_seconds": PATH_BUCKET_SETTLE_SECONDS,
+            }
+
+
+# 전역 경로 bucket 캐시
+path_bucket_cache = PathBucketCache(PATH_CACHE_MAX_BYTES)
+
+
+class PathWindow:
+    """
+    요청 구간 전체 경로 (조각을 이어 붙인 결과)
+    """
+
+    __slots__ = ("t", "xy", "raw_count", "digest", "closed")
+
+    def __init__(self, pieces: List[PathPiece], closed: bool):
+        if pieces:
+            self.t = np.concatenate([p.t for p in pieces])
+            self.xy = np.concatenate([p.xy for p in pieces])
+        else:
+            self.t = np.empty(0, dtype="datetime64[us]")
+            self.xy = np.empty((0, 2), dtype=np.float64)
+        self.raw_count = sum(p.raw_count for p in pieces)
+        self.digest = "-".join(p.digest for p in pieces)
+
+        # 구간 끝까지 전부 닫혀 있으면 이후에도 바뀌지 않는다
+        self.closed = closed
+
+
+# (시작, 끝, 끝 포함 여부, 캐시할 bucket 시작 또는 None)
+Piece = Tuple[datetime, datetime, bool, datetime | None]
+
+
+def _bucket_floor(dt: datetime) -> datetime:
+    seconds = (dt - _EPOCH) // timedelta(seconds=1)
+    return _EPOCH + timedelta(seconds=seconds - seconds % PATH_BUCKET_SECONDS)
+
+
+def _settled_before(now: datetime | None = None) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(seconds=PATH_BUCKET_SETTLE_SECONDS)
+
+
+def plan_window(
+    start_dt: datetime,
+    end_dt: datetime,
+    now: datetime | None = None,
+) -> List[Piece]:
+    """
+    요청 구간 [start, end] → 조각 목록
+    - 구간에 통째로 포함된 닫힌 bucket 은 캐시 조각 (bucket 시작 포함)
+    - 나머지는 DB 직접 조회 조각 (마지막 조각만 끝 포함)
+    """
+    if end_dt < start_dt:
+        return []
+
+    settled = _settled_before(now)
+    pieces: List[Piece] = []
+    cursor = start_dt
+
+    bucket = _bucket_floor(start_dt)
+    if bucket < start_dt:
+        bucket += _BUCKET
+
+    # bucket 이 [start, end] 안에 통째로 들어가고 이미 닫힌 동안
+    while bucket + _BUCKET <= end_dt + _US and bucket + _BUCKET <= settled:
+        if cursor < bucket:
+            pieces.append((cursor, bucket, False, None))
+        pieces.append((bucket, bucket + _BUCKET, False, bucket))
+        cursor = bucket + _BUCKET
+        bucket = cursor
+
+    if cursor <= end_dt:
+        pieces.append((cursor, end_dt, True, None))
+
+    return pieces
+
+
+def _make_piece(t: np.ndarray, xy: np.ndarray, tolerance: float | None) -> PathPiece:
+    raw_count = len(t)
+    if tolerance is not None and raw_count > 2:
+        idx = simplify_indices(xy, None, tolerance)
+        return PathPiece(t[idx], xy[idx], raw_count)
+    # 조회 결과 배열의 view 를 캐시에 남기지 않도록 복사
+    return PathPiece(t.copy(), xy.copy(), raw_count)
+
+
+def load_windows(
+    db: Session,
+    robot_names: List[str],
+    start_dt: datetime,
+    end_dt: datetime,
+    tolerance: float | None = None,
+) -> Dict[str, PathWindow]:
+    """
+    여러 로봇 구간 경로 (닫힌 bucket 은 캐시, 나머지는 DB grouped query)
+    - tolerance 가 있으면 조각별로 단순화된 결과
+    """
+    resolution = "raw" if tolerance is None else float(tolerance)
+    plan = plan_window(start_dt, end_dt)
+
+    # 조각별 {robot_name: PathPiece} (캐시에 있는 것부터 채운다)
+    pieces: List[dict] = [{} for _ in plan]
+    for i, (_a, _b, _inclusive, bucket) in enumerate(plan):
+        if bucket is None:
+            continue
+        for name in robot_names:
+            piece = path_bucket_cache.get((name, bucket, resolution))
+            if piece is not None:
+                pieces[i][name] = piece
+
+    # 로봇별로 DB 가 필요한 연속 조각 [i, j] → 같은 [i, j] 인 로봇끼리 쿼리 1번
+    # (캐시에 있는 조각은 다른 로봇 때문에 다시 읽지 않는다)
+    runs: Dict[Tuple[int, int], List[str]] = {}
+    for name in robot_names:
+        i = 0
+        while i < len(plan):
+            if name in pieces[i]:
+                i += 1
+                continue
+            j = i
+            while j + 1 < len(plan) and name not in pieces[j + 1]:
+                j += 1
+            runs.setdefault((i, j), []).append(name)
+            i = j + 1
+
+    for (i, j), run_names in runs.items():
+        _a, last_end, last_inclusive, _bucket = plan[j]
+        arrays = load_paths_arrays(
+            db, run_names, plan[i][0], last_end if last_inclusive else last_end - _US
+        )
+
+        for k in range(i, j + 1):
+            a, b, inclusive, bucket = plan[k]
+            for name in run_names:
+                t, xy = arrays[name]
+                lo = np.searchsorted(t, np.datetime64(a, "us"), side="left")
+                hi = len(t) if inclusive else np.searchsorted(
+                    t, np.datetime64(b, "us"), side="left"
+                )
+                piece = _make_piece(t[lo:hi], xy[lo:hi], tolerance)
+                if bucket is not None:
+                    path_bucket_cache.put((name, bucket, resolution), piece)
+                pieces[k][name] = piece
+
+    closed = end_dt <= _settled_before()
+    return {
+        name: PathWindow([p[name] for p in pieces], closed)
+        for name in robot_names
+    }
+
+
+def load_window(
+    db: Session,
+    robot_name: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    tolerance: float | None = None,
+) -> PathWindow:
+    """
+    로봇 1대 구간 경로 (load_windows 와 같은 규칙)
+    """
+    return load_windows(db, [robot_name], start_dt, end_dt, tolerance)[robot_name]
+
+
+def window_etag(windows: List[PathWindow], *params) -> str:
+    """
+    경로 내용 digest + 응답 형식에 영향을 주는 파라미터 → ETag
+    """
+    h = hashlib.blake2b(digest_size=12)
+    for window in windows:
+        h.update(window.digest.encode("ascii"))
+        h.update(b"|")
+    h.update(repr(params).encode("utf-8"))
+    return '"' + h.hexdigest() + '"'
+
+
+def get_path_cache_stats() -> dict:
+    return path_bucket_cache.stats()
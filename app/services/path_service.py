@@ -0,0 +1,274 @@
+# app/services/path_service.py
+
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.models.robot_history import OdomHistory
+
+"""
+이동 경로 조회 / 스트리밍 (server-side cursor, 필요한 컬럼만).
+
+응답 형식 (format)
+  * json   : {"points": [...]}
+  * ndjson : 한 줄에 포인트 1개 (batch 는 "robot" 필드 추가)
+  * binary : 포인트당 16 byte, t(f64 epoch 초) | x(f32) | y(f32)
+             batch 는 name_len(u8) | name | count(u32) | 레코드 × count frame 반복
+"""
+
+PATH_STREAM_CHUNK = int(os.getenv("PATH_STREAM_CHUNK", "2000"))
+
+PATH_FORMATS = ("json", "ndjson", "binary")
+PATH_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "binary": "application/octet-stream",
+}
+
+# batch 요청 1번에 허용하는 로봇 수
+PATH_BATCH_MAX_ROBOTS = int(os.getenv("PATH_BATCH_MAX_ROBOTS", "20"))
+
+PATH_FRAME_HEADER = struct.Struct("<B")
+PATH_FRAME_COUNT = struct.Struct("<I")
+
+PATH_RECORD = np.dtype([("t", "<f8"), ("x", "<f4"), ("y", "<f4")])
+
+_EPOCH = np.datetime64(0, "us")
+
+
+def path_statement(robot_name: str, start_dt: datetime, end_dt: datetime):
+    """
+    경로 조회 SELECT (필요한 컬럼만, NULL 필터 포함)
+    """
+    return (
+        select(OdomHistory.timestamp, OdomHistory.pos_x, OdomHistory.pos_y)
+        .where(OdomHistory.robot_name == robot_name)
+        .where(OdomHistory.timestamp >= start_dt)
+        .where(OdomHistory.timestamp <= end_dt)
+        .where(OdomHistory.pos_x.isnot(None))
+        .where(OdomHistory.pos_y.isnot(None))
+        .order_by(OdomHistory.timestamp.asc())
+    )
+
+
+def iter_path_chunks(
+    db: Session,
+    robot_name: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    chunk: int = PATH_STREAM_CHUNK,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    server-side cursor 로 chunk 개씩 읽어서 (timestamps datetime64[us], xy (n, 2)) 로 반환
+    """
+    result = db.execute(
+        path_statement(robot_name, start_dt, end_dt).execution_options(
+            stream_results=True, yield_per=chunk
+        )
+    )
+    for rows in result.partitions(chunk):
+        t = np.array([r[0] for r in rows], dtype="datetime64[us]")
+        xy = np.array([(r[1], r[2]) for r in rows], dtype=np.float64)
+        yield t, xy
+
+
+def load_path_arrays(
+    db: Session,
+    robot_name: str,
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    구간 전체 경로 → (timestamps datetime64[us], xy (N, 2))
+    """
+    ts_parts, xy_parts = [], []
+    for t, xy in iter_path_chunks(db, robot_name, start_dt, end_dt):
+        ts_parts.append(t)
+        xy_parts.append(xy)
+
+    if not ts_parts:
+        return np.empty(0, dtype="datetime64[us]"), np.empty((0, 2), dtype=np.float64)
+    return np.concatenate(ts_parts), np.concatenate(xy_parts)
+
+
+def paths_statement(robot_names: List[str], start_dt: datetime, end_dt: datetime):
+    """
+    여러 로봇 경로 조회 SELECT (로봇 → 시간 순서)
+    """
+    return (
+        select(
+            OdomHistory.robot_name,
+            OdomHistory.timestamp,
+            OdomHistory.pos_x,
+            OdomHistory.pos_y,
+        )
+        .where(OdomHistory.robot_name.in_(robot_names))
+        .where(OdomHistory.timestamp >= start_dt)
+        .where(OdomHistory.timestamp <= end_dt)
+        .where(OdomHistory.pos_x.isnot(None))
+        .where(OdomHistory.pos_y.isnot(None))
+        .order_by(OdomHistory.robot_name.asc(), OdomHistory.timestamp.asc())
+    )
+
+
+def iter_paths_chunks(
+    db: Session,
+    robot_names: List[str],
+    start_dt: datetime,
+    end_dt: datetime,
+    chunk: int = PATH_STREAM_CHUNK,
+) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    여러 로봇 경로를 grouped query 1번으로 읽어서 (robot_name, timestamps, xy) 로 반환
+    - chunk 안에서 로봇이 바뀌면 나눠서 반환
+    """
+    result = db.execute(
+        paths_statement(robot_names, start_dt, end_dt).execution_options(
+            stream_results=True, yield_per=chunk
+        )
+    )
+    for rows in result.partitions(chunk):
+        names = np.array([r[0] for r in rows], dtype=object)
+        t = np.array([r[1] for r in rows], dtype="datetime64[us]")
+        xy = np.array([(r[2], r[3]) for r in rows], dtype=np.float64)
+
+        bounds = [0, *(np.flatnonzero(names[1:] != names[:-1]) + 1), len(rows)]
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            yield names[lo], t[lo:hi], xy[lo:hi]
+
+
+def load_paths_arrays(
+    db: Session,
+    robot_names: List[str],
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    여러 로봇 구간 경로 → {robot_name: (timestamps, xy)} (데이터 없는 로봇은 빈 배열)
+    """
+    parts: dict = {name: ([], []) for name in robot_names}
+    for name, t, xy in iter_paths_chunks(db, robot_names, start_dt, end_dt):
+        parts[name][0].append(t)
+        parts[name][1].append(xy)
+
+    out = {}
+    for name, (ts_parts, xy_parts) in parts.items():
+        if ts_parts:
+            out[name] = (np.concatenate(ts_parts), np.concatenate(xy_parts))
+        else:
+            out[name] = (
+                np.empty(0, dtype="datetime64[us]"),
+                np.empty((0, 2), dtype=np.float64),
+            )
+    return out
+
+
+def path_points(t: np.ndarray, xy: np.ndarray) -> list:
+    """
+    Chart.js 용 포인트 목록 [{"x", "y", "t"}, ...] (기존 JSON 응답과 같은 형식)
+    """
+    return [
+        {"x": x, "y": y, "t": ts.isoformat()}
+        for ts, (x, y) in zip(t.astype(object), xy.tolist())
+    ]
+
+
+def encode_path_chunk(fmt: str, t: np.ndarray, xy: np.ndarray) -> bytes:
+    """
+    포인트 chunk → ndjson / binary bytes
+    """
+    if fmt == "binary":
+        records = np.empty(len(t), dtype=PATH_RECORD)
+        records["t"] = (t - _EPOCH).astype(np.int64) / 1e6
+        records["x"] = xy[:, 0]
+        records["y"] = xy[:, 1]
+        return records.tobytes()
+
+    return "".join(
+        json.dumps(point, separators=(",", ":")) + "\n" for point in path_points(t, xy)
+    ).encode("utf-8")
+
+
+def encode_path_arrays(fmt: str, t: np.ndarray, xy: np.ndarray) -> Iterator[bytes]:
+    """
+    이미 메모리에 있는 (단순화된) 경로 → PATH_STREAM_CHUNK 단위 bytes
+    """
+    for i in range(0, len(t), PATH_STREAM_CHUNK):
+        yield encode_path_chunk(
+            fmt, t[i:i + PATH_STREAM_CHUNK], xy[i:i + PATH_STREAM_CHUNK]
+        )
+
+
+def encode_paths_chunk(fmt: str, robot_name: str, t: np.ndarray, xy: np.ndarray) -> bytes:
+    """
+    로봇 1대의 포인트 chunk → batch ndjson 줄 / binary frame
+    """
+    if fmt == "binary":
+        name = robot_name.encode("utf-8")
+        return (
+            PATH_FRAME_HEADER.pack(len(name))
+            + name
+            + PATH_FRAME_COUNT.pack(len(t))
+            + encode_path_chunk(fmt, t, xy)
+        )
+
+    return "".join(
+        json.dumps({"robot": robot_name, **point}, separators=(",", ":")) + "\n"
+        for point in path_points(t, xy)
+    ).encode("utf-8")
+
+
+def encode_paths_arrays(
+    fmt: str,
+    paths: Dict[str, Tuple[np.ndarray, np.ndarray]],
+) -> Iterator[bytes]:
+    """
+    이미 메모리에 있는 여러 로봇 경로 → PATH_STREAM_CHUNK 단위 bytes
+    """
+    for robot_name, (t, xy) in paths.items():
+        for i in range(0, len(t), PATH_STREAM_CHUNK):
+            yield encode_paths_chunk(
+                fmt, robot_name, t[i:i + PATH_STREAM_CHUNK], xy[i:i + PATH_STREAM_CHUNK]
+            )
+
+
+def stream_path(
+    fmt: str,
+    robot_name: str,
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Iterator[bytes]:
+    """
+    StreamingResponse 용 동기 generator (Starlette 가 스레드풀에서 실행)
+    - 요청 세션과 별도로 자체 세션을 열고, 스트림이 끝나면 닫는다
+    - 읽은 chunk 를 바로 인코딩해서 전송 → 구간 길이와 관계없이 메모리 일정
+    """
+    db = SessionLocal()
+    try:
+        for t, xy in iter_path_chunks(db, robot_name, start_dt, end_dt):
+            yield encode_path_chunk(fmt, t, xy)
+    finally:
+        db.close()
+
+
+def stream_paths(
+    fmt: str,
+    robot_names: List[str],
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Iterator[bytes]:
+    """
+    여러 로봇 경로 스트리밍 (grouped query 1번, stream_path 와 같은 세션 관리)
+    """
+    db = SessionLocal()
+    try:
+        for robot_name, t, xy in iter_paths_chunks(db, robot_names, start_dt, end_dt):
+            yield encode_paths_chunk(fmt, robot_name, t, xy)
+    finally:
+        db.close()
@@ -0,0 +1,80 @@
+# app/services/path_simplify.py
+
+import heapq
+import os
+
+import numpy as np
+
+"""
+이동 경로(trajectory) 서버측 단순화 (Ramer–Douglas–Peucker, NumPy).
+- 시작점 / 끝점은 항상 유지, 가장 크게 벗어난 점부터 추가
+- tolerance (m) / max_points 중 먼저 도달하는 조건에서 중단
+"""
+
+# max_points 상한 (요청 값이 더 커도 이 값으로 제한)
+PATH_MAX_POINTS_LIMIT = int(os.getenv("PATH_MAX_POINTS_LIMIT", "20000"))
+
+
+def _farthest(xy: np.ndarray, start: int, end: int) -> tuple:
+    """
+    start ~ end 선분에서 가장 멀리 떨어진 내부 점 → (거리, index)
+    """
+    if end - start < 2:
+        return 0.0, -1
+
+    a = xy[start]
+    seg = xy[end] - a
+    pts = xy[start + 1:end] - a
+
+    seg_len2 = float(seg @ seg)
+    if seg_len2 == 0.0:
+        # 시작점 = 끝점 (제자리 회전 / 원점 복귀) → 점까지의 거리
+        dist2 = np.einsum("ij,ij->i", pts, pts)
+    else:
+        t = np.clip(pts @ seg / seg_len2, 0.0, 1.0)
+        diff = pts - t[:, None] * seg
+        dist2 = np.einsum("ij,ij->i", diff, diff)
+
+    i = int(np.argmax(dist2))
+    return float(np.sqrt(dist2[i])), start + 1 + i
+
+
+def simplify_indices(
+    xy: np.ndarray,
+    max_points: int | None = None,
+    tolerance: float | None = None,
+) -> np.ndarray:
+    """
+    (N, 2) 좌표 → 남길 점의 index (오름차순)
+    - max_points / tolerance 둘 다 없으면 전체
+    """
+    n = len(xy)
+    if n <= 2 or (max_points is None and tolerance is None):
+        return np.arange(n)
+
+    limit = min(max_points or n, PATH_MAX_POINTS_LIMIT, n)
+    limit = max(limit, 2)
+    tol = tolerance if tolerance is not None else 0.0
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    count = 2
+
+    # (-거리, start, end, 가장 먼 점 index) 최대 힙
+    dist, idx = _farthest(xy, 0, n - 1)
+    heap = [(-dist, 0, n - 1, idx)]
+
+    while heap and count < limit:
+        neg_dist, start, end, idx = heapq.heappop(heap)
+        if idx < 0 or -neg_dist <= tol:
+            break
+
+        keep[idx] = True
+        count += 1
+
+        for s, e in ((start, idx), (idx, end)):
+            d, i = _farthest(xy, s, e)
+            if i >= 0:
+                heapq.heappush(heap, (-d, s, e, i))
+
+    return np.flatnonzero(keep)
@@ -1,19 +1,33 @@
 # app/services/robot_service.py
 
-from typing import List
+from datetime import datetime
+from typing import List, Tuple
 from time import time
 
+import numpy as np
+from sqlalchemy import select, union
 from sqlalchemy.orm import Session
 
-from app.models.robot_state_history import RobotStateHistory
+from app.models.robot_history import (
+    BatteryHistory,
+    CmdVelHistory,
+    HISTORY_TABLES,
+    OdomHistory,
+    ScanHistory,
+)
+from app.services.scan_codec import DecodedScan, decode_scan, stack_scans
 
 """
 로봇 관련 DB 조회 로직.
 
 병목 개선 포인트:
-- get_latest_robot_data : 인덱스 + 정렬으로 "마지막 레코드 하나"만 빠르게 조회.
+- 상태 히스토리는 type 별 테이블 (app/models/robot_history.py)
+  * primary key (robot_name, timestamp) 범위 읽기만으로 조회
+- get_latest_robot_data : type 별 테이블에서 "마지막 row 하나"씩만 조회.
 - get_distinct_robot_names : 자주 호출되는 로봇 목록 조회에
   짧은 TTL 기반 인메모리 캐시 적용.
+- get_latest_scan / get_scan_window : scan 은 압축 binary(scan_blob) 로 저장되므로
+  필요한 컬럼만 읽고 NumPy 배열로 복원해서 반환.
 """
 
 # 짧은 TTL(초 단위) 캐시
@@ -24,22 +38,51 @@ _ROBOT_NAME_CACHE = {
 _CACHE_TTL_SECONDS = 5.0  # 5초 정도면 새로고침에도 DB 부담이 확 줄어든다.
 
 
-def get_latest_robot_data(db: Session, robot_name: str) -> RobotStateHistory | None:
+def _latest(db: Session, model, robot_name: str, *columns):
     """
-    특정 로봇의 "가장 최근 상태" 한 건을 가져온다.
-
-    성능 팁:
-    - RobotStateHistory 에 (robot_name, timestamp) 또는 (robot_name, id) 인덱스를 걸어두면
-      ORDER BY + LIMIT 1 쿼리가 매우 빠르게 수행된다.
+    (robot_name, timestamp) primary key 역순 탐색 → row 1개
     """
     return (
-        db.query(RobotStateHistory)
-        .filter(RobotStateHistory.robot_name == robot_name)
-        .order_by(RobotStateHistory.id.desc())  # id 가 AUTO_INCREMENT 라고 가정
+        db.query(model.timestamp, *columns)
+        .filter(model.robot_name == robot_name)
+        .order_by(model.timestamp.desc())
         .first()
     )
 
 
+def get_latest_robot_data(db: Session, robot_name: str) -> dict | None:
+    """
+    특정 로봇의 "가장 최근 상태"를 type 별 테이블에서 모아 dict 로 반환.
+    - timestamp 는 그중 가장 최근 값
+    - 한 번도 저장된 적 없는 로봇이면 None
+    """
+    odom = _latest(db, OdomHistory, robot_name, OdomHistory.pos_x, OdomHistory.pos_y)
+    cmd_vel = _latest(
+        db,
+        CmdVelHistory,
+        robot_name,
+        CmdVelHistory.linear_velocity,
+        CmdVelHistory.angular_velocity,
+    )
+    battery = _latest(db, BatteryHistory, robot_name, BatteryHistory.percentage)
+    scan = _latest(db, ScanHistory, robot_name)
+
+    timestamps = [r.timestamp for r in (odom, cmd_vel, battery, scan) if r is not None]
+    if not timestamps:
+        return None
+
+    return {
+        "robot_name": robot_name,
+        "timestamp": max(timestamps),
+        "pos_x": odom.pos_x if odom else None,
+        "pos_y": odom.pos_y if odom else None,
+        "linear_velocity": cmd_vel.linear_velocity if cmd_vel else None,
+        "angular_velocity": cmd_vel.angular_velocity if cmd_vel else None,
+        "battery_percentage": battery.percentage if battery else None,
+        "scan_timestamp": scan.timestamp if scan else None,
+    }
+
+
 def get_distinct_robot_names(db: Session) -> List[str]:
     """
     히스토리 테이블에서 중복 없이 로봇 이름 목록만 가져온다.
@@ -49,20 +92,54 @@ def get_distinct_robot_names(db: Session) -> List[str]:
       매번 distinct 쿼리가 히스토리 전체 테이블을 스캔할 수 있다.
     - 짧은 TTL(5초) 캐시를 두어 같은 이름 목록을 여러 번 재사용하면
       DB 부하가 크게 줄어든다.
+    - type 별 테이블의 robot_name 은 primary key 앞쪽 컬럼이라 index 만 읽는다.
     """
     now = time()
     if now < _ROBOT_NAME_CACHE["expires_at"]:
         # 캐시 유효기간 이내 → 메모리에서 반환
         return _ROBOT_NAME_CACHE["data"]
 
-    rows = (
-        db.query(RobotStateHistory.robot_name)
-        .distinct()
-        .order_by(RobotStateHistory.robot_name)
-        .all()
+    query = union(
+        *(select(model.robot_name).distinct() for model in HISTORY_TABLES.values())
     )
-    names = [r[0] for r in rows]
+    names = sorted(r[0] for r in db.execute(query))
 
     _ROBOT_NAME_CACHE["data"] = names
     _ROBOT_NAME_CACHE["expires_at"] = now + _CACHE_TTL_SECONDS
     return names
+
+
+# ==========================================================
+# 라이다 scan 조회 (NumPy 배열 반환)
+# ==========================================================
+def get_latest_scan(db: Session, robot_name: str) -> DecodedScan | None:
+    """
+    특정 로봇의 가장 최근 scan 1건
+    """
+    row = _latest(db, ScanHistory, robot_name, ScanHistory.scan_blob)
+    if row is None:
+        return None
+    return decode_scan(row.scan_blob)
+
+
+def get_scan_window(
+    db: Session,
+    robot_name: str,
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    기간 내 scan 전체
+    - 반환값 : (timestamps datetime64[us] 1차원, ranges float32 2차원 (scan 수, ranges 수))
+    """
+    rows = (
+        db.query(ScanHistory.timestamp, ScanHistory.scan_blob)
+        .filter(ScanHistory.robot_name == robot_name)
+        .filter(ScanHistory.timestamp >= start_dt)
+        .filter(ScanHistory.timestamp <= end_dt)
+        .order_by(ScanHistory.timestamp.asc())
+        .all()
+    )
+
+    timestamps = np.array([row.timestamp for row in rows], dtype="datetime64[us]")
+    return timestamps, stack_scans([decode_scan(row.scan_blob) for row in rows])
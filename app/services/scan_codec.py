@@ -0,0 +1,208 @@
+# app/services/scan_codec.py
+
+import json
+import os
+import struct
+import zlib
+from typing import Any
+
+import numpy as np
+
+from app.services.lidar_scan import to_float_array
+
+"""
+LaserScan DB 저장용 압축 binary 포맷 (scan_blob 컬럼).
+
+  header : version(u8) | flags(u8) | count(u32)
+           | angle_min(f32) | angle_increment(f32) | range_max(f32)
+  body   : ranges 를 mm 단위 uint16 으로 양자화 (little-endian)
+           - 유효하지 않은 값은 0xFFFF → 읽을 때 NaN
+           - flags & DELTA : 이웃 값과의 차이로 저장
+           - flags & ZLIB  : body 전체 zlib 압축
+"""
+
+SCAN_CODEC_VERSION = 1
+
+FLAG_DELTA = 0x01
+FLAG_ZLIB = 0x02
+
+SCAN_ZLIB_LEVEL = int(os.getenv("SCAN_ZLIB_LEVEL", "6"))
+SCAN_DELTA = os.getenv("SCAN_DELTA", "1") == "1"
+
+HEADER = struct.Struct("<BBIfff")
+
+INVALID_MM = 0xFFFF
+MAX_MM = 0xFFFE
+
+_NAN = float("nan")
+
+
+def _num(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else _NAN
+
+
+class DecodedScan:
+    """
+    DB 에서 읽은 scan 1건 (ranges 는 float32 np.ndarray, m 단위)
+    """
+
+    __slots__ = ("ranges", "angle_min", "angle_increment", "range_max")
+
+    def __init__(
+        self,
+        ranges: np.ndarray,
+        angle_min: float = _NAN,
+        angle_increment: float = _NAN,
+        range_max: float = _NAN,
+    ):
+        self.ranges = ranges
+        self.angle_min = angle_min
+        self.angle_increment = angle_increment
+        self.range_max = range_max
+
+    def angles(self) -> np.ndarray:
+        """
+        ranges 각 원소의 각도 (각도 정보가 없으면 0 ~ 2π 균등 분할로 가정)
+        """
+        n = self.ranges.size
+        if np.isfinite(self.angle_min) and np.isfinite(self.angle_increment):
+            return self.angle_min + self.angle_increment * np.arange(n, dtype=np.float32)
+        return np.linspace(0.0, 2 * np.pi, n, endpoint=False, dtype=np.float32)
+
+    def to_dict(self) -> dict:
+        return {
+            "angle_min": self.angle_min,
+            "angle_increment": self.angle_increment,
+            "range_max": self.range_max,
+            "ranges": self.ranges,
+        }
+
+
+def encode_scan(
+    ranges: Any,
+    angle_min: Any = None,
+    angle_increment: Any = None,
+    range_max: Any = None,
+    delta: bool = SCAN_DELTA,
+    level: int = SCAN_ZLIB_LEVEL,
+) -> bytes:
+    """
+    ranges (list / np.ndarray, m 단위) → scan_blob bytes
+    """
+    arr = to_float_array(ranges)
+
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(arr) & (arr >= 0.0)
+    mm = np.full(arr.size, INVALID_MM, dtype="<u2")
+    mm[valid] = np.minimum(np.rint(arr[valid] * 1000.0), MAX_MM)
+
+    flags = 0
+    if delta and mm.size:
+        # uint16 wrap-around 차분 → 복원은 cumsum (같은 dtype 으로 wrap)
+        mm = np.diff(mm, prepend=np.uint16(0)).astype("<u2")
+        flags |= FLAG_DELTA
+
+    body = mm.tobytes()
+    if level > 0:
+        body = zlib.compress(body, level)
+        flags |= FLAG_ZLIB
+
+    header = HEADER.pack(
+        SCAN_CODEC_VERSION,
+        flags,
+        arr.size,
+        _num(angle_min),
+        _num(angle_increment),
+        _num(range_max),
+    )
+    return header + body
+
+
+def encode_scan_payload(payload: dict) -> bytes | None:
+    """
+    scan 메시지의 data 부분 → scan_blob (ranges 가 없으면 None)
+    """
+    ranges = payload.get("ranges")
+    if not isinstance(ranges, (list, np.ndarray)):
+        return None
+
+    return encode_scan(
+        ranges,
+        payload.get("angle_min"),
+        payload.get("angle_increment"),
+        payload.get("range_max"),
+    )
+
+
+def decode_scan(blob: bytes) -> DecodedScan:
+    """
+    scan_blob bytes → DecodedScan
+    """
+    version, flags, count, angle_min, angle_inc, range_max = HEADER.unpack_from(blob, 0)
+    if version != SCAN_CODEC_VERSION:
+        raise ValueError(f"unsupported scan codec version: {version}")
+
+    body = blob[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    mm = np.frombuffer(body, dtype="<u2", count=count)
+    if flags & FLAG_DELTA:
+        mm = np.cumsum(mm, dtype=np.uint16)
+
+    ranges = mm.astype(np.float32) / np.float32(1000.0)
+    ranges[mm == INVALID_MM] = np.nan
+
+    return DecodedScan(ranges, angle_min, angle_inc, range_max)
+
+
+def decode_scan_json(value: Any) -> DecodedScan | None:
+    """
+    기존 scan_json 값 (dict / list / JSON 문자열) → DecodedScan
+    - backfill 이전의 오래된 row 를 같은 API 로 읽기 위한 호환 경로
+    """
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        value = json.loads(value)
+
+    if isinstance(value, dict):
+        ranges = value.get("ranges")
+        meta = value
+    else:
+        ranges = value
+        meta = {}
+
+    if not isinstance(ranges, list):
+        return None
+
+    return DecodedScan(
+        to_float_array(ranges).astype(np.float32),
+        _num(meta.get("angle_min")),
+        _num(meta.get("angle_increment")),
+        _num(meta.get("range_max")),
+    )
+
+
+def load_scan(blob: bytes | None, legacy_json: Any = None) -> DecodedScan | None:
+    """
+    row 의 scan_blob 우선, 없으면 scan_json 으로 읽는다
+    """
+    if blob:
+        return decode_scan(blob)
+    return decode_scan_json(legacy_json)
+
+
+def stack_scans(scans: list) -> np.ndarray:
+    """
+    DecodedScan 목록 → (scan 수, 최대 ranges 수) float32 2차원 배열
+    - ranges 개수가 다른 scan 은 뒤쪽을 NaN 으로 채운다
+    """
+    if not scans:
+        return np.empty((0, 0), dtype=np.float32)
+
+    width = max(scan.ranges.size for scan in scans)
+    out = np.full((len(scans), width), np.nan, dtype=np.float32)
+    for i, scan in enumerate(scans):
+        out[i, :scan.ranges.size] = scan.ranges
+    return out
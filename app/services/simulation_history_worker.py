@@ -1,12 +1,12 @@
 # app/services/simulation_history_worker.py
 
-import json
 import asyncio
 from datetime import datetime
 
 from app.services.simulation_history_service import simulation_history_queue
 from app.models.simulation_robot_data import SimulationRobotData
 from app.config.database_simulation import SessionLocalSim
+from app.services.scan_codec import encode_scan_payload
 
 """
 시뮬레이션 로봇 상태를 DB 에 저장하는 백그라운드 워커.
@@ -39,7 +39,7 @@ def _save_simulation_history_item(item: dict) -> None:
             linear_velocity=msg.get("data", {}).get("linear_vel", {}).get("x"),
             angular_velocity=msg.get("data", {}).get("angular_vel", {}).get("z"),
 
-            scan_json=json.dumps(msg.get("data", {}).get("ranges"))
+            scan_blob=encode_scan_payload(msg.get("data", {}))
             if msg.get("type") == "scan"
             else None,
         )
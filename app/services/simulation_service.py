@@ -1,11 +1,15 @@
 # app/services/simulation_service.py
 
-from typing import List
+from datetime import datetime
+from typing import List, Tuple
 from time import time
 
+import numpy as np
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.models.simulation_robot_data import SimulationRobotData
+from app.services.scan_codec import load_scan, stack_scans
 
 """
 시뮬레이션 로봇 관련 DB 조회 로직.
@@ -45,3 +49,45 @@ def get_distinct_sim_robot_names(db: Session) -> List[str]:
     _SIM_ROBOT_NAME_CACHE["data"] = names
     _SIM_ROBOT_NAME_CACHE["expires_at"] = now + _SIM_CACHE_TTL_SECONDS
     return names
+
+
+def get_sim_scan_window(
+    db: Session,
+    robot_name: str,
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    시뮬레이션 로봇의 기간 내 scan 전체
+    - 반환값 : (timestamps datetime64[us] 1차원, ranges float32 2차원)
+    - scan_blob 우선, backfill 이전 row 는 scan_json 텍스트로 읽는다
+    """
+    rows = (
+        db.query(
+            SimulationRobotData.timestamp,
+            SimulationRobotData.scan_blob,
+            SimulationRobotData.scan_json,
+        )
+        .filter(SimulationRobotData.robot_name == robot_name)
+        .filter(SimulationRobotData.timestamp >= start_dt)
+        .filter(SimulationRobotData.timestamp <= end_dt)
+        .filter(
+            or_(
+                SimulationRobotData.scan_blob.isnot(None),
+                SimulationRobotData.scan_json.isnot(None),
+            )
+        )
+        .order_by(SimulationRobotData.timestamp.asc())
+        .all()
+    )
+
+    timestamps = []
+    scans = []
+    for row in rows:
+        scan = load_scan(row.scan_blob, row.scan_json)
+        if scan is not None:
+            timestamps.append(row.timestamp)
+            scans.append(scan)
+
+    return np.array(timestamps, dtype="datetime64[us]"), stack_scans(scans)
+
@@ -0,0 +1,202 @@
+# app/services/state_codec.py
+
+import math
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+"""
+상태 / 라이다 메시지용 compact binary 포맷 (opt-in).
+
+기존 JSON
+- scan 메시지의 ranges 수백 개가 "0.123456789" 같은 10진수 문자열로 전송
+- 직렬화 CPU / 대역폭 모두 큼
+
+binary frame 구조 (모두 little-endian)
+  header : version(u8) | type(u8) | timestamp(f64, epoch 초) | seq(u32) | name_len(u8)
+  name   : robot_name UTF-8 (name_len byte)
+  payload: type 별 고정 구조
+    odom    : pos_x, pos_y, yaw, linear_x, angular_z          (f32 × 5)
+    cmd_vel : linear_x, angular_z                             (f32 × 2)
+    battery : percentage, voltage                             (f32 × 2)
+    scan    : encoding(u8) | angle_min(f32) | angle_increment(f32)
+              | range_max(f32) | count(u32) | ranges
+              - encoding 0 : ranges 는 f32 × count (m)
+              - encoding 1 : ranges 는 u16 × count (mm, 최대 65.534m)
+- 값이 없으면 NaN
+- 알 수 없는 type 은 binary 로 만들지 않는다 (JSON 으로 전송)
+"""
+
+STATE_CODEC_VERSION = 1
+
+TYPE_CODES: Dict[str, int] = {
+    "odom": 1,
+    "cmd_vel": 2,
+    "battery": 3,
+    "scan": 4,
+}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+SCAN_F32 = 0
+SCAN_U16 = 1
+
+HEADER = struct.Struct("<BBdIB")
+ODOM = struct.Struct("<5f")
+CMD_VEL = struct.Struct("<2f")
+BATTERY = struct.Struct("<2f")
+SCAN_HEADER = struct.Struct("<BfffI")
+
+_NAN = float("nan")
+
+
+def _num(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else _NAN
+
+
+def _yaw(orientation: Any) -> float:
+    """
+    quaternion {x, y, z, w} → yaw (없으면 NaN)
+    """
+    if not isinstance(orientation, dict):
+        return _NAN
+    try:
+        x, y = orientation.get("x", 0.0), orientation.get("y", 0.0)
+        z, w = orientation["z"], orientation["w"]
+        return math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    except (KeyError, TypeError):
+        return _NAN
+
+
+def _velocity(payload: dict, linear_keys: Tuple[str, ...], angular_keys: Tuple[str, ...]):
+    """
+    로봇 / 시뮬마다 다른 속도 키 이름 중 있는 것을 사용
+    """
+    linear = next((payload[k] for k in linear_keys if isinstance(payload.get(k), dict)), {})
+    angular = next((payload[k] for k in angular_keys if isinstance(payload.get(k), dict)), {})
+    return _num(linear.get("x")), _num(angular.get("z"))
+
+
+def _encode_payload(msg_type: str, payload: dict, quantize: bool) -> bytes | None:
+    if msg_type == "odom":
+        pos = payload.get("position") or {}
+        twist = payload.get("twist") or {}
+        linear_x, angular_z = _velocity(
+            {**twist, **payload},
+            ("linear_velocity", "linear_vel", "linear"),
+            ("angular_velocity", "angular_vel", "angular"),
+        )
+        return ODOM.pack(
+            _num(pos.get("x")),
+            _num(pos.get("y")),
+            _yaw(payload.get("orientation")),
+            linear_x,
+            angular_z,
+        )
+
+    if msg_type == "cmd_vel":
+        return CMD_VEL.pack(*_velocity(payload, ("linear",), ("angular",)))
+
+    if msg_type == "battery":
+        return BATTERY.pack(_num(payload.get("percentage")), _num(payload.get("voltage")))
+
+    if msg_type == "scan":
+        ranges = payload.get("ranges")
+        if not isinstance(ranges, (list, np.ndarray)):
+            return None
+
+        arr = np.asarray(ranges, dtype=np.float32)
+        if quantize:
+            body = np.clip(np.rint(arr * 1000.0), 0, 65534).astype("<u2").tobytes()
+        else:
+            body = arr.astype("<f4", copy=False).tobytes()
+
+        return (
+            SCAN_HEADER.pack(
+                SCAN_U16 if quantize else SCAN_F32,
+                _num(payload.get("angle_min")),
+                _num(payload.get("angle_increment")),
+                _num(payload.get("range_max")),
+                arr.size,
+            )
+            + body
+        )
+
+    return None
+
+
+def encode_state_frame(
+    robot_name: str,
+    data: dict,
+    seq: int,
+    timestamp: float,
+    quantize: bool = False,
+) -> bytes | None:
+    """
+    JSON 상태 메시지({"type", "data"}) → binary frame
+    - 지원하지 않는 type 이면 None
+    """
+    msg_type = data.get("type")
+    code = TYPE_CODES.get(msg_type)
+    if code is None:
+        return None
+
+    payload = _encode_payload(msg_type, data.get("data") or {}, quantize)
+    if payload is None:
+        return None
+
+    name = robot_name.encode("utf-8")[:255]
+    header = HEADER.pack(
+        STATE_CODEC_VERSION, code, timestamp, seq & 0xFFFFFFFF, len(name)
+    )
+    return header + name + payload
+
+
+def decode_state_frame(frame: bytes) -> dict:
+    """
+    binary frame → dict (벤치마크 / 검증용, 브라우저는 viewer_socket.js 에서 디코딩)
+    """
+    version, code, timestamp, seq, name_len = HEADER.unpack_from(frame, 0)
+    offset = HEADER.size
+    robot_name = frame[offset:offset + name_len].decode("utf-8")
+    offset += name_len
+
+    msg_type = TYPE_NAMES.get(code)
+    result = {
+        "version": version,
+        "type": msg_type,
+        "robot": robot_name,
+        "timestamp": timestamp,
+        "seq": seq,
+    }
+
+    if msg_type == "odom":
+        pos_x, pos_y, yaw, linear_x, angular_z = ODOM.unpack_from(frame, offset)
+        result["data"] = {
+            "position": {"x": pos_x, "y": pos_y},
+            "yaw": yaw,
+            "twist": {"linear": {"x": linear_x}, "angular": {"z": angular_z}},
+        }
+    elif msg_type == "cmd_vel":
+        linear_x, angular_z = CMD_VEL.unpack_from(frame, offset)
+        result["data"] = {"linear": {"x": linear_x}, "angular": {"z": angular_z}}
+    elif msg_type == "battery":
+        percentage, voltage = BATTERY.unpack_from(frame, offset)
+        result["data"] = {"percentage": percentage, "voltage": voltage}
+    elif msg_type == "scan":
+        encoding, angle_min, angle_inc, range_max, count = SCAN_HEADER.unpack_from(
+            frame, offset
+        )
+        offset += SCAN_HEADER.size
+        if encoding == SCAN_U16:
+            ranges = np.frombuffer(frame, "<u2", count, offset).astype(np.float32) / 1000.0
+        else:
+            ranges = np.frombuffer(frame, "<f4", count, offset)
+        result["data"] = {
+            "angle_min": angle_min,
+            "angle_increment": angle_inc,
+            "range_max": range_max,
+            "ranges": ranges,
+        }
+
+    return result
@@ -1,5 +1,7 @@
 # app/services/state_history_service.py
 # WebSocket 수신부 → DB 저장 큐 전달
+from datetime import datetime
+
 from app.services.state_history_queue import state_history_queue
 
 async def enqueue_state_history(robot_name: str, data: dict):
@@ -8,9 +10,13 @@ async def enqueue_state_history(robot_name: str, data: dict):
 
     - 여기서는 DB 작업을 하지 않는다
     - 최대한 가볍게 유지해야 한다
+    - timestamp 는 수신 시점 기준 (워커가 배치로 늦게 저장해도 시각 유지)
+    - 큐가 가득 차면 asyncio.QueueFull 발생 (호출부에서 드롭 처리)
     """
 
-    await state_history_queue.put({
+    # 가득 차면 기다리지 않고 QueueFull (수신 루프가 DB 때문에 멈추지 않도록)
+    state_history_queue.put_nowait({
         "robot_name": robot_name,
         "data": data,
+        "timestamp": datetime.utcnow(),
     })
@@ -1,86 +1,249 @@
 # app/services/state_history_worker.py
 # 상태 히스토리 DB 저장 Worker
 import asyncio
-from datetime import datetime
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+from sqlalchemy import insert
 
 from app.config.database import SessionLocal
-from app.models.robot_state_history import RobotStateHistory
+from app.models.robot_history import HISTORY_TABLES
+from app.services.scan_codec import encode_scan_payload
 from app.services.state_history_queue import state_history_queue
 
+# ============================================================
+# 배치(micro-batch) 설정
+# - BATCH_SIZE     : 한 번에 INSERT 할 최대 row 수
+# - FLUSH_INTERVAL : 첫 메시지 수신 후 최대 대기 시간(초)
+#   → 둘 중 먼저 도달하는 조건에서 flush 한다.
+# ============================================================
+STATE_HISTORY_BATCH_SIZE = int(os.getenv("STATE_HISTORY_BATCH_SIZE", "500"))
+STATE_HISTORY_FLUSH_INTERVAL = float(os.getenv("STATE_HISTORY_FLUSH_INTERVAL", "0.2"))
+
+# ============================================================
+# flush 통계 (모니터링용)
+# - state_controller 의 stats API 에서 그대로 반환한다.
+# ============================================================
+state_history_stats = {
+    "batch_size": STATE_HISTORY_BATCH_SIZE,
+    "flush_interval": STATE_HISTORY_FLUSH_INTERVAL,
+    "flush_count": 0,
+    "rows_written": 0,
+    "rows_failed": 0,
+    "last_flush_rows": 0,
+    "last_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+    "total_flush_ms": 0.0,
+}
+
+
+# (테이블, robot_name) → 마지막으로 저장한 timestamp
+# - type 별 테이블의 primary key 가 (robot_name, timestamp) 이므로 겹치지 않게 유지
+_last_timestamp: Dict[Tuple[str, str], datetime] = {}
+
+
+def unique_timestamp(
+    last_seen: Dict[Tuple[str, str], datetime],
+    table: str,
+    robot_name: str,
+    timestamp: datetime,
+) -> datetime:
+    """
+    같은 로봇 / 같은 테이블에서 이전 값 이하이면 1µs 뒤로 민다
+    """
+    key = (table, robot_name)
+    last = last_seen.get(key)
+    if last is not None and timestamp <= last:
+        timestamp = last + timedelta(microseconds=1)
+    last_seen[key] = timestamp
+    return timestamp
 
-async def state_history_worker():
+
+def _build_record_kwargs(item: dict) -> Tuple[type, dict] | None:
     """
-    상태 히스토리 DB 저장 Worker
+    큐 아이템 1개 → (type 별 히스토리 테이블, row dict) 변환
 
     정책:
-    - 메시지 1개 = DB row 1개
-    - 타입별로 채울 수 있는 컬럼만 채운다
-    - 나머지는 NULL
+    - 메시지 1개 = 해당 type 테이블의 row 1개
+    - 필수 값이 없거나 저장할 가치 없는 타입이면 None
     """
+    robot_name = item["robot_name"]
+    data = item["data"]
+    msg_type = data.get("type")
+    payload = data.get("data", {})
+
+    model = HISTORY_TABLES.get(msg_type)
+    if model is None:
+        return None
+
+    # -----------------------------
+    # 타입별 매핑
+    # -----------------------------
+    if msg_type == "odom":
+        pos = payload.get("position", {})
+        if pos.get("x") is None or pos.get("y") is None:
+            return None
+
+        values = {"pos_x": pos.get("x"), "pos_y": pos.get("y")}
+
+    elif msg_type == "cmd_vel":
+        lin = payload.get("linear", {})
+        ang = payload.get("angular", {})
+
+        values = {
+            "linear_velocity": lin.get("x"),
+            "angular_velocity": ang.get("z"),
+        }
 
-    print("[STATE_HISTORY_WORKER] started")
+    elif msg_type == "battery":
+        if payload.get("percentage") is None:
+            return None
 
-    while True:
-        item = await state_history_queue.get()
-
-        robot_name = item["robot_name"]
-        data = item["data"]
-        msg_type = data.get("type")
-        payload = data.get("data", {})
-
-        # 기본값은 전부 None
-        record_kwargs = {
-            "robot_name": robot_name,
-            "timestamp": datetime.utcnow(),
-            "pos_x": None,
-            "pos_y": None,
-            "linear_velocity": None,
-            "angular_velocity": None,
-            "battery_percentage": None,
-            "scan_json": None,
-        }
+        values = {"percentage": payload.get("percentage")}
+
+    else:
+        # 정규화된 ranges(np.ndarray) 를 그대로 압축 binary 로 저장
+        scan_blob = encode_scan_payload(payload)
+        if scan_blob is None:
+            return None
+
+        values = {"scan_blob": scan_blob}
 
-        # -----------------------------
-        # 타입별 매핑
-        # -----------------------------
-        if msg_type == "odom":
-            pos = payload.get("position", {})
-
-            record_kwargs.update({
-                "pos_x": pos.get("x"),
-                "pos_y": pos.get("y"),
-            })
-        elif msg_type == "cmd_vel":
-            lin = payload.get("linear", {})
-            ang = payload.get("angular", {})
-
-            record_kwargs.update({
-                "linear_velocity": lin.get("x"),
-                "angular_velocity": ang.get("z"),
-            })
-        elif msg_type == "battery":
-            record_kwargs["battery_percentage"] = payload.get("percentage")
-
-        elif msg_type == "scan":
-            record_kwargs["scan_json"] = payload
-
-        else:
-            # 저장할 가치 없는 타입
+    timestamp = unique_timestamp(
+        _last_timestamp,
+        model.__tablename__,
+        robot_name,
+        item.get("timestamp") or datetime.utcnow(),
+    )
+    return model, {"robot_name": robot_name, "timestamp": timestamp, **values}
+
+
+def _bulk_insert_state_history(rows: Dict[type, list]) -> None:
+    """
+    배치 단위 DB INSERT (blocking I/O)
+    - asyncio.to_thread 로 호출된다.
+    - 테이블마다 multi-row INSERT 1번 + 전체 commit 1번
+    """
+    db = SessionLocal()
+    try:
+        for model, model_rows in rows.items():
+            db.execute(insert(model), model_rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _collect_batch() -> list[dict]:
+    """
+    큐에서 micro-batch 하나를 모은다.
+
+    - 최소 1개는 기다린다 (idle 상태에서는 CPU 사용 없음)
+    - 이후 BATCH_SIZE 개가 모이거나
+      FLUSH_INTERVAL 이 지나면 바로 반환
+    """
+    items = [await state_history_queue.get()]
+    deadline = time.monotonic() + STATE_HISTORY_FLUSH_INTERVAL
+
+    while len(items) < STATE_HISTORY_BATCH_SIZE:
+        # 이미 큐에 쌓여 있는 것은 대기 없이 가져온다
+        try:
+            items.append(state_history_queue.get_nowait())
             continue
+        except asyncio.QueueEmpty:
+            pass
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        try:
+            items.append(
+                await asyncio.wait_for(state_history_queue.get(), timeout=remaining)
+            )
+        except asyncio.TimeoutError:
+            break
+
+    return items
+
+
+async def state_history_worker():
+    """
+    상태 히스토리 DB 저장 Worker (micro-batch 모드)
+
+    정책:
+    - 큐를 BATCH_SIZE / FLUSH_INTERVAL 기준으로 묶어서 처리
+    - 배치 1개 = type 별 테이블마다 multi-row INSERT 1번 + commit 1번
+    - DB I/O 는 asyncio.to_thread 로 이벤트 루프 밖에서 수행
+    """
+
+    print(
+        "[STATE_HISTORY_WORKER] started "
+        f"(batch_size={STATE_HISTORY_BATCH_SIZE}, "
+        f"flush_interval={STATE_HISTORY_FLUSH_INTERVAL}s)"
+    )
+
+    while True:
+        items = await _collect_batch()
 
-        # -----------------------------
-        # DB INSERT
-        # -----------------------------
-        db = SessionLocal()
         try:
-            record = RobotStateHistory(**record_kwargs)
-            db.add(record)
-            db.commit()
-            print(f"[DB][OK] saved {msg_type} {robot_name}")
+            # type 별 테이블로 나눠서 모은다
+            rows: Dict[type, list] = {}
+            for item in items:
+                record = _build_record_kwargs(item)
+                if record is not None:
+                    model, record_kwargs = record
+                    rows.setdefault(model, []).append(record_kwargs)
+
+            if not rows:
+                continue
+
+            row_count = sum(len(model_rows) for model_rows in rows.values())
+
+            # -----------------------------
+            # DB INSERT (배치)
+            # -----------------------------
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(_bulk_insert_state_history, rows)
+            except Exception as e:
+                state_history_stats["rows_failed"] += row_count
+                print("[DB][ERROR]", e)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+            state_history_stats["flush_count"] += 1
+            state_history_stats["rows_written"] += row_count
+            state_history_stats["last_flush_rows"] = row_count
+            state_history_stats["last_flush_ms"] = round(elapsed_ms, 2)
+            state_history_stats["total_flush_ms"] += elapsed_ms
+            state_history_stats["max_flush_ms"] = round(
+                max(state_history_stats["max_flush_ms"], elapsed_ms), 2
+            )
+
+            print(f"[DB][OK] saved batch rows={row_count} flush={elapsed_ms:.1f}ms")
 
         except Exception as e:
-            db.rollback()
-            print("[DB][ERROR]", e)
+            # 워커는 절대 죽지 않는다
+            print("[STATE_HISTORY_WORKER][ERROR]", e)
 
         finally:
-            db.close()
+            for _ in items:
+                state_history_queue.task_done()
+
+
+def get_state_history_stats() -> dict:
+    """
+    배치 설정 + flush 타이밍 통계 반환 (평균 flush 시간 포함)
+    """
+    stats = dict(state_history_stats)
+    count = stats["flush_count"]
+    stats["avg_flush_ms"] = round(stats["total_flush_ms"] / count, 2) if count else 0.0
+    stats["total_flush_ms"] = round(stats["total_flush_ms"], 2)
+    stats["queue_size"] = state_history_queue.qsize()
+    return stats
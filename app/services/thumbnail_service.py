@@ -0,0 +1,118 @@
+# app/services/thumbnail_service.py
+
+import asyncio
+import hashlib
+import os
+from typing import Dict, List, Tuple
+
+from app.services.camera_service import SourceType, frame_seq, latest_frame
+from app.services.frame_tiers import resize_frame
+
+"""
+전체 로봇(fleet) 썸네일.
+
+- 대시보드에서 모든 로봇 화면을 한눈에 보기 위한 작은 썸네일 (기본 160px)
+- latest_frame 의 최신 프레임으로 만들고, 더 새로운 프레임이 올 때까지 캐시
+  * 캐시 key 는 (source, robot_name), 값은 (seq, 썸네일, ETag)
+  * 같은 프레임에 대한 썸네일은 여러 클라이언트가 요청해도 1번만 인코딩
+- 축소 / 재압축은 스레드에서 실행 (이벤트 루프를 막지 않음)
+"""
+
+THUMB_WIDTH = int(os.getenv("THUMB_WIDTH", "160"))
+FLEET_INTERVAL = float(os.getenv("FLEET_INTERVAL", "1.0"))
+
+ThumbKey = Tuple[str, str]  # (source, robot_name)
+
+
+class Thumbnail:
+    __slots__ = ("seq", "data", "etag")
+
+    def __init__(self, seq: int, data: bytes):
+        self.seq = seq
+        self.data = data
+        self.etag = '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+
+_cache: Dict[ThumbKey, Thumbnail] = {}
+
+# 인코딩 중인 썸네일 (같은 프레임을 동시에 여러 번 만들지 않도록)
+_inflight: Dict[ThumbKey, Tuple[int, asyncio.Task]] = {}
+
+thumbnail_stats = {"encoded": 0, "cache_hits": 0}
+
+
+async def _encode(key: ThumbKey, seq: int, frame: bytes) -> Thumbnail:
+    data, _scale = await asyncio.to_thread(resize_frame, frame, THUMB_WIDTH)
+    thumb = Thumbnail(seq, data)
+    _cache[key] = thumb
+    thumbnail_stats["encoded"] += 1
+    return thumb
+
+
+async def get_thumbnail(source: SourceType, robot_name: str) -> Thumbnail | None:
+    """
+    로봇의 최신 프레임 썸네일 (캐시가 최신이면 그대로 반환)
+    - 프레임을 한 번도 받지 못한 로봇이면 None
+    """
+    key = (source, robot_name)
+    frame = latest_frame.get(source, {}).get(robot_name)
+    if frame is None:
+        _cache.pop(key, None)
+        return None
+
+    seq = frame_seq.get(source, {}).get(robot_name, 0)
+    cached = _cache.get(key)
+    if cached is not None and cached.seq == seq:
+        thumbnail_stats["cache_hits"] += 1
+        return cached
+
+    inflight = _inflight.get(key)
+    if inflight is None or inflight[0] != seq:
+        task = asyncio.create_task(_encode(key, seq, frame))
+        inflight = (seq, task)
+        _inflight[key] = inflight
+
+    try:
+        return await asyncio.shield(inflight[1])
+    except Exception as e:
+        print(f"[THUMB][WARN] {source}/{robot_name} encode failed: {e}")
+        return cached
+    finally:
+        if _inflight.get(key) is inflight and inflight[1].done():
+            del _inflight[key]
+
+
+async def fleet_thumbnails(
+    source: SourceType | None = None,
+) -> List[Tuple[str, str, Thumbnail]]:
+    """
+    프레임이 있는 모든 로봇의 썸네일 목록 [(source, robot_name, 썸네일), ...]
+    - source 를 지정하면 해당 source 로봇만
+    """
+    keys = [
+        (src, robot_name)
+        for src, frames in latest_frame.items()
+        if source is None or src == source
+        for robot_name in list(frames)
+    ]
+
+    # 프레임 캐시에서 사라진(오프라인으로 정리된) 로봇의 썸네일도 정리
+    for key in list(_cache):
+        if key[1] not in latest_frame.get(key[0], {}):
+            del _cache[key]
+
+    thumbs = await asyncio.gather(*(get_thumbnail(src, name) for src, name in keys))
+    return [
+        (src, name, thumb)
+        for (src, name), thumb in zip(keys, thumbs)
+        if thumb is not None
+    ]
+
+
+def get_thumbnail_stats() -> dict:
+    return {
+        "width": THUMB_WIDTH,
+        "interval": FLEET_INTERVAL,
+        "cached": len(_cache),
+        **thumbnail_stats,
+    }
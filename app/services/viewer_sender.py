@@ -0,0 +1,272 @@
+# app/services/viewer_sender.py
+
+import asyncio
+import json
+import os
+import time
+import weakref
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Tuple, Union
+
+from fastapi import WebSocket
+
+"""
+viewer 1명 전용 송신 큐 + 송신 task.
+- 작은 drop-oldest 큐, 생산자는 push() 만 호출
+- 큐에는 인코딩된 프레임만 (bytes → binary, str → text)
+- 상태 채널은 ConflatingSender (종류별 최신 값 + 최대 전송 속도)
+"""
+
+VIEWER_QUEUE_SIZE = int(os.getenv("VIEWER_QUEUE_SIZE", "4"))
+VIEWER_SEND_TIMEOUT = float(os.getenv("VIEWER_SEND_TIMEOUT", "2.0"))
+
+# 전송 단위: bytes(binary) 또는 str(text) 로 미리 인코딩된 프레임
+EncodedFrame = Union[bytes, str]
+
+# (enqueue 시각, 프레임)
+_QueueItem = Tuple[float, EncodedFrame]
+
+# WebSocket → 쓰기 lock (다중 채널 소켓은 sender task 여러 개 + 제어 응답이 같은 소켓에 쓴다)
+_socket_locks: "weakref.WeakKeyDictionary[WebSocket, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def socket_lock(websocket: WebSocket) -> asyncio.Lock:
+    """
+    소켓별 쓰기 lock (send_* 호출이 서로 겹치지 않도록)
+    """
+    lock = _socket_locks.get(websocket)
+    if lock is None:
+        lock = _socket_locks[websocket] = asyncio.Lock()
+    return lock
+
+
+async def send_json_locked(websocket: WebSocket, data: dict) -> None:
+    """
+    sender task 와 같은 lock 을 잡고 JSON 텍스트 1개 전송 (제어 응답용)
+    """
+    text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    async with socket_lock(websocket):
+        await websocket.send_text(text)
+
+
+class ViewerSender:
+    """
+    WebSocket 1개에 대한 bounded 송신 큐
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_dead: Callable[["ViewerSender"], Awaitable[None]] | None = None,
+        maxsize: int = VIEWER_QUEUE_SIZE,
+        send_timeout: float = VIEWER_SEND_TIMEOUT,
+    ):
+        self.websocket = websocket
+        self._on_dead = on_dead
+        self._queue: Deque[_QueueItem] = deque(maxlen=max(1, maxsize))
+        self._wakeup = asyncio.Event()
+        self._send_timeout = send_timeout
+        self._task: asyncio.Task | None = None
+        self.closed = False
+
+        # 다중 채널 소켓이면 채널 이름 (BroadcastHub 가 설정)
+        self.tag: str | None = None
+
+        client = websocket.client
+        self.peer = f"{client.host}:{client.port}" if client else "unknown"
+
+        # 통계
+        self.sent = 0
+        self.dropped = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        sender task 종료 (viewer 해제 시 호출)
+        """
+        self.closed = True
+        task = self._task
+        if task is None or task is asyncio.current_task():
+            return
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    # =====================================================
+    # 생산자 쪽 (await 없음)
+    # =====================================================
+    def push(self, data: EncodedFrame, slot: Hashable | None = None) -> bool:
+        """
+        인코딩된 프레임을 큐에 넣는다. 큐가 가득 차면 가장 오래된 것을 버린다.
+        - 여러 viewer 가 같은 bytes / str 객체를 공유한다 (복사 없음)
+        - slot 은 ConflatingSender 용 (여기서는 무시)
+        """
+        if self.closed:
+            return False
+
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+
+        self._queue.append((time.monotonic(), data))
+        self._wakeup.set()
+        return True
+
+    # =====================================================
+    # 소비자 쪽 (전용 task)
+    # =====================================================
+    async def _send(self, data: EncodedFrame) -> None:
+        async with socket_lock(self.websocket):
+            if isinstance(data, bytes):
+                await self.websocket.send_bytes(data)
+            else:
+                await self.websocket.send_text(data)
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+
+                enqueued_at, data = self._queue.popleft()
+                await asyncio.wait_for(self._send(data), timeout=self._send_timeout)
+
+                lag_ms = (time.monotonic() - enqueued_at) * 1000.0
+                self.sent += 1
+                self.last_lag_ms = round(lag_ms, 1)
+                self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            self._queue.clear()
+            await self._fail(e)
+
+    async def _fail(self, error: Exception) -> None:
+        reason = "send timeout" if isinstance(error, asyncio.TimeoutError) else error
+        print(f"[VIEWER][ERROR] {self.peer} send failed: {reason}")
+        self.closed = True
+
+        # 멈춘 연결은 닫아서 receive 루프도 끝나게 한다
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+        if self._on_dead is not None:
+            await self._on_dead(self)
+
+    def stats(self) -> dict:
+        return {
+            "peer": self.peer,
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+
+class ConflatingSender(ViewerSender):
+    """
+    상태 채널용 송신기: 메시지 종류(slot)별 "최신 값 1개" 만 유지 + 종류별 최대 전송 속도
+
+    - 로봇이 30Hz 로 scan 을 보내도 viewer 에게는 최대 N Hz 로만 전송
+    - 전송 간격 안에 들어온 메시지는 최신 값으로 덮어씀 (conflation)
+    - rates 에 없는 종류(slot=None 포함)는 속도 제한 없이 최신 값만 유지
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        rates: Dict[str, float],
+        on_dead: Callable[["ViewerSender"], Awaitable[None]] | None = None,
+        send_timeout: float = VIEWER_SEND_TIMEOUT,
+    ):
+        super().__init__(websocket, on_dead=on_dead, send_timeout=send_timeout)
+
+        # slot → 최소 전송 간격(초)
+        self._intervals = {
+            slot: 1.0 / hz for slot, hz in rates.items() if hz and hz > 0
+        }
+        # slot → (enqueue 시각, 최신 프레임)
+        self._latest: Dict[Hashable, _QueueItem] = {}
+        # slot → 마지막 전송 시각
+        self._last_sent: Dict[Hashable, float] = {}
+
+        self.conflated = 0
+
+    def push(self, data: EncodedFrame, slot: Hashable | None = None) -> bool:
+        if self.closed:
+            return False
+
+        if slot in self._latest:
+            self.conflated += 1
+
+        self._latest[slot] = (time.monotonic(), data)
+        self._wakeup.set()
+        return True
+
+    def _next_due(self, now: float) -> Tuple[Hashable | None, float]:
+        """
+        지금 보낼 수 있는 slot (없으면 None) + 다음 전송 가능 시각까지 남은 시간
+        """
+        wait = None
+        for slot, (enqueued_at, _data) in self._latest.items():
+            interval = self._intervals.get(slot, 0.0)
+            due = self._last_sent.get(slot, 0.0) + interval
+            if due <= now:
+                return slot, 0.0
+            wait = due - now if wait is None else min(wait, due - now)
+        return None, wait
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                now = time.monotonic()
+                slot, wait = self._next_due(now)
+
+                if slot is None:
+                    # 보낼 것이 없거나 속도 제한 대기 중 → 새 메시지 또는 시간 경과까지 대기
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                enqueued_at, data = self._latest.pop(slot)
+                self._last_sent[slot] = now
+                await asyncio.wait_for(self._send(data), timeout=self._send_timeout)
+
+                lag_ms = (time.monotonic() - enqueued_at) * 1000.0
+                self.sent += 1
+                self.last_lag_ms = round(lag_ms, 1)
+                self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            self._latest.clear()
+            await self._fail(e)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "queued": len(self._latest),
+            "conflated": self.conflated,
+            "rates": {
+                str(slot): round(1.0 / interval, 2)
+                for slot, interval in self._intervals.items()
+            },
+        }
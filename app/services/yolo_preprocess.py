@@ -0,0 +1,182 @@
+# app/services/yolo_preprocess.py
+
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from PIL import Image
+
+"""
+YOLO 추론 전 전처리 (letterbox / resize + JPEG 재압축).
+- 전용 스레드 풀에서 모델 입력 크기로 축소
+- 결과 bbox 는 원본 프레임 좌표로 되돌린다
+- YOLO_INPUT_SIZE=0 이면 원본 그대로 전송
+"""
+
+YOLO_INPUT_SIZE = int(os.getenv("YOLO_INPUT_SIZE", "640"))
+YOLO_PREPROCESS_MODE = os.getenv("YOLO_PREPROCESS_MODE", "letterbox")
+YOLO_JPEG_QUALITY = int(os.getenv("YOLO_JPEG_QUALITY", "80"))
+YOLO_PREPROCESS_WORKERS = int(os.getenv("YOLO_PREPROCESS_WORKERS", "2"))
+
+_LETTERBOX_COLOR = (114, 114, 114)
+
+# 좌표 변환 정보: (scale_x, scale_y, pad_x, pad_y, 원본 width, 원본 height)
+# - 전처리 이미지 좌표 = 원본 좌표 * scale + pad
+Transform = Tuple[float, float, float, float, int, int]
+
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, YOLO_PREPROCESS_WORKERS),
+    thread_name_prefix="yolo-preprocess",
+)
+
+# 통계 (바이트 절감량 / 추가 지연시간)
+preprocess_stats = {
+    "frames": 0,
+    "skipped": 0,
+    "failed": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "total_ms": 0.0,
+    "last_ms": 0.0,
+    "max_ms": 0.0,
+}
+
+
+def _preprocess(frame: bytes, size: int) -> Tuple[bytes, Transform | None]:
+    """
+    원본 JPEG/PNG → 모델 입력 크기 JPEG (CPU 작업, 스레드 풀에서 실행)
+    - 이미 충분히 작거나 디코딩 실패 시 원본 그대로 (transform=None)
+    """
+    img = Image.open(io.BytesIO(frame))
+    width, height = img.size
+    if max(width, height) <= size:
+        return frame, None
+
+    letterbox = YOLO_PREPROCESS_MODE == "letterbox"
+    if letterbox:
+        scale = size / max(width, height)
+        new_w = max(1, round(width * scale))
+        new_h = max(1, round(height * scale))
+    else:
+        new_w = new_h = size
+
+    # JPEG 이면 목표 크기 이상으로만 축소 디코딩 (PNG 는 무시됨)
+    img.draft("RGB", (new_w, new_h))
+    img = img.convert("RGB").resize((new_w, new_h), Image.BILINEAR)
+
+    if letterbox:
+        pad_x = (size - new_w) // 2
+        pad_y = (size - new_h) // 2
+        canvas = Image.new("RGB", (size, size), _LETTERBOX_COLOR)
+        canvas.paste(img, (pad_x, pad_y))
+        img = canvas
+    else:
+        pad_x = pad_y = 0
+
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=YOLO_JPEG_QUALITY)
+    transform = (new_w / width, new_h / height, pad_x, pad_y, width, height)
+    return out.getvalue(), transform
+
+
+def _record(frame: bytes, payload: bytes, elapsed_ms: float) -> None:
+    stats = preprocess_stats
+    stats["frames"] += 1
+    stats["bytes_in"] += len(frame)
+    stats["bytes_out"] += len(payload)
+    stats["total_ms"] += elapsed_ms
+    stats["last_ms"] = round(elapsed_ms, 2)
+    stats["max_ms"] = max(stats["max_ms"], stats["last_ms"])
+
+
+async def preprocess_frames(
+    frames: List[bytes],
+) -> List[Tuple[bytes, Transform | None]]:
+    """
+    프레임 목록을 스레드 풀에서 병렬 전처리
+    - 반환: [(YOLO 로 보낼 bytes, 좌표 변환 정보 또는 None), ...]
+    """
+    size = YOLO_INPUT_SIZE
+    if size <= 0:
+        preprocess_stats["skipped"] += len(frames)
+        return [(frame, None) for frame in frames]
+
+    loop = asyncio.get_running_loop()
+
+    async def run_one(frame: bytes) -> Tuple[bytes, Transform | None]:
+        started = time.perf_counter()
+        try:
+            payload, transform = await loop.run_in_executor(
+                _executor, _preprocess, frame, size
+            )
+        except Exception as e:
+            print(f"[YOLO][PREPROCESS][WARN] failed: {e}")
+            preprocess_stats["failed"] += 1
+            return frame, None
+
+        _record(frame, payload, (time.perf_counter() - started) * 1000.0)
+        return payload, transform
+
+    return await asyncio.gather(*(run_one(frame) for frame in frames))
+
+
+def map_detections(detections: list, transform: Transform | None) -> list:
+    """
+    전처리 이미지 기준 bbox [x1, y1, x2, y2] → 원본 프레임 좌표
+    - detections 는 YoloClient 가 정규화한 리스트 (normalize_detections)
+    - bbox 가 없는 항목은 그대로 둔다
+    """
+    if transform is None or not detections:
+        return detections
+
+    scale_x, scale_y, pad_x, pad_y, width, height = transform
+    mapped = []
+    for det in detections:
+        bbox = det.get("bbox") if isinstance(det, dict) else None
+        if not bbox or len(bbox) != 4:
+            mapped.append(det)
+            continue
+
+        x1, y1, x2, y2 = bbox
+        mapped.append(
+            {
+                **det,
+                "bbox": [
+                    round(min(max((x1 - pad_x) / scale_x, 0.0), width), 1),
+                    round(min(max((y1 - pad_y) / scale_y, 0.0), height), 1),
+                    round(min(max((x2 - pad_x) / scale_x, 0.0), width), 1),
+                    round(min(max((y2 - pad_y) / scale_y, 0.0), height), 1),
+                ],
+            }
+        )
+    return mapped
+
+
+def get_preprocess_stats() -> dict:
+    stats = preprocess_stats
+    frames = stats["frames"]
+    bytes_in = stats["bytes_in"]
+    return {
+        "input_size": YOLO_INPUT_SIZE,
+        "mode": YOLO_PREPROCESS_MODE,
+        "quality": YOLO_JPEG_QUALITY,
+        "frames": frames,
+        "skipped": stats["skipped"],
+        "failed": stats["failed"],
+        "bytes_in": bytes_in,
+        "bytes_out": stats["bytes_out"],
+        "bytes_saved": bytes_in - stats["bytes_out"],
+        "saved_ratio": (
+            round(1.0 - stats["bytes_out"] / bytes_in, 3) if bytes_in else 0.0
+        ),
+        "avg_ms": round(stats["total_ms"] / frames, 2) if frames else 0.0,
+        "last_ms": stats["last_ms"],
+        "max_ms": stats["max_ms"],
+    }
+
+
+def shutdown_preprocess() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,285 @@
+# app/services/yolo_scheduler.py
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Set, Tuple
+
+"""
+YOLO 추론 스케줄러.
+- (source, robot_name) 별 "최신 프레임 1장" 슬롯
+- stride 스케줄링으로 다음 로봇 선택
+  (weight = priority × max(1, 시청 중인 viewer 수))
+- 대기 프레임 / viewer 가 없이 YOLO_SLOT_IDLE_TTL 초 지난 슬롯은 제거
+"""
+
+SlotKey = Tuple[str, str]            # (source, robot_name)
+SlotItem = Tuple[str, str, int, bytes]  # (source, robot_name, seq, frame)
+
+# 추론 속도 계산에 사용하는 최근 dispatch 기록 개수
+_RATE_WINDOW = 32
+
+# 프레임이 없던 로봇 슬롯 제거 기준(초) / 확인 주기(초)
+YOLO_SLOT_IDLE_TTL = float(os.getenv("YOLO_SLOT_IDLE_TTL", "300"))
+_SWEEP_INTERVAL = 10.0
+
+
+class _RobotSlot:
+    """
+    로봇 1대의 최신 프레임 슬롯 + 스케줄링 상태 + 통계
+    """
+
+    __slots__ = (
+        "pending",
+        "submitted_at",
+        "last_seen",
+        "pass_value",
+        "priority",
+        "viewers",
+        "frames_in",
+        "frames_dropped",
+        "dispatched",
+        "last_dispatch_at",
+        "last_staleness",
+        "dispatch_times",
+    )
+
+    def __init__(self, vtime: float, priority: float = 1.0):
+        self.pending: SlotItem | None = None
+        self.submitted_at = 0.0
+        self.last_seen = time.monotonic()
+        self.pass_value = vtime
+        self.priority = priority
+        self.viewers = 0
+
+        self.frames_in = 0
+        self.frames_dropped = 0
+        self.dispatched = 0
+        self.last_dispatch_at = 0.0
+        self.last_staleness = 0.0
+        self.dispatch_times: Deque[float] = deque(maxlen=_RATE_WINDOW)
+
+    @property
+    def weight(self) -> float:
+        return self.priority * max(1, self.viewers)
+
+
+class YoloScheduler:
+    """
+    (source, robot_name) 별 최신 프레임 슬롯을 공정하게 돌려가며 꺼내주는 스케줄러.
+
+    - submit() 은 await 하지 않는다 (프레임 수신 경로를 막지 않음)
+    - next()   는 처리할 프레임이 생길 때까지 대기
+    - 이벤트 루프 단일 스레드에서만 사용하므로 별도 락은 필요 없다
+    """
+
+    def __init__(self):
+        self._slots: Dict[SlotKey, _RobotSlot] = {}
+        # 수동 우선순위는 슬롯이 제거되어도 유지
+        self._priorities: Dict[SlotKey, float] = {}
+        self._vtime = 0.0
+        self._has_pending = asyncio.Event()
+        self._last_sweep = time.monotonic()
+        self.evicted_slots = 0
+
+    def _slot(self, source: str, robot_name: str) -> _RobotSlot:
+        key = (source, robot_name)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = _RobotSlot(self._vtime, self._priorities.get(key, 1.0))
+            self._slots[key] = slot
+        return slot
+
+    def _evict_idle(self, now: float) -> None:
+        """
+        대기 프레임 없음 + viewer 없음 + YOLO_SLOT_IDLE_TTL 동안 프레임 없음 → 슬롯 제거
+        - 오프라인 로봇 때문에 슬롯 dict / stride 탐색이 계속 커지지 않도록
+        """
+        if now - self._last_sweep < _SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+
+        for key, slot in list(self._slots.items()):
+            if (
+                slot.pending is None
+                and slot.viewers == 0
+                and now - slot.last_seen > YOLO_SLOT_IDLE_TTL
+            ):
+                del self._slots[key]
+                self.evicted_slots += 1
+
+    # =====================================================
+    # 프레임 제출 (enqueue_frame → 스케줄러)
+    # =====================================================
+    def submit(self, source: str, robot_name: str, seq: int, frame: bytes) -> None:
+        """
+        로봇별 슬롯에 최신 프레임을 넣는다.
+        - 아직 처리되지 않은 프레임이 있으면 버리고 최신 것으로 교체
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        slot = self._slot(source, robot_name)
+        slot.frames_in += 1
+        slot.last_seen = now
+
+        if slot.pending is not None:
+            slot.frames_dropped += 1
+        else:
+            # 쉬던 로봇이 과거 몫을 몰아서 가져가지 않도록 보정
+            slot.pass_value = max(slot.pass_value, self._vtime)
+
+        slot.pending = (source, robot_name, seq, frame)
+        slot.submitted_at = time.monotonic()
+        self._has_pending.set()
+
+    # =====================================================
+    # 다음 프레임 선택 (스케줄러 → YOLO 워커)
+    # =====================================================
+    def _pop(self, exclude: Set[SlotKey] | None = None) -> SlotItem | None:
+        """
+        처리 대기 중인 슬롯 중 pass 값이 가장 작은 로봇의 프레임을 꺼낸다.
+        - exclude 에 있는 로봇은 건너뛴다 (batch 안에서 로봇 중복 방지)
+        - 대기 중인 프레임이 없으면 None
+        """
+        self._evict_idle(time.monotonic())
+
+        best_key: SlotKey | None = None
+        best: _RobotSlot | None = None
+        for key, slot in self._slots.items():
+            if slot.pending is None or (exclude and key in exclude):
+                continue
+            if best is None or slot.pass_value < best.pass_value:
+                best_key, best = key, slot
+
+        if best is None:
+            return None
+
+        self._vtime = best.pass_value
+        best.pass_value += 1.0 / best.weight
+
+        item = best.pending
+        best.pending = None
+
+        now = time.monotonic()
+        best.dispatched += 1
+        best.last_dispatch_at = now
+        best.last_staleness = now - best.submitted_at
+        best.dispatch_times.append(now)
+
+        if exclude is not None:
+            exclude.add(best_key)
+        return item
+
+    async def next(self) -> SlotItem:
+        """
+        다음 차례 로봇의 프레임 1장 (없으면 생길 때까지 대기)
+        """
+        while True:
+            item = self._pop()
+            if item is not None:
+                return item
+            self._has_pending.clear()
+            await self._has_pending.wait()
+
+    async def next_batch(self, max_size: int, window: float) -> List[SlotItem]:
+        """
+        batch 추론용: 로봇별 최신 프레임을 최대 max_size 장까지 모은다.
+
+        - 첫 프레임은 생길 때까지 대기
+        - 이후 window 초 동안 다른 로봇의 프레임을 추가로 기다린다
+        - 한 batch 에 같은 로봇은 1장만 (항상 최신 프레임)
+        """
+        picked: Set[SlotKey] = set()
+        first = await self.next()
+        picked.add((first[0], first[1]))
+        batch = [first]
+
+        deadline = time.monotonic() + window
+        while len(batch) < max_size:
+            item = self._pop(picked)
+            if item is not None:
+                batch.append(item)
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            self._has_pending.clear()
+            try:
+                await asyncio.wait_for(self._has_pending.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    # =====================================================
+    # 우선순위 / viewer 수 반영
+    # =====================================================
+    def set_priority(self, source: str, robot_name: str, priority: float) -> None:
+        """
+        로봇별 수동 우선순위 (기본 1.0, 클수록 더 자주 추론)
+        """
+        priority = max(priority, 0.01)
+        self._priorities[(source, robot_name)] = priority
+        self._slot(source, robot_name).priority = priority
+
+    def set_viewer_count(self, source: str, robot_name: str, viewers: int) -> None:
+        """
+        camera_service 의 viewer 등록/해제 시 호출.
+        - 많은 대시보드가 보고 있는 로봇일수록 가중치가 커진다
+        """
+        self._slot(source, robot_name).viewers = max(viewers, 0)
+
+    def discard(self, source: str, robot_name: str) -> None:
+        """
+        아직 처리되지 않은 프레임을 버린다 (아무도 안 보게 된 로봇)
+        """
+        slot = self._slots.get((source, robot_name))
+        if slot is not None and slot.pending is not None:
+            slot.pending = None
+            slot.frames_dropped += 1
+
+    # =====================================================
+    # 통계
+    # =====================================================
+    def stats(self) -> dict:
+        """
+        로봇별 추론 속도 / staleness / 드롭 수 반환
+
+        - infer_rate         : 최근 dispatch 기준 초당 추론 횟수
+        - last_staleness_ms  : 마지막으로 추론된 프레임이 슬롯에서 기다린 시간
+        - since_last_infer_s : 마지막 추론 이후 경과 시간
+        """
+        now = time.monotonic()
+        robots = {}
+        for (source, robot_name), slot in self._slots.items():
+            times = slot.dispatch_times
+            if len(times) >= 2 and times[-1] > times[0]:
+                rate = (len(times) - 1) / (times[-1] - times[0])
+            else:
+                rate = 0.0
+
+            robots[f"{source}/{robot_name}"] = {
+                "priority": slot.priority,
+                "viewers": slot.viewers,
+                "weight": slot.weight,
+                "frames_in": slot.frames_in,
+                "frames_dropped": slot.frames_dropped,
+                "dispatched": slot.dispatched,
+                "infer_rate": round(rate, 2),
+                "last_staleness_ms": round(slot.last_staleness * 1000.0, 1),
+                "since_last_infer_s": (
+                    round(now - slot.last_dispatch_at, 2)
+                    if slot.last_dispatch_at
+                    else None
+                ),
+                "pending": slot.pending is not None,
+            }
+        return {"robots": robots, "evicted_slots": self.evicted_slots}
+
+
+# 전역 스케줄러 (camera_service / yolo_worker 공용)
+yolo_scheduler = YoloScheduler()
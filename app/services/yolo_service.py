@@ -1,57 +1,397 @@
 # app/services/yolo_service.py
 
-import httpx
+import asyncio
+import os
+import time
 from typing import List, Dict, Any
 
-# ✅ YOLO 추론 서버 주소
-YOLO_SERVER_URL = "http://100.117.55.65:8001/infer"
+import httpx
+
+"""
+YOLO 추론 클라이언트.
+- 공용 AsyncClient 커넥션 풀 + 여러 backend 부하 분산
+- backend 별 circuit breaker + 백그라운드 health probe
+- batch 모드 (batch 엔드포인트가 없으면 단건 요청으로 fallback)
+
+로컬 테스트:
+  uvicorn yolo_stub_server:app --port 8001
+  YOLO_SERVER_URLS=http://127.0.0.1:8001/infer
+"""
+
+# ✅ YOLO 추론 서버 주소 (콤마로 여러 개 지정 가능)
+DEFAULT_YOLO_SERVER_URL = "http://100.117.55.65:8001/infer"
+YOLO_SERVER_URLS = [
+    url.strip()
+    for url in os.getenv("YOLO_SERVER_URLS", DEFAULT_YOLO_SERVER_URL).split(",")
+    if url.strip()
+]
+
+# health probe 경로 (infer URL 의 경로를 이 값으로 바꿔서 GET)
+YOLO_HEALTH_PATH = os.getenv("YOLO_HEALTH_PATH", "/health")
+YOLO_HEALTH_INTERVAL = float(os.getenv("YOLO_HEALTH_INTERVAL", "5.0"))
+
+# batch 추론 경로 (여러 이미지를 "files" 필드로 한 번에 전송)
+YOLO_BATCH_PATH = os.getenv("YOLO_BATCH_PATH", "/infer_batch")
+
+# circuit breaker 설정
+YOLO_FAIL_THRESHOLD = int(os.getenv("YOLO_FAIL_THRESHOLD", "3"))
+YOLO_BREAKER_COOLDOWN = float(os.getenv("YOLO_BREAKER_COOLDOWN", "5.0"))
+
+# 커넥션 풀 크기 (backend 전체 합계)
+YOLO_MAX_CONNECTIONS = int(os.getenv("YOLO_MAX_CONNECTIONS", "16"))
 
+# breaker 상태값
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
 
-async def run_yolo_infer(image_bytes: bytes) -> List[Dict[str, Any]]:
+
+def normalize_detections(result: Any) -> List[Dict[str, Any]] | None:
     """
-    YOLO 서버에 이미지를 비동기로 보내어 추론 결과를 받는다.
+    YOLO 응답(이미지 1장분) → detection 리스트
+    - [...]                 : 그대로
+    - {"detections": [...]} : 안의 리스트
+    - 그 외 형태는 None (잘못된 응답)
+    """
+    if isinstance(result, list):
+        return result
+    if isinstance(result, dict) and isinstance(result.get("detections"), list):
+        return result["detections"]
+    return None
 
-    - httpx.AsyncClient 사용
-    - 이벤트 루프를 절대 블로킹하지 않음
+
+class YoloUnavailable(Exception):
+    """
+    사용할 수 있는 backend 가 없어서 프레임을 스킵할 때 발생.
+    - timeout 을 기다리지 않고 바로 드롭하기 위함
+    """
+
+
+class _BatchUnsupported(Exception):
+    """
+    backend 에 batch 엔드포인트가 없음 (404/405) → 단건 모드로 fallback
+    """
+
+
+class _Backend:
+    """
+    추론 서버 1대의 상태 (outstanding 요청 수 + circuit breaker + 통계)
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.health_url = str(httpx.URL(url).copy_with(path=YOLO_HEALTH_PATH))
+        self.batch_url = str(httpx.URL(url).copy_with(path=YOLO_BATCH_PATH))
+        self.batch_supported = True
+
+        self.outstanding = 0
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+        self.requests = 0
+        self.failures = 0
+        self.last_latency_ms = 0.0
+        self.last_error: str | None = None
+
+    def available(self, now: float) -> bool:
+        """
+        이번 요청을 보낼 수 있는지 판단 (OPEN → HALF_OPEN 전환 포함)
+        """
+        if self.state == BREAKER_OPEN:
+            if now - self.opened_at < YOLO_BREAKER_COOLDOWN:
+                return False
+            self.state = BREAKER_HALF_OPEN
+            self.trial_in_flight = False
+
+        if self.state == BREAKER_HALF_OPEN:
+            # HALF_OPEN 에서는 시험 요청 1개만 허용
+            return not self.trial_in_flight
+
+        return True
+
+    def record_success(self, latency_ms: float | None = None) -> None:
+        if self.state != BREAKER_CLOSED:
+            print(f"[YOLO][BREAKER] {self.url} closed")
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        if latency_ms is not None:
+            self.last_latency_ms = round(latency_ms, 1)
+
+    def record_failure(self, error: str, trip: bool = False) -> None:
+        """
+        실패 기록
+        - trip=True 이면 연속 실패 수와 상관없이 바로 OPEN (health probe 실패)
+        """
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.trial_in_flight = False
+
+        if (
+            trip
+            or self.state == BREAKER_HALF_OPEN
+            or self.consecutive_failures >= YOLO_FAIL_THRESHOLD
+        ):
+            if self.state != BREAKER_OPEN:
+                print(f"[YOLO][BREAKER] {self.url} open ({error})")
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_latency_ms": self.last_latency_ms,
+            "last_error": self.last_error,
+            "batch_supported": self.batch_supported,
+        }
+
+
+class YoloClient:
     """
+    장기 유지되는 YOLO 추론 클라이언트 (커넥션 풀 + 부하 분산 + breaker)
+    """
+
+    def __init__(self, urls: List[str]):
+        self.backends = [_Backend(url) for url in urls]
+        self.skipped = 0
+        self.batches = 0
+        self.batched_frames = 0
+        self._rr = 0
+        self._client: httpx.AsyncClient | None = None
 
-    # YOLO 서버가 느리거나 끊겨도
-    # 메인 서버 전체가 멈추지 않도록 timeout 명시
-    timeout = httpx.Timeout(
-        connect=1.0,
-        read=2.0,
-        write=1.0,
-        pool=1.0,
-    )
-
-    try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            print("[YOLO][REQ] sending image", len(image_bytes))
-
-            response = await client.post(
-                YOLO_SERVER_URL,
-                files={
-                    # FastAPI UploadFile 호환 형식
-                    "file": ("frame.jpg", image_bytes, "image/jpeg")
-                },
+    def _get_client(self) -> httpx.AsyncClient:
+        # 이벤트 루프 안에서 처음 사용할 때 생성
+        if self._client is None or self._client.is_closed:
+            # YOLO 서버가 느리거나 끊겨도
+            # 메인 서버 전체가 멈추지 않도록 timeout 명시
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(connect=1.0, read=2.0, write=1.0, pool=1.0),
+                limits=httpx.Limits(
+                    max_connections=YOLO_MAX_CONNECTIONS,
+                    max_keepalive_connections=YOLO_MAX_CONNECTIONS,
+                    keepalive_expiry=30.0,
+                ),
             )
+        return self._client
+
+    def _pick_backend(self, batch: bool = False) -> _Backend | None:
+        """
+        사용 가능한 backend 중 outstanding 요청이 가장 적은 것 선택
+        - 동률이면 round-robin 순서로 돌려가며 선택
+        - batch=True 이면 batch 엔드포인트를 지원하는 backend 만 대상
+        """
+        now = time.monotonic()
+        count = len(self.backends)
+        self._rr = (self._rr + 1) % count
+
+        best: _Backend | None = None
+        for i in range(count):
+            backend = self.backends[(self._rr + i) % count]
+            if batch and not backend.batch_supported:
+                continue
+            if not backend.available(now):
+                continue
+            if best is None or backend.outstanding < best.outstanding:
+                best = backend
+        return best
+
+    async def _post(self, backend: _Backend, url: str, files) -> Any:
+        """
+        backend 1대에 multipart 요청을 보내고 JSON 결과 반환
+        - 실패하면 breaker 에 기록하고 None 반환
+        """
+        if backend.state == BREAKER_HALF_OPEN:
+            backend.trial_in_flight = True
 
-            print("[YOLO][RESP] status", response.status_code)
+        backend.outstanding += 1
+        backend.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self._get_client().post(url, files=files)
+
+            # batch 엔드포인트가 없는 backend → 이후 단건 모드로만 사용
+            if url == backend.batch_url and response.status_code in (404, 405):
+                backend.batch_supported = False
+                backend.record_success()
+                raise _BatchUnsupported(backend.url)
 
             # HTTP 에러 처리
             response.raise_for_status()
 
             # YOLO 서버는 JSON 반환한다고 가정
-            return response.json()
+            result = response.json()
+            backend.record_success((time.perf_counter() - started) * 1000.0)
+            return result
+
+        except _BatchUnsupported:
+            raise
+
+        except httpx.TimeoutException:
+            print(f"[YOLO][TIMEOUT] {url}")
+            backend.record_failure("timeout")
+            return None
+
+        except httpx.HTTPError as e:
+            print("[YOLO][HTTP ERROR]", url, str(e))
+            backend.record_failure(str(e))
+            return None
+
+        except Exception as e:
+            print("[YOLO][ERROR]", url, str(e))
+            backend.record_failure(str(e))
+            return None
+
+        finally:
+            backend.outstanding -= 1
+
+    async def infer(self, image_bytes: bytes) -> List[Dict[str, Any]] | None:
+        """
+        단건 추론 (기본 경로 / batch 실패 시 fallback)
+        - timeout / HTTP 에러는 None (빈 결과 [] 와 구분해서 프레임 드롭으로 처리)
+        - 응답이 {"detections": [...]} 형태여도 리스트로 정규화
+        """
+        backend = self._pick_backend()
+        if backend is None:
+            self.skipped += 1
+            raise YoloUnavailable("no healthy YOLO backend")
+
+        result = await self._post(
+            backend,
+            backend.url,
+            files={
+                # FastAPI UploadFile 호환 형식
+                "file": ("frame.jpg", image_bytes, "image/jpeg")
+            },
+        )
+        return normalize_detections(result)
+
+    async def infer_batch(
+        self, images: List[bytes]
+    ) -> List[List[Dict[str, Any]] | None]:
+        """
+        여러 장을 multipart 요청 1번으로 추론 (이미지 순서대로 결과 반환)
+
+        - batch 를 지원하는 backend 가 없으면 단건 추론을 병렬로 수행
+        - 응답 개수가 맞지 않거나 실패하면 장마다 None
+        """
+        if len(images) == 1:
+            return [await self.infer(images[0])]
+
+        if self._pick_backend() is None:
+            self.skipped += len(images)
+            raise YoloUnavailable("no healthy YOLO backend")
+
+        backend = self._pick_backend(batch=True)
+        if backend is None:
+            return await self._infer_each(images)
+
+        files = [
+            ("files", (f"frame{i}.jpg", image, "image/jpeg"))
+            for i, image in enumerate(images)
+        ]
+        try:
+            result = await self._post(backend, backend.batch_url, files)
+        except _BatchUnsupported:
+            print(f"[YOLO][BATCH] {backend.url} has no batch endpoint, fallback")
+            return await self._infer_each(images)
 
-    except httpx.TimeoutException:
-        print("[YOLO][TIMEOUT] YOLO server timeout")
-        return []
+        if not isinstance(result, list) or len(result) != len(images):
+            if result is not None:
+                print(f"[YOLO][BATCH] unexpected response size from {backend.url}")
+            return [None for _ in images]
 
-    except httpx.HTTPError as e:
-        print("[YOLO][HTTP ERROR]", str(e))
-        return []
+        self.batches += 1
+        self.batched_frames += len(images)
+        # 장마다 list / {"detections": [...]} 어느 형태든 리스트로 (잘못된 항목은 None)
+        return [normalize_detections(r) for r in result]
 
-    except Exception as e:
-        print("[YOLO][ERROR]", str(e))
-        return []
+    async def _infer_each(
+        self, images: List[bytes]
+    ) -> List[List[Dict[str, Any]] | None]:
+        results = await asyncio.gather(
+            *[self.infer(image) for image in images],
+            return_exceptions=True,
+        )
+        return [
+            None if isinstance(r, BaseException) else normalize_detections(r)
+            for r in results
+        ]
+
+    # =====================================================
+    # health probe
+    # =====================================================
+    async def _probe(self, backend: _Backend) -> None:
+        """
+        backend 1대 상태 확인
+        - 응답이 오면(5xx 제외) 살아 있는 것으로 판단 (health 경로가 없어 404여도 OK)
+        - 연결 실패 / timeout / 5xx 는 실패로 기록
+        """
+        try:
+            response = await self._get_client().get(backend.health_url)
+            if response.status_code >= 500:
+                backend.record_failure(f"health status {response.status_code}", trip=True)
+            elif backend.state != BREAKER_CLOSED:
+                backend.record_success()
+        except Exception as e:
+            backend.record_failure(f"health {type(e).__name__}", trip=True)
+
+    async def health_loop(self) -> None:
+        """
+        백그라운드 health probe (startup 에서 create_task 로 실행)
+        """
+        print(f"[YOLO][HEALTH] started backends={[b.url for b in self.backends]}")
+        while True:
+            await asyncio.gather(
+                *[self._probe(b) for b in self.backends],
+                return_exceptions=True,
+            )
+            await asyncio.sleep(YOLO_HEALTH_INTERVAL)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "batched_frames": self.batched_frames,
+            "backends": [b.stats() for b in self.backends],
+        }
+
+
+# 전역 YOLO 클라이언트 (yolo_worker / main startup 공용)
+yolo_client = YoloClient(YOLO_SERVER_URLS)
+
+
+async def run_yolo_infer(image_bytes: bytes) -> List[Dict[str, Any]] | None:
+    """
+    YOLO 서버에 이미지를 비동기로 보내어 추론 결과를 받는다.
+
+    - 공용 커넥션 풀 사용 (프레임마다 연결을 새로 만들지 않음)
+    - 이벤트 루프를 절대 블로킹하지 않음
+    - 모든 backend 의 breaker 가 열려 있으면 YoloUnavailable 발생
+      (호출 측에서는 프레임 드롭으로 처리)
+    - timeout / HTTP 에러는 None (역시 프레임 드롭)
+    """
+    return await yolo_client.infer(image_bytes)
+
+
+async def run_yolo_infer_batch(
+    images: List[bytes],
+) -> List[List[Dict[str, Any]] | None]:
+    """
+    여러 로봇의 프레임을 한 번의 multipart 요청으로 추론한다.
+    - 결과는 images 순서와 같은 순서의 리스트 (실패한 장은 None)
+    - batch 미지원 backend 만 있으면 단건 경로로 fallback
+    """
+    return await yolo_client.infer_batch(images)
@@ -1,25 +1,47 @@
 # app/services/yolo_worker.py
 
 import asyncio
-
-from app.services.camera_service import (
-    yolo_queue,
-    broadcast_to_viewers,
+import os
+
+from app.services.camera_service import broadcast_detections
+from app.services.frame_gate import compute_signature, check_frame, update_frame
+from app.services.yolo_preprocess import map_detections, preprocess_frames
+from app.services.yolo_scheduler import yolo_scheduler
+from app.services.yolo_service import (
+    run_yolo_infer,
+    run_yolo_infer_batch,
+    YoloUnavailable,
 )
-from app.services.yolo_service import run_yolo_infer
+
+# ============================================================
+# batch 추론 설정
+# - size   : 한 번에 보낼 최대 프레임 수 (1 이면 기존 단건 모드)
+# - window : 첫 프레임 이후 다른 로봇 프레임을 기다리는 시간(초)
+# - /camera/api/yolo/batch 에서 실행 중에도 변경 가능
+# ============================================================
+yolo_batch_config = {
+    "size": int(os.getenv("YOLO_BATCH_SIZE", "1")),
+    "window": float(os.getenv("YOLO_BATCH_WINDOW", "0.02")),
+}
 
 
 async def yolo_worker():
     """
-    YOLO 전용 워커 (최신 프레임만 처리)
+    YOLO 전용 워커 (로봇별 최신 프레임 + 공정 스케줄링)
 
     =========================================================
     역할
     ---------------------------------------------------------
-    1) 카메라 프레임 큐에서 프레임 수신
-    2) 큐에 쌓인 오래된 프레임은 모두 버림
-    3) 가장 최신 프레임 1장만 YOLO 추론
-    4) 결과를 viewer에게 브로드캐스트
+    1) 스케줄러에서 다음 차례 로봇의 최신 프레임을 꺼냄
+       - 로봇별 슬롯에는 항상 가장 최신 프레임 1장만 남아 있음
+       - 로봇 간에는 가중치 기반 round-robin 으로 순서 결정
+       - batch 모드면 여러 로봇의 최신 프레임을 window 동안 모음
+    2) 장면 변화 감지 (frame_gate)
+       - 마지막 추론 프레임과 거의 같으면 캐시된 결과 재사용
+    3) 나머지 프레임(들) 전처리(모델 입력 크기로 축소 + 재압축) 후 YOLO 추론
+       - bbox 는 원본 프레임 좌표로 되돌린다
+    4) 결과(seq 포함)를 로봇별로 나눠서 viewer에게 브로드캐스트
+       - 영상은 enqueue_frame 에서 이미 중계되었으므로 결과만 보낸다
 
     =========================================================
     설계 철학
@@ -27,6 +49,7 @@ async def yolo_worker():
     - YOLO는 실시간성이 중요 → backlog 금지
     - timeout은 오류가 아니라 "프레임 드롭"
     - 항상 "지금"을 본다
+    - 프레임이 많은 로봇이 추론을 독점하지 않는다
 
     =========================================================
     절대 하지 않는 것
@@ -36,63 +59,97 @@ async def yolo_worker():
     - 워커 종료
     """
 
-    print("[YOLO_WORKER] started (latest-frame-only mode)")
+    print(
+        "[YOLO_WORKER] started (per-robot fair scheduling mode, "
+        f"batch_size={yolo_batch_config['size']})"
+    )
 
     while True:
         # -----------------------------------------------------
-        # 1) 최소 1개의 프레임을 기다린다
+        # 1) 다음 차례 로봇의 최신 프레임(들)을 기다린다
         # -----------------------------------------------------
-        item = await yolo_queue.get()
-
-        # 최신 프레임으로 교체될 변수
-        latest_item = item
+        batch_size = max(1, yolo_batch_config["size"])
+        if batch_size == 1:
+            batch = [await yolo_scheduler.next()]
+        else:
+            batch = await yolo_scheduler.next_batch(
+                batch_size, yolo_batch_config["window"]
+            )
 
         try:
             # -------------------------------------------------
-            # 2) 큐에 남아 있는 모든 프레임을 비운다
-            #    (가장 마지막 것만 유지)
+            # 2) 장면 변화 감지 (signature 계산은 스레드에서)
             # -------------------------------------------------
-            while True:
-                try:
-                    old_item = yolo_queue.get_nowait()
-                    latest_item = old_item
+            signatures = await asyncio.to_thread(
+                lambda: [compute_signature(item[3]) for item in batch]
+            )
 
-                    # 버리는 프레임도 task_done 호출
-                    yolo_queue.task_done()
-                except asyncio.QueueEmpty:
-                    break
+            results: list = [None] * len(batch)
+            infer_indexes = []
+            for i, ((source, robot_name, _seq, _frame), signature) in enumerate(
+                zip(batch, signatures)
+            ):
+                cached = check_frame(source, robot_name, signature)
+                if cached is None:
+                    infer_indexes.append(i)
+                else:
+                    results[i] = cached
 
             # -------------------------------------------------
-            # 3) 최신 프레임만 처리
+            # 3) 전처리(스레드 풀) → YOLO 추론 (1장이면 단건 경로)
             # -------------------------------------------------
-            source, robot_name, frame = latest_item
-
-            try:
-                detections = await run_yolo_infer(frame)
-            except Exception as e:
-                # YOLO timeout / 네트워크 에러는 정상적인 상황
-                print(f"[YOLO][DROP] {source}/{robot_name} reason={e}")
-                continue
+            if infer_indexes:
+                prepared = await preprocess_frames([batch[i][3] for i in infer_indexes])
+                frames = [payload for payload, _transform in prepared]
+                try:
+                    if len(frames) == 1:
+                        inferred = [await run_yolo_infer(frames[0])]
+                    else:
+                        inferred = await run_yolo_infer_batch(frames)
+                except YoloUnavailable:
+                    # 모든 backend 의 breaker 가 열림 → timeout 기다리지 않고 즉시 드롭
+                    inferred = None
+                except Exception as e:
+                    # YOLO timeout / 네트워크 에러는 정상적인 상황
+                    print(f"[YOLO][DROP] batch={len(frames)} reason={e}")
+                    inferred = None
+
+                if inferred is not None:
+                    for i, (_payload, transform), detections in zip(
+                        infer_indexes, prepared, inferred
+                    ):
+                        source, robot_name, seq, _frame = batch[i]
+
+                        # timeout / HTTP 에러 → 캐시에도 넣지 않고 드롭
+                        # (빈 결과로 오버레이를 지우지 않음)
+                        if detections is None:
+                            print(f"[YOLO][DROP] {source}/{robot_name} seq={seq}")
+                            continue
+
+                        detections = map_detections(detections, transform)
+                        update_frame(source, robot_name, signatures[i], detections)
+                        results[i] = detections
 
             # -------------------------------------------------
-            # 4) viewer에게 결과 브로드캐스트
+            # 4) 로봇별로 결과를 나눠서 viewer에게 브로드캐스트
+            #    (추론이 드롭된 프레임은 보내지 않음)
             # -------------------------------------------------
-            await broadcast_to_viewers(
-                source=source,
-                robot_name=robot_name,
-                frame=frame,
-                detections=detections,
-            )
-
-            print(
-                f"[YOLO_WORKER] {source}/{robot_name} "
-                f"objects={len(detections)}"
-            )
+            for (source, robot_name, seq, _frame), detections in zip(batch, results):
+                if detections is None:
+                    continue
+
+                await broadcast_detections(
+                    source=source,
+                    robot_name=robot_name,
+                    seq=seq,
+                    detections=detections,
+                )
+
+                print(
+                    f"[YOLO_WORKER] {source}/{robot_name} seq={seq} "
+                    f"objects={len(detections)} batch={len(batch)}"
+                )
 
         except Exception as e:
             # 워커는 절대 죽지 않는다
             print("[YOLO_WORKER][ERROR]", e)
-
-        finally:
-            # 최초 get() 에 대한 task_done
-            yolo_queue.task_done()
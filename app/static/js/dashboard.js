@@ -2,7 +2,7 @@
 // app/static/js/dashboard.js
 //
 // 역할:
-// 1. 선택된 로봇(AppState) 기준으로 WebSocket 연결
+// 1. 선택된 로봇(AppState) 기준으로 viewer WebSocket 채널 구독
 // 2. 상태 메시지(type별) 처리
 // 3. Dashboard UI 업데이트
 // 4. 로봇 선택 탭 처리
@@ -27,61 +27,48 @@ function setCurrentRobot(robot) {
 
 
 /* =========================================================
-   WebSocket Handles
+   Viewer WebSocket (다중 채널, 소켓 1개)
+   - 로봇을 바꾸면 재연결 없이 구독만 교체한다
 ========================================================= */
-let camWs = null;
-let stateWs = null;
+let viewerSocket = null;
+let robotChannels = [];
 
 
-/* =========================================================
-   Camera WebSocket (영상 전용)
-========================================================= */
-function openCameraWS() {
-    const robot = getCurrentRobot();
-    if (!robot) return;
+// 화면에 표시되는 크기에 맞는 화질 단계 선택 (full / 640 / 320)
+function pickCameraTier() {
+    const img = document.getElementById("cam");
+    const width = (img?.clientWidth || 0) * (window.devicePixelRatio || 1);
 
-    if (camWs) camWs.close();
-
-    const url = `ws://${location.host}/camera/view/robot/${encodeURIComponent(robot)}`;
-    console.log("[CAMERA][WS]", url);
-
-    camWs = new WebSocket(url);
-    camWs.binaryType = "arraybuffer";
-
-    camWs.onmessage = e => {
-        if (!(e.data instanceof ArrayBuffer)) return;
+    if (width && width <= 320) return "320";
+    if (width && width <= 640) return "640";
+    return "full";
+}
 
-        const img = document.getElementById("cam");
-        if (!img) return;
+function handleCameraFrame(buffer) {
+    const img = document.getElementById("cam");
+    if (!img) return;
 
-        const blob = new Blob([e.data], { type: "image/jpeg" });
-        img.src = URL.createObjectURL(blob);
-    };
+    const blob = new Blob([buffer], { type: "image/jpeg" });
+    const prev = img.src;
+    img.src = URL.createObjectURL(blob);
+    if (prev.startsWith("blob:")) URL.revokeObjectURL(prev);
 }
 
-
-/* =========================================================
-   State WebSocket (배터리 / odom / scan)
-========================================================= */
-function openStateWS() {
+function watchRobot() {
     const robot = getCurrentRobot();
     if (!robot) return;
 
-    if (stateWs) stateWs.close();
-
-    const url = `ws://${location.host}/state/view/robot/${encodeURIComponent(robot)}`;
-    console.log("[STATE][WS]", url);
-
-    stateWs = new WebSocket(url);
-
-    stateWs.onmessage = e => {
-        try {
-            const msg = JSON.parse(e.data);
-            handleState(msg);
-        } catch (err) {
-            console.error("[STATE][PARSE ERROR]", err, e.data);
-        }
-    };
+    if (!viewerSocket) viewerSocket = new ViewerSocket();
+
+    // 이전 로봇 채널 해제 → 새 로봇 채널 구독
+    robotChannels.forEach(label => viewerSocket.unsubscribe(label));
+    robotChannels = [
+        // 영상 (화질 단계는 패널 크기 기준)
+        viewerSocket.subscribe("camera", "robot", robot, handleCameraFrame, pickCameraTier()),
+        // 배터리 / odom / scan
+        viewerSocket.subscribe("state", "robot", robot, handleState),
+    ];
+    console.log("[VIEWER][WS] watching", robot);
 }
 
 
@@ -288,8 +275,7 @@ function setupRobotTabs() {
                 body: JSON.stringify({ robot })
             });
 
-            openCameraWS();
-            openStateWS();
+            watchRobot();
         });
     });
 }
@@ -300,8 +286,7 @@ function setupRobotTabs() {
 ========================================================= */
 window.addEventListener("DOMContentLoaded", () => {
     if (getCurrentRobot()) {
-        openCameraWS();
-        openStateWS();
+        watchRobot();
     }
     setupControlToggle();
     setupRobotTabs();
@@ -1,6 +1,9 @@
 // app/static/js/robot_path.js
 const robotName = window.ROBOT_NAME;
 
+// 서버에서 경로를 단순화해서 받을 최대 포인트 수 (캔버스 해상도면 충분)
+const PATH_MAX_POINTS = 2000;
+
 // Chart.js 그래프 초기화
 let ctx = document.getElementById("pathCanvas").getContext("2d");
 
@@ -42,10 +45,10 @@ function loadPath() {
     const startFix = start + ":00";
     const endFix   = end + ":00";
 
-    fetch(`/path/api/robot/${robotName}/path?start=${startFix}&end=${endFix}`)
+    fetch(`/path/api/robot/${robotName}/path?start=${startFix}&end=${endFix}&max_points=${PATH_MAX_POINTS}`)
         .then(r => r.json())
         .then(data => {
-            console.log("로드된 경로:", data.points);
+            console.log(`로드된 경로: ${data.count} / ${data.raw_count} points`);
 
             const points = data.points.map(p => ({ x: p.x, y: -p.y }));
 
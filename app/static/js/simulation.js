@@ -1,7 +1,8 @@
 // app/static/js/simulation.js
 let currentRobot = window.INITIAL_ROBOT_NAME;
-let camWs = null;
-let stateWs = null;
+let viewerSocket = null;
+let robotChannels = [];
+let lastYoloSeq = 0;   // 마지막으로 그린 YOLO 결과의 프레임 번호
 
 window.addEventListener("DOMContentLoaded", () => {
     if (!currentRobot) {
@@ -13,8 +14,7 @@ window.addEventListener("DOMContentLoaded", () => {
     }
 
     if (currentRobot) {
-        openCameraWS();
-        openStateWS();
+        watchRobot();
     }
 });
 
@@ -52,56 +52,43 @@ function drawDetections(detections) {
 }
 
 /* =========================
-   Camera WebSocket
+   Viewer WebSocket (다중 채널, 소켓 1개)
+   - 로봇을 바꾸면 재연결 없이 구독만 교체한다
 ========================= */
-function openCameraWS() {
-    if (camWs) camWs.close();
+function handleCameraFrame(buffer) {
+    const img = document.getElementById("cam");
+    const blob = new Blob([buffer], { type: "image/jpeg" });
+    const prev = img.src;
+    img.src = URL.createObjectURL(blob);
+    if (prev.startsWith("blob:")) URL.revokeObjectURL(prev);
+}
 
-    const url = `ws://${location.host}/camera/view/sim/${currentRobot}`;
-    console.log("[CAMERA][WS]", url);
+function handleDetections(msg) {
+    if (msg.type !== "yolo") return;
 
-    camWs = new WebSocket(url);
-    camWs.binaryType = "arraybuffer";
+    // 영상과 별도로 도착하므로, 이미 그린 것보다 오래된 결과는 무시
+    if (typeof msg.seq === "number") {
+        if (msg.seq < lastYoloSeq) return;
+        lastYoloSeq = msg.seq;
+    }
+    const dets = Array.isArray(msg.detections)
+        ? msg.detections
+        : msg.detections?.detections;
+    drawDetections(dets);
+}
 
-    camWs.onmessage = e => {
-        if (e.data instanceof ArrayBuffer) {
-            const blob = new Blob([e.data], { type: "image/jpeg" });
-            document.getElementById("cam").src =
-                URL.createObjectURL(blob);
-            return;
-        }
+function watchRobot() {
+    if (!viewerSocket) viewerSocket = new ViewerSocket();
 
-        try {
-            const msg = JSON.parse(e.data);
-            if (msg.type === "yolo") {
-                const dets = Array.isArray(msg.detections)
-                    ? msg.detections
-                    : msg.detections?.detections;
-                drawDetections(dets);
-            }
-        } catch (_) {}
-    };
-}
+    robotChannels.forEach(label => viewerSocket.unsubscribe(label));
+    lastYoloSeq = 0;
 
-/* =========================
-   State WebSocket
-========================= */
-function openStateWS() {
-    if (stateWs) stateWs.close();
-
-    const url = `ws://${location.host}/state/view/sim/${currentRobot}`;
-    console.log("[STATE][WS]", url);
-
-    stateWs = new WebSocket(url);
-    stateWs.onmessage = e => {
-        try {
-            const msg = JSON.parse(e.data);
-            console.log("stateWs msg : ",msg);
-            handleState(msg);
-        } catch (err) {
-            console.error("[STATE][PARSE ERROR]", err, e.data);
-        }
-    };
+    robotChannels = [
+        viewerSocket.subscribe("camera", "sim", currentRobot, handleCameraFrame),
+        viewerSocket.subscribe("detections", "sim", currentRobot, handleDetections),
+        viewerSocket.subscribe("state", "sim", currentRobot, handleState),
+    ];
+    console.log("[VIEWER][WS] watching", currentRobot);
 }
 
 /* =========================
@@ -249,8 +236,7 @@ document.querySelectorAll(".robot-tab").forEach(tab => {
         currentRobot = tab.dataset.robot;
         document.getElementById("currentRobotName").textContent = currentRobot;
 
-        // ✅ WebSocket 재연결
-        openCameraWS();
-        openStateWS();
+        // ✅ 채널 구독 교체 (재연결 없음)
+        watchRobot();
     });
 });
\ No newline at end of file
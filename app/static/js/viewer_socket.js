@@ -0,0 +1,145 @@
+// =========================================================
+// app/static/js/viewer_socket.js
+//
+// 다중 채널 viewer WebSocket (/viewer/ws) 클라이언트
+//
+// - 소켓 1개로 카메라 / YOLO 결과 / 상태 채널을 구독·해제
+// - 로봇을 바꿀 때 재연결 없이 subscribe / unsubscribe 메시지만 보낸다
+// - 연결이 끊기면 자동 재연결 후 구독 목록을 다시 등록
+//
+// 서버 메시지
+// - text  : {"channel": "state:robot:tb3_1", ...}
+// - binary: [1 byte 채널 이름 길이][채널 이름][JPEG 또는 binary 상태 frame]
+//
+// binary 상태 frame (state 채널 format: "binary")
+// - decodeStateFrame() 으로 {type, robot, timestamp, seq, data} 복원
+// - 구조는 app/services/state_codec.py 참고
+// =========================================================
+
+const STATE_TYPES = { 1: "odom", 2: "cmd_vel", 3: "battery", 4: "scan" };
+
+function decodeStateFrame(buffer) {
+    const view = new DataView(buffer);
+    const type = STATE_TYPES[view.getUint8(1)];
+    const timestamp = view.getFloat64(2, true);
+    const seq = view.getUint32(10, true);
+    const nameLen = view.getUint8(14);
+    const robot = new TextDecoder().decode(new Uint8Array(buffer, 15, nameLen));
+
+    let o = 15 + nameLen;
+    const f32 = () => { const v = view.getFloat32(o, true); o += 4; return v; };
+    let data = null;
+
+    if (type === "odom") {
+        const x = f32(), y = f32(), yaw = f32(), lin = f32(), ang = f32();
+        data = {
+            position: { x, y },
+            yaw,
+            twist: { linear: { x: lin }, angular: { z: ang } },
+        };
+    } else if (type === "cmd_vel") {
+        data = { linear: { x: f32() }, angular: { z: f32() } };
+    } else if (type === "battery") {
+        data = { percentage: f32(), voltage: f32() };
+    } else if (type === "scan") {
+        const encoding = view.getUint8(o); o += 1;
+        const angle_min = f32(), angle_increment = f32(), range_max = f32();
+        const count = view.getUint32(o, true); o += 4;
+
+        // 정렬(alignment)이 맞지 않을 수 있으므로 복사 후 TypedArray 로 본다
+        const raw = buffer.slice(o);
+        const ranges = encoding === 1
+            ? Float32Array.from(new Uint16Array(raw, 0, count), v => v / 1000)
+            : new Float32Array(raw, 0, count);
+        data = { angle_min, angle_increment, range_max, ranges };
+    }
+
+    return { type, robot, timestamp, seq, data };
+}
+
+class ViewerSocket {
+    constructor() {
+        this.ws = null;
+        this.subs = new Map();   // 채널 이름 -> { msg, handler }
+        this.decoder = new TextDecoder();
+        this.connect();
+    }
+
+    static label(channel, source, robot, tier, format = "json", scan = "f32") {
+        if (channel === "state" && format === "binary") {
+            return ["state_bin", source, robot, scan].join(":");
+        }
+        const parts = [channel, source, robot];
+        if (tier && tier !== "full" && channel !== "state") parts.push(tier);
+        return parts.join(":");
+    }
+
+    connect() {
+        this.ws = new WebSocket(`ws://${location.host}/viewer/ws`);
+        this.ws.binaryType = "arraybuffer";
+
+        // (재)연결되면 현재 구독 목록을 다시 등록
+        this.ws.onopen = () => {
+            for (const sub of this.subs.values()) {
+                this.send({ op: "subscribe", ...sub.msg });
+            }
+        };
+        this.ws.onmessage = e => this.dispatch(e.data);
+        this.ws.onclose = () => setTimeout(() => this.connect(), 1000);
+    }
+
+    send(obj) {
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.ws.send(JSON.stringify(obj));
+        }
+    }
+
+    // format / scan : state 채널만 사용 ("binary" 이면 handler 는 ArrayBuffer 를 받는다)
+    subscribe(channel, source, robot, handler, tier = "full", format = "json", scan = "f32") {
+        const label = ViewerSocket.label(channel, source, robot, tier, format, scan);
+        const msg = { channel, source, robot, tier, format, scan };
+
+        this.subs.set(label, { msg, handler });
+        this.send({ op: "subscribe", ...msg });
+        return label;
+    }
+
+    unsubscribe(label) {
+        const sub = this.subs.get(label);
+        if (!sub) return;
+
+        this.subs.delete(label);
+        this.send({ op: "unsubscribe", ...sub.msg });
+    }
+
+    unsubscribeAll() {
+        for (const label of [...this.subs.keys()]) this.unsubscribe(label);
+    }
+
+    dispatch(data) {
+        // 영상 프레임 / binary 상태 frame
+        if (data instanceof ArrayBuffer) {
+            const bytes = new Uint8Array(data);
+            const n = bytes[0];
+            const label = this.decoder.decode(bytes.subarray(1, 1 + n));
+            this.subs.get(label)?.handler(data.slice(1 + n));
+            return;
+        }
+
+        let msg;
+        try {
+            msg = JSON.parse(data);
+        } catch (_) {
+            return;
+        }
+
+        // subscribed / unsubscribed / error 같은 제어 메시지
+        if (!msg.channel) {
+            if (msg.type === "error") console.warn("[VIEWER][WS]", msg.detail);
+            return;
+        }
+
+        // 해제한 채널의 늦게 도착한 메시지는 무시
+        this.subs.get(msg.channel)?.handler(msg);
+    }
+}
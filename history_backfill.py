@@ -0,0 +1,162 @@
+# history_backfill.py
+# 기존 robot_state_history(넓은 테이블) → type 별 히스토리 테이블 이관 도구
+#
+# 실행:
+#   python history_backfill.py             # 전체 이관
+#   python history_backfill.py --dry-run   # 저장 없이 type 별 row 수만 출력
+#
+# - odom_history / cmd_vel_history / battery_history / scan_history 로 나눠서 INSERT
+#   * pos_x, pos_y             → odom_history
+#   * linear / angular 속도    → cmd_vel_history
+#   * battery_percentage       → battery_history
+#   * scan_blob (없으면 scan_json 을 압축) → scan_history
+# - 기존 DATETIME(초 단위) 에서 같은 초의 row 는 id 순서대로 1µs 씩 밀어서 key 충돌 방지
+#   (state_history_worker 와 같은 규칙)
+# - INSERT IGNORE 로 저장 → 처음부터 다시 실행해도 중복 저장 없음
+# - 이관이 끝난 뒤 robot_state_history 는 읽지 않으므로 확인 후 직접 정리
+#
+# 환경변수:
+#   DATABASE_URL          : 대상 DB (앱과 동일)
+#   HISTORY_BACKFILL_BATCH : 한 번에 읽을 row 수, 기본 5000
+import argparse
+import os
+import time
+
+from sqlalchemy import inspect, insert, select
+
+from app.config.database import Base, SessionLocal, engine
+from app.models.robot_history import (
+    BatteryHistory,
+    CmdVelHistory,
+    OdomHistory,
+    ScanHistory,
+)
+from app.models.robot_state_history import RobotStateHistory
+from app.services.scan_codec import decode_scan_json, encode_scan
+from app.services.state_history_worker import unique_timestamp
+
+BATCH = int(os.getenv("HISTORY_BACKFILL_BATCH", "5000"))
+
+
+def _insert_ignore(model):
+    # 이미 이관된 key 는 건너뛴다 (MySQL / SQLite)
+    return (
+        insert(model)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+
+def _scan_blob(row) -> bytes | None:
+    blob = getattr(row, "scan_blob", None)
+    if blob:
+        return blob
+
+    scan = decode_scan_json(row.scan_json)
+    if scan is None:
+        return None
+    return encode_scan(scan.ranges, scan.angle_min, scan.angle_increment, scan.range_max)
+
+
+def split_row(row, last_seen: dict) -> list:
+    """
+    넓은 row 1개 → [(테이블, row dict), ...]
+    """
+    out = []
+
+    def add(model, values):
+        ts = unique_timestamp(last_seen, model.__tablename__, row.robot_name, row.timestamp)
+        out.append((model, {"robot_name": row.robot_name, "timestamp": ts, **values}))
+
+    if row.pos_x is not None and row.pos_y is not None:
+        add(OdomHistory, {"pos_x": row.pos_x, "pos_y": row.pos_y})
+
+    if row.linear_velocity is not None or row.angular_velocity is not None:
+        add(CmdVelHistory, {
+            "linear_velocity": row.linear_velocity,
+            "angular_velocity": row.angular_velocity,
+        })
+
+    if row.battery_percentage is not None:
+        add(BatteryHistory, {"percentage": row.battery_percentage})
+
+    blob = _scan_blob(row)
+    if blob is not None:
+        add(ScanHistory, {"scan_blob": blob})
+
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="robot_state_history → type 별 테이블 이관")
+    parser.add_argument("--dry-run", action="store_true", help="저장 없이 row 수만 출력")
+    args = parser.parse_args()
+
+    # type 별 테이블이 없으면 생성 (앱을 한 번도 실행하지 않은 DB 대비)
+    Base.metadata.create_all(bind=engine)
+
+    legacy = RobotStateHistory
+    columns = [
+        legacy.id,
+        legacy.robot_name,
+        legacy.timestamp,
+        legacy.pos_x,
+        legacy.pos_y,
+        legacy.linear_velocity,
+        legacy.angular_velocity,
+        legacy.battery_percentage,
+        legacy.scan_json,
+    ]
+    # scan_backfill.py 를 실행하기 전 DB 에는 scan_blob 컬럼이 없을 수 있다
+    existing = {c["name"] for c in inspect(engine).get_columns(legacy.__tablename__)}
+    if "scan_blob" in existing:
+        columns.append(legacy.scan_blob)
+
+    # (테이블, robot_name) → 마지막 timestamp
+    last_seen: dict = {}
+    counts = {
+        model.__tablename__: 0
+        for model in (OdomHistory, CmdVelHistory, BatteryHistory, ScanHistory)
+    }
+    last_id = 0
+    started = time.perf_counter()
+
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(*columns)
+                .where(legacy.id > last_id)
+                .where(legacy.timestamp.isnot(None))
+                .order_by(legacy.id)
+                .limit(BATCH)
+            ).all()
+            if not rows:
+                break
+
+            grouped: dict = {}
+            for row in rows:
+                last_id = row.id
+                for model, values in split_row(row, last_seen):
+                    grouped.setdefault(model, []).append(values)
+
+            for model, model_rows in grouped.items():
+                counts[model.__tablename__] += len(model_rows)
+                if not args.dry_run:
+                    db.execute(_insert_ignore(model), model_rows)
+            if not args.dry_run:
+                db.commit()
+        finally:
+            db.close()
+
+        print(f"[BACKFILL] last id={last_id} {counts}")
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"[BACKFILL] done in {elapsed:.1f}s {counts}"
+        + (" (dry-run)" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
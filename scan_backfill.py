@@ -0,0 +1,140 @@
+# scan_backfill.py
+# 기존 scan_json 컬럼(JSON / 텍스트) → scan_blob(압축 binary) 변환 도구
+#
+# 실행:
+#   python scan_backfill.py              # 실제 로봇 DB + 시뮬레이션 DB 변환
+#   python scan_backfill.py --dry-run    # 변환 없이 용량 비교만 출력
+#   python scan_backfill.py --drop-json  # 변환한 row 의 scan_json 을 NULL 로 비움
+#
+# - scan_blob 컬럼이 없으면 먼저 ALTER TABLE 로 추가한다 (create_all 은 기존 테이블을 바꾸지 않음)
+# - id 순서로 BATCH 개씩 처리 → 중단 후 다시 실행해도 이어서 진행
+# - scan 이 아닌 row 에 남아 있던 JSON 'null' 은 SQL NULL 로 정리
+# - MySQL 에서 --drop-json 후 실제 파일 용량을 줄이려면 OPTIMIZE TABLE 필요
+#
+# 환경변수:
+#   DATABASE_URL / SIM_DATABASE_URL : 대상 DB (앱과 동일)
+#   SCAN_BACKFILL_BATCH             : 한 번에 처리할 row 수, 기본 1000
+import argparse
+import json
+import os
+import time
+
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.types import LargeBinary
+
+from app.config.database import SessionLocal, engine
+from app.config.database_simulation import SessionLocalSim, engine_sim
+from app.models.robot_state_history import RobotStateHistory
+from app.models.simulation_robot_data import SimulationRobotData
+from app.services.scan_codec import decode_scan_json, encode_scan
+
+BATCH = int(os.getenv("SCAN_BACKFILL_BATCH", "1000"))
+
+TARGETS = (
+    ("robot", engine, SessionLocal, RobotStateHistory),
+    ("sim", engine_sim, SessionLocalSim, SimulationRobotData),
+)
+
+
+def ensure_blob_column(db_engine, model) -> None:
+    table = model.__tablename__
+    columns = {c["name"] for c in inspect(db_engine).get_columns(table)}
+    if "scan_blob" in columns:
+        return
+
+    blob_type = LargeBinary().compile(dialect=db_engine.dialect)
+    with db_engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN scan_blob {blob_type}"))
+    print(f"[BACKFILL] {table}: scan_blob column added")
+
+
+def _json_size(value) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+def backfill(name, db_engine, session_factory, model, dry_run: bool, drop_json: bool):
+    if not dry_run:
+        ensure_blob_column(db_engine, model)
+
+    stats = {"rows": 0, "skipped": 0, "json_bytes": 0, "blob_bytes": 0}
+    last_id = 0
+    started = time.perf_counter()
+
+    while True:
+        db = session_factory()
+        try:
+            query = (
+                select(model.id, model.scan_json)
+                .where(model.id > last_id)
+                .where(model.scan_json.isnot(None))
+                .order_by(model.id)
+                .limit(BATCH)
+            )
+            # dry-run 은 scan_blob 컬럼이 아직 없을 수도 있으므로 조건 생략
+            if not dry_run:
+                query = query.where(model.scan_blob.is_(None))
+
+            rows = db.execute(query).all()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                last_id = row.id
+                scan = decode_scan_json(row.scan_json)
+                if scan is None:
+                    # 이전 worker 가 scan 이 아닌 row 에 남긴 JSON 'null' → SQL NULL
+                    stats["skipped"] += 1
+                    updates.append({"id": row.id, "scan_json": None})
+                    continue
+
+                blob = encode_scan(
+                    scan.ranges, scan.angle_min, scan.angle_increment, scan.range_max
+                )
+                stats["rows"] += 1
+                stats["json_bytes"] += _json_size(row.scan_json)
+                stats["blob_bytes"] += len(blob)
+
+                values = {"id": row.id, "scan_blob": blob}
+                if drop_json:
+                    values["scan_json"] = None
+                updates.append(values)
+
+            if updates and not dry_run:
+                # primary key 기준 bulk UPDATE (executemany 1번)
+                db.execute(update(model), updates)
+                db.commit()
+        finally:
+            db.close()
+
+        print(f"[BACKFILL] {name}: {stats['rows']} rows (last id={last_id})")
+
+    elapsed = time.perf_counter() - started
+    ratio = stats["blob_bytes"] / stats["json_bytes"] if stats["json_bytes"] else 0.0
+    print(
+        f"[BACKFILL] {name} done: rows={stats['rows']} skipped={stats['skipped']} "
+        f"json={stats['json_bytes']}B blob={stats['blob_bytes']}B "
+        f"ratio={ratio:.3f} elapsed={elapsed:.1f}s"
+        + (" (dry-run)" if dry_run else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="scan_json → scan_blob backfill")
+    parser.add_argument("--dry-run", action="store_true", help="변환 없이 용량만 비교")
+    parser.add_argument("--drop-json", action="store_true", help="변환 후 scan_json 비우기")
+    parser.add_argument(
+        "--only", choices=[t[0] for t in TARGETS], help="한쪽 DB 만 처리"
+    )
+    args = parser.parse_args()
+
+    for name, db_engine, session_factory, model in TARGETS:
+        if args.only and args.only != name:
+            continue
+        backfill(name, db_engine, session_factory, model, args.dry_run, args.drop_json)
+
+
+if __name__ == "__main__":
+    main()
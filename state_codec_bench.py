@@ -0,0 +1,110 @@
+# state_codec_bench.py
+# 상태 메시지 JSON vs binary(state_codec) 크기 / 인코딩 시간 비교
+#
+# 실행:
+#   python state_codec_bench.py
+#
+# 환경변수:
+#   BENCH_SCAN_POINTS : scan ranges 개수, 기본 360 (TurtleBot3 LDS)
+#   BENCH_ITERATIONS  : 메시지당 반복 횟수, 기본 5000
+import json
+import math
+import os
+import random
+import time
+
+from app.services.broadcast_hub import encode_json
+from app.services.state_codec import decode_state_frame, encode_state_frame
+
+SCAN_POINTS = int(os.getenv("BENCH_SCAN_POINTS", "360"))
+ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "5000"))
+
+ROBOT = "tb3_1"
+
+
+def sample_messages() -> dict:
+    # normalize_scan_data 를 거친 값과 같은 범위 (0 초과 3.5 이하)
+    ranges = [round(random.uniform(0.12, 3.5), 6) for _ in range(SCAN_POINTS)]
+    return {
+        "scan": {
+            "type": "scan",
+            "data": {
+                "angle_min": 0.0,
+                "angle_increment": 2 * math.pi / SCAN_POINTS,
+                "range_max": 3.5,
+                "ranges": ranges,
+            },
+        },
+        "odom": {
+            "type": "odom",
+            "data": {
+                "position": {"x": 1.234567, "y": -0.765432, "z": 0.0},
+                "orientation": {"x": 0.0, "y": 0.0, "z": 0.382683, "w": 0.923880},
+                "twist": {"linear": {"x": 0.22}, "angular": {"z": -0.5}},
+            },
+        },
+        "cmd_vel": {
+            "type": "cmd_vel",
+            "data": {"linear": {"x": 0.2}, "angular": {"z": 0.1}},
+        },
+        "battery": {
+            "type": "battery",
+            "data": {"percentage": 87.5, "voltage": 12.1},
+        },
+    }
+
+
+def timed(fn, iterations: int) -> float:
+    """
+    1회 평균 시간 (µs)
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    print(f"scan points={SCAN_POINTS}, iterations={ITERATIONS}\n")
+    print(f"{'type':<8} {'format':<8} {'bytes':>7} {'ratio':>7} {'encode µs':>10}")
+    print("-" * 44)
+
+    for name, msg in sample_messages().items():
+        text = encode_json(msg)
+        json_bytes = len(text.encode("utf-8"))
+        json_us = timed(lambda: encode_json(msg), ITERATIONS)
+        print(f"{name:<8} {'json':<8} {json_bytes:>7} {1.0:>7.2f} {json_us:>10.1f}")
+
+        for label, quantize in (("f32", False), ("u16", True)):
+            if name != "scan" and quantize:
+                continue
+
+            frame = encode_state_frame(ROBOT, msg, 1, time.time(), quantize)
+            us = timed(
+                lambda: encode_state_frame(ROBOT, msg, 1, 0.0, quantize), ITERATIONS
+            )
+            if name != "scan":
+                label = "binary"
+            print(
+                f"{'':<8} {label:<8} {len(frame):>7} "
+                f"{len(frame) / json_bytes:>7.2f} {us:>10.1f}"
+            )
+
+            # 왕복 확인 (u16 은 1mm 양자화 오차까지 허용)
+            decoded = decode_state_frame(frame)
+            assert decoded["type"] == name and decoded["robot"] == ROBOT
+            if name == "scan":
+                original = msg["data"]["ranges"]
+                err = max(abs(a - b) for a, b in zip(original, decoded["data"]["ranges"]))
+                assert err <= (0.0005 + 1e-6 if quantize else 1e-6), err
+
+        print()
+
+    # JSON 파싱 비용도 참고로 출력 (브라우저 JSON.parse 와 비슷한 규모)
+    scan_text = encode_json(sample_messages()["scan"])
+    parse_us = timed(lambda: json.loads(scan_text), ITERATIONS)
+    print(f"scan json.loads: {parse_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
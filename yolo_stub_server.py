@@ -0,0 +1,62 @@
+# yolo_stub_server.py
+# 로컬 테스트용 YOLO 추론 서버 흉내 (실제 모델 없음)
+#
+# 실행:
+#   uvicorn yolo_stub_server:app --port 8001
+# 대시보드 서버:
+#   YOLO_SERVER_URLS=http://127.0.0.1:8001/infer uvicorn app.main:app
+#
+# 환경변수:
+#   STUB_DELAY      : 추론 1회 지연 시간(초), 기본 0.03
+#   STUB_FAIL_RATE  : 500 에러를 돌려줄 확률 (0.0 ~ 1.0), 기본 0.0
+import asyncio
+import os
+import random
+
+from typing import List
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+
+STUB_DELAY = float(os.getenv("STUB_DELAY", "0.03"))
+STUB_FAIL_RATE = float(os.getenv("STUB_FAIL_RATE", "0.0"))
+
+app = FastAPI(title="YOLO Stub Server")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+def _fake_detections(image: bytes) -> list:
+    return [
+        {
+            "class": "person",
+            "conf": 0.9,
+            "bbox": [10, 10, 110, 210],
+            "size": len(image),
+        }
+    ]
+
+
+@app.post("/infer")
+async def infer(file: UploadFile = File(...)):
+    image = await file.read()
+    await asyncio.sleep(STUB_DELAY)
+
+    if random.random() < STUB_FAIL_RATE:
+        raise HTTPException(status_code=500, detail="stub failure")
+
+    return _fake_detections(image)
+
+
+@app.post("/infer_batch")
+async def infer_batch(files: List[UploadFile] = File(...)):
+    # batch 는 장 수와 상관없이 1회 지연 (GPU batch 흉내)
+    images = [await f.read() for f in files]
+    await asyncio.sleep(STUB_DELAY)
+
+    if random.random() < STUB_FAIL_RATE:
+        raise HTTPException(status_code=500, detail="stub failure")
+
+    return [_fake_detections(image) for image in images]